@@ -0,0 +1,186 @@
+"""
+Laporan trade-off kompresi model: ukuran, memori, latensi, akurasi
+
+Varian dibangun dari model aktif (atau --artifact) dengan ml/compression.py:
+grid jumlah pohon (--trees, pohon dipilih lewat rank_trees) x kedalaman
+maksimum (--depths), plus satu varian forest penuh dengan threshold/leaf
+float32 (--float32 menerapkan float32 ke semua varian grid). Per varian
+dilaporkan:
+
+    size_bytes            artifact joblib tanpa kompresi
+    compressed_bytes      artifact joblib compress=3
+    resident_bytes        kenaikan RSS proses baru setelah joblib.load varian
+    single_row_us         predict_proba 1 baris (median antar round)
+    batch_row_us          predict_proba batch 4096 baris, per baris
+    accuracy / f1_macro   pada holdout tetap (ml/holdout.py)
+    agreement             fraksi prediksi holdout yang sama dengan model asli
+
+Pohon diurutkan pada set seleksi terpisah (seed holdout + 1) agar angka di
+holdout tidak ikut dioptimasi. Latensi mengukur forest saja (input sudah
+di-scale) dengan n_jobs=1, sama seperti jalur request.
+
+Usage:
+    python benchmarks/bench_compression.py
+    python benchmarks/bench_compression.py --trees 300,100,50 --depths none,10 --output compression.json
+    python benchmarks/bench_compression.py --trees 100 --depths 12 --save ml/artifacts/model-100x12.joblib
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from bench_pipeline import machine_metadata, run_case
+
+BATCH_ROWS = 4096
+SELECTION_ROWS = 2000
+
+# Dijalankan di proses baru: RSS sebelum dan sesudah load artifact
+RSS_PROBE = """
+import sys, joblib, sklearn.ensemble
+def rss():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * {page_size}
+before = rss()
+artifact = joblib.load(sys.argv[1])
+print(rss() - before)
+"""
+
+def _parse_list(value: str) -> list:
+    return [None if item.strip().lower() == "none" else int(item) for item in value.split(",")]
+
+def resident_bytes(path: str) -> int:
+    code = RSS_PROBE.format(page_size=os.sysconf("SC_PAGE_SIZE"))
+    output = subprocess.run([sys.executable, "-c", code, path], capture_output=True, text=True, check=True)
+    return int(output.stdout.strip().splitlines()[-1])
+
+def artifact_sizes(model, scaler, work_dir: str) -> tuple:
+    import joblib
+    raw_path = os.path.join(work_dir, "variant.joblib")
+    compressed_path = os.path.join(work_dir, "variant-compressed.joblib")
+    joblib.dump({"model": model, "scaler": scaler}, raw_path)
+    joblib.dump({"model": model, "scaler": scaler}, compressed_path, compress=3)
+    return os.path.getsize(raw_path), os.path.getsize(compressed_path), resident_bytes(raw_path)
+
+def measure(model, scaler, X_holdout, y_holdout, reference, rounds: int, min_time: float, work_dir: str) -> dict:
+    import numpy as np
+    from sklearn.metrics import accuracy_score, f1_score
+
+    model.n_jobs = 1
+    predictions = model.predict(X_holdout)
+    single_row = X_holdout[:1]
+    batch = np.resize(X_holdout, (BATCH_ROWS, X_holdout.shape[1]))
+    single = run_case(lambda: model.predict_proba(single_row), rounds, min_time)
+    batched = run_case(lambda: model.predict_proba(batch), rounds, min_time)
+    size, compressed, resident = artifact_sizes(model, scaler, work_dir)
+    return {
+        "n_trees": len(model.estimators_),
+        "max_depth": max(estimator.tree_.max_depth for estimator in model.estimators_),
+        "node_count": int(sum(estimator.tree_.node_count for estimator in model.estimators_)),
+        "size_bytes": size,
+        "compressed_bytes": compressed,
+        "resident_bytes": resident,
+        "single_row_us": statistics.median(single["samples"]) * 1e6,
+        "batch_row_us": statistics.median(batched["samples"]) * 1e6 / BATCH_ROWS,
+        "accuracy": float(accuracy_score(y_holdout, predictions)),
+        "f1_macro": float(f1_score(y_holdout, predictions, average="macro")),
+        "agreement": float(np.mean(predictions == reference)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--artifact", help="Artifact joblib (default: model aktif dari get_stress_model)")
+    parser.add_argument("--trees", default="all,150,100,50,25",
+                        help="Jumlah pohon dipisah koma; 'all' = semua pohon")
+    parser.add_argument("--depths", default="none,12,8,6", help="Kedalaman maksimum dipisah koma; 'none' = tanpa batas")
+    parser.add_argument("--float32", action="store_true", help="Bulatkan threshold/leaf ke float32 di semua varian grid")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.1, help="Durasi minimum per round latensi (detik)")
+    parser.add_argument("--output", help="Simpan laporan ke file JSON")
+    parser.add_argument("--save", help="Simpan varian grid pertama sebagai artifact model (MODEL_ARTIFACT_PATH)")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    import numpy as np
+    import pandas as pd
+    from ml.compression import compress_forest, rank_trees
+    from ml.holdout import HOLDOUT_SEED, build_holdout, load_holdout
+    from ml.random_forest_model import StressPredictionModel, get_stress_model
+
+    if args.artifact:
+        source = StressPredictionModel(autoload=False)
+        source.load_artifact(args.artifact)
+    else:
+        source = get_stress_model()
+    model, scaler = source.model, source.scaler
+    total_trees = len(model.estimators_)
+
+    def scale(X):
+        return scaler.transform(pd.DataFrame(np.asarray(X), columns=source.feature_names))
+
+    holdout = load_holdout(source.feature_names)
+    X_holdout, y_holdout = scale(holdout.X), np.asarray(holdout.y)
+    X_select, _ = build_holdout(source.feature_names, SELECTION_ROWS, seed=HOLDOUT_SEED + 1)
+
+    trees = sorted({total_trees if item in ("all", None) else min(int(item), total_trees)
+                    for item in args.trees.split(",")}, reverse=True)
+    depths = _parse_list(args.depths)
+    order = rank_trees(model, scale(X_select), max(trees)) if min(trees) < total_trees else None
+    reference = model.predict(X_holdout)
+
+    variants = [("original", None), ("original f32", (total_trees, None, True))]
+    for n_trees in trees:
+        for max_depth in depths:
+            if n_trees == total_trees and max_depth is None and not args.float32:
+                continue
+            name = f"trees={n_trees} depth={max_depth or 'full'}{' f32' if args.float32 else ''}"
+            variants.append((name, (n_trees, max_depth, args.float32)))
+    if args.save and len(variants) < 3:
+        parser.error("--save needs at least one grid variant (--trees/--depths other than the original model)")
+
+    results = {}
+    header = (f"{'variant':<28} {'size KB':>9} {'zip KB':>8} {'RSS KB':>8} {'1-row us':>9} "
+              f"{'row us':>8} {'acc':>7} {'f1':>7} {'agree':>7}")
+    print(header)
+    with tempfile.TemporaryDirectory(prefix="relaxaid-compression-") as work_dir:
+        for name, spec in variants:
+            variant = model if spec is None else compress_forest(
+                model, n_trees=spec[0], max_depth=spec[1], float32=spec[2], tree_order=order
+            )
+            result = measure(variant, scaler, X_holdout, y_holdout, reference, args.rounds, args.min_time, work_dir)
+            results[name] = result
+            print(f"{name:<28} {result['size_bytes'] / 1024:>9.0f} {result['compressed_bytes'] / 1024:>8.0f} "
+                  f"{result['resident_bytes'] / 1024:>8.0f} {result['single_row_us']:>9.1f} "
+                  f"{result['batch_row_us']:>8.2f} {result['accuracy']:>7.3f} {result['f1_macro']:>7.3f} "
+                  f"{result['agreement']:>7.3f}")
+
+            if args.save and name == variants[2][0]:
+                compressed = StressPredictionModel(autoload=False)
+                compressed.model, compressed.scaler = variant, scaler
+                compressed.save_artifact(args.save, compress=3, metadata={
+                    "compression": {"n_trees": spec[0], "max_depth": spec[1], "float32": spec[2]},
+                    "parent_model": source.content_hash,
+                    "holdout": {"version": holdout.version, **result},
+                })
+                print(f"  saved to {args.save}")
+
+    if args.output:
+        report = {
+            "metadata": dict(machine_metadata(), holdout_version=holdout.version,
+                             holdout_hash=holdout.content_hash, source_model=source.content_hash),
+            "results": results,
+        }
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\nsaved to {args.output}")
+
+if __name__ == "__main__":
+    main()
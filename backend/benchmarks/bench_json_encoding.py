@@ -0,0 +1,122 @@
+"""
+Benchmark waktu encode JSON per endpoint: jalur lama vs jalur cepat
+
+Jalur lama meniru FastAPI untuk endpoint yang mengembalikan dict: salin field
+pydantic model ke dict baru, ``jsonable_encoder`` lalu ``json.dumps``.
+Jalur cepat memakai ``ModelJSONResponse`` (serializer pydantic-core) atau
+``FastJSONResponse`` (orjson) dari services/serialization.py.
+
+Usage:
+    python benchmarks/bench_json_encoding.py --iterations 2000
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+SAMPLE_ACTIVITY = {
+    "screen_time_total": 8.5, "durasi_pemakaian": 7.0, "frekuensi_penggunaan": 12.0,
+    "jumlah_aplikasi": 15, "notifikasi_count": 45, "durasi_tidur": 7.0, "durasi_makan": 2.0,
+    "durasi_olahraga": 1.0, "main_game": 2.5, "belajar_online": 3.0, "buka_sosmed": 2.0,
+    "streaming": 1.5, "scroll_time": 1.0, "email_time": 0.5, "panggilan_time": 0.3,
+    "waktu_pagi": 1, "waktu_siang": 1, "waktu_sore": 1, "waktu_malam": 1, "jumlah_aktivitas": 8
+}
+
+def starlette_json(content) -> bytes:
+    """Encoding yang dipakai fastapi.responses.JSONResponse"""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def time_per_call(fn, iterations: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def build_cases():
+    """Payload representatif untuk setiap endpoint hot path"""
+    logging.disable(logging.INFO)
+    from fastapi.encoders import jsonable_encoder
+    from schemas.digital_activity_schema import DigitalActivityInput, AdvancedPredictionResponse
+    from services.predict import predict_stress_from_digital_activity
+    from services.serialization import dumps
+    from routers.admin import _get_feature_interpretation
+    from ml.random_forest_model import stress_model
+
+    activity = DigitalActivityInput(**SAMPLE_ACTIVITY)
+    result = predict_stress_from_digital_activity(activity, user_id=None)
+    wellness = activity.get_digital_wellness_score()
+    timestamp = datetime.now().isoformat()
+
+    def advanced_legacy():
+        content = {
+            "status": "success",
+            "predicted_class": result.predicted_class,
+            "predicted_label": result.predicted_label,
+            "confidence_score": result.confidence_score,
+            "probabilities": result.probabilities,
+            "top_features": result.top_features,
+            "model_info": result.model_info,
+            "recommendations": result.recommendations,
+            "wellness_score": wellness,
+            "timestamp": timestamp
+        }
+        return starlette_json(jsonable_encoder(content))
+
+    def advanced_fast():
+        response = AdvancedPredictionResponse.from_prediction(result, wellness_score=wellness, timestamp=timestamp)
+        return response.__pydantic_serializer__.to_json(response)
+
+    now = datetime.now()
+    dashboard = {
+        "total_predictions": 1240,
+        "last_prediction": {"predicted_label": "Sedang", "prediction_date": now.isoformat(), "confidence_score": 71.2},
+        "recent_stress_levels": {"Rendah": 12, "Sedang": 9, "Tinggi": 4},
+        "weekly_trend": "menurun",
+        "recent_activities": [
+            {"date": (now - timedelta(days=i)).date().isoformat(), "screen_time": 6.5 + i,
+             "social_media": 2.0, "notifications": 80 + i, "stress_level": "Sedang"}
+            for i in range(7)
+        ],
+        "user_id": 1
+    }
+
+    importances = dict(zip(stress_model.feature_names, stress_model.feature_importances))
+    total = sum(importances.values())
+    feature_payload = {
+        "status": "success",
+        "model_version": "1.0.0",
+        "analysis_timestamp": timestamp,
+        "all_features": [
+            {"rank": i + 1, "feature_name": name.replace('_', ' ').title(), "feature_key": name,
+             "importance_score": float(value), "importance_percentage": float(value / total * 100),
+             "interpretation": _get_feature_interpretation(name, value)}
+            for i, (name, value) in enumerate(sorted(importances.items(), key=lambda x: x[1], reverse=True))
+        ]
+    }
+
+    return [
+        ("POST /prediksi/advanced", advanced_legacy, advanced_fast),
+        ("GET /prediksi/dashboard-stats", lambda: starlette_json(jsonable_encoder(dashboard)), lambda: dumps(dashboard)),
+        ("GET /admin/model/feature-importance", lambda: starlette_json(jsonable_encoder(feature_payload)), lambda: dumps(feature_payload)),
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'endpoint':<36} {'legacy us':>10} {'fast us':>10} {'speedup':>8}")
+    for name, legacy, fast in build_cases():
+        assert json.loads(legacy()) == json.loads(fast()), f"Payload mismatch for {name}"
+        legacy_us = time_per_call(legacy, args.iterations)
+        fast_us = time_per_call(fast, args.iterations)
+        print(f"{name:<36} {legacy_us:>10.1f} {fast_us:>10.1f} {legacy_us / fast_us:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
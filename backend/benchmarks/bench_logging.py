@@ -0,0 +1,124 @@
+"""
+Benchmark overhead logging per prediksi di hot path
+
+Forest evaluation dan feature importance diganti hasil cache agar yang
+terukur hanya pipeline Python + logging. Setiap mode menjalankan
+``predict_stress_from_digital_activity`` N kali dengan log ditulis ke file
+sementara, lalu membandingkan median dengan mode ``disabled``.
+
+Mode:
+    disabled       logging.disable(CRITICAL), batas bawah
+    sync           StreamHandler sinkron, tanpa sampling (semua baris ditulis)
+    async          queue handler + listener thread, tanpa sampling
+    async-sampled  queue handler + LOG_SAMPLING (konfigurasi default)
+
+``--sink-latency-us`` menambahkan jeda per write untuk meniru stderr yang
+di-pipe ke collector lambat (journald, docker log driver, dll.).
+
+Usage:
+    python benchmarks/bench_logging.py --iterations 3000
+    python benchmarks/bench_logging.py --sink-latency-us 200
+"""
+import argparse
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from bench_json_encoding import SAMPLE_ACTIVITY
+
+class SlowSink:
+    """File wrapper dengan jeda per write"""
+
+    def __init__(self, target, latency_us: float):
+        self.target = target
+        self.latency = latency_us / 1e6
+
+    def write(self, data):
+        if self.latency:
+            time.sleep(self.latency)
+        return self.target.write(data)
+
+    def flush(self):
+        self.target.flush()
+
+def build_pipeline():
+    logging.disable(logging.CRITICAL)
+    import numpy as np
+    from ml.random_forest_model import stress_model, StressPredictionModel
+    from schemas.digital_activity_schema import DigitalActivityInput
+    from services.predict import predict_stress_from_digital_activity
+
+    cached_probabilities = stress_model._predict_probabilities(np.zeros((1, len(stress_model.feature_names))))
+    cached_importances = stress_model.feature_importances
+    stress_model._predict_probabilities = lambda rows: cached_probabilities
+    StressPredictionModel.feature_importances = property(lambda self: cached_importances)
+    logging.disable(logging.NOTSET)
+
+    activity = DigitalActivityInput(**SAMPLE_ACTIVITY)
+    return lambda: predict_stress_from_digital_activity(activity, user_id=None)
+
+def configure(mode: str, log_file):
+    import config.logging_config as logging_config
+    from config.settings import settings
+
+    logging_config.stop_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(logging.INFO)
+    logging.disable(logging.CRITICAL if mode == "disabled" else logging.NOTSET)
+    if mode == "disabled":
+        return
+
+    settings.LOG_SAMPLING = settings.LOG_SAMPLING if mode == "async-sampled" else ""
+    if mode == "sync":
+        handler = logging.StreamHandler(log_file)
+        handler.setFormatter(logging_config.KeyValueFormatter())
+        root.addHandler(handler)
+        return
+
+    # Listener menulis ke file yang sama dengan mode sync
+    logging_config._start_listener(log_file)
+
+def measure(fn, iterations: int) -> float:
+    for _ in range(50):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=3000)
+    parser.add_argument("--sink-latency-us", type=float, default=0.0)
+    args = parser.parse_args()
+
+    import config.logging_config as logging_config
+    from config.settings import settings
+    default_sampling = settings.LOG_SAMPLING
+
+    predict = build_pipeline()
+    results = {}
+    with tempfile.TemporaryFile("w") as raw_file:
+        log_file = SlowSink(raw_file, args.sink_latency_us)
+        for mode in ("disabled", "sync", "async", "async-sampled"):
+            settings.LOG_SAMPLING = default_sampling
+            configure(mode, log_file)
+            results[mode] = measure(predict, args.iterations)
+            logging_config.stop_logging()
+
+    baseline = results["disabled"]
+    print(f"{'mode':<16} {'median us':>10} {'overhead us':>12}")
+    for mode, value in results.items():
+        print(f"{mode:<16} {value:>10.1f} {value - baseline:>12.1f}")
+
+if __name__ == "__main__":
+    main()
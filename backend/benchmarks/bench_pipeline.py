@@ -0,0 +1,240 @@
+"""
+Benchmark suite pipeline prediksi dengan baseline JSON
+
+Case:
+    input_validation          DigitalActivityInput(**payload)
+    model_predict             StressPredictionModel.predict (satu sampel, jalur endpoint)
+    predict_proba_batch_1     StressPredictionModel.predict_proba_batch, batch 1 / 64 / 4096
+                              (baris dari holdout tetap ml/holdout.py)
+    predict_proba_batch_64
+    predict_proba_batch_4096
+    prediksi_stres_digital    wrapper dict yang dipanggil services/predict.py
+    generate_recommendations
+    wellness_score            DigitalActivityInput.get_digital_wellness_score
+    full_pipeline             predict_stress_from_digital_activity dengan user_id; insert
+                              database diganti stub sehingga yang terukur hanya CPU
+
+Setiap case dijalankan beberapa round; tiap round mengulang case sampai
+--min-time detik. Yang dilaporkan median (dan min/max) waktu per panggilan antar
+round, plus waktu per baris untuk case batch.
+
+Hasil disimpan sebagai JSON bersama metadata mesin (CPU, versi Python/numpy/
+sklearn, thread budget, commit, hash model). --compare membandingkan waktu
+terbaik (min antar round, lebih tahan noise scheduler dibanding median) dengan
+baseline tersimpan dan exit 1 jika ada case yang lebih lambat dari --threshold
+(default 10%). Bandingkan hanya hasil dari mesin yang sama;
+metadata yang berbeda dilaporkan sebagai peringatan.
+
+Usage:
+    python benchmarks/bench_pipeline.py --save benchmarks/baselines/pipeline.json
+    python benchmarks/bench_pipeline.py --compare benchmarks/baselines/pipeline.json
+    python benchmarks/bench_pipeline.py --cases model_predict,full_pipeline --rounds 9
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from bench_json_encoding import SAMPLE_ACTIVITY
+
+BATCH_SIZES = (1, 64, 4096)
+DEFAULT_THRESHOLD = 0.10
+# Metadata yang harus sama agar perbandingan bermakna
+COMPARABLE_METADATA = (
+    "cpu_model", "cpu_count", "python", "numpy", "sklearn", "native_threads", "inference_n_jobs", "holdout_version"
+)
+
+def build_cases() -> dict:
+    """{nama: (fn, rows_per_call)}"""
+    logging.disable(logging.CRITICAL)
+    import numpy as np
+    import services.predict as predict_service
+    from ml.holdout import load_holdout
+    from ml.random_forest_model import get_stress_model, prediksi_stres_digital
+    from schemas.digital_activity_schema import DigitalActivityInput
+
+    model = get_stress_model()
+    activity = DigitalActivityInput(**SAMPLE_ACTIVITY)
+    features = [float(SAMPLE_ACTIVITY[name]) for name in model.feature_names]
+    result = prediksi_stres_digital(**SAMPLE_ACTIVITY)
+
+    # Batch dari holdout tetap (ml/holdout.py): baris realistis yang sama di setiap run
+    holdout = load_holdout(model.feature_names)
+    batches = {
+        size: np.resize(np.asarray(holdout.X), (size, len(features)))
+        for size in BATCH_SIZES
+    }
+
+    # Stub database: full_pipeline mengukur jalur simpan tanpa koneksi
+    predict_service.save_prediction_to_database = lambda **kwargs: 1
+    predict_service.save_feature_importance_logs = lambda **kwargs: None
+
+    cases = {
+        "input_validation": (lambda: DigitalActivityInput(**SAMPLE_ACTIVITY), 1),
+        "model_predict": (lambda: model.predict(features), 1),
+    }
+    for size, rows in batches.items():
+        cases[f"predict_proba_batch_{size}"] = (lambda rows=rows: model.predict_proba_batch(rows), size)
+    cases.update({
+        "prediksi_stres_digital": (lambda: prediksi_stres_digital(**SAMPLE_ACTIVITY), 1),
+        "generate_recommendations": (
+            lambda: predict_service.generate_recommendations(result["predicted_label"], result["top_features"], activity), 1
+        ),
+        "wellness_score": (activity.get_digital_wellness_score, 1),
+        "full_pipeline": (lambda: predict_service.predict_stress_from_digital_activity(activity, user_id=1), 1),
+    })
+    return cases
+
+def run_case(fn, rounds: int, min_time: float) -> dict:
+    """Waktu per panggilan (detik) untuk setiap round"""
+    # Warmup + kalibrasi jumlah iterasi per round
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 4 or iterations >= 1_000_000:
+            break
+        iterations *= 2
+    iterations = max(1, int(iterations * min_time / max(elapsed, 1e-9)))
+
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        samples.append((time.perf_counter() - start) / iterations)
+    return {"iterations": iterations, "samples": samples}
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+def machine_metadata() -> dict:
+    import numpy
+    import sklearn
+    from config.settings import settings
+    from ml.holdout import HOLDOUT_VERSION
+    from ml.random_forest_model import get_stress_model
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "cpu_model": _cpu_model(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "sklearn": sklearn.__version__,
+        "native_threads": settings.NATIVE_THREADS,
+        "inference_n_jobs": settings.INFERENCE_N_JOBS,
+        "git_commit": _git_commit(),
+        "model_build": get_stress_model().version_tag,
+        "holdout_version": HOLDOUT_VERSION,
+    }
+
+def summarize(measured: dict, rows: int) -> dict:
+    samples = measured["samples"]
+    median = statistics.median(samples)
+    return {
+        "rows_per_call": rows,
+        "iterations_per_round": measured["iterations"],
+        "rounds": len(samples),
+        "median_us": round(median * 1e6, 3),
+        "min_us": round(min(samples) * 1e6, 3),
+        "max_us": round(max(samples) * 1e6, 3),
+        "per_row_us": round(median * 1e6 / rows, 3),
+    }
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Case yang waktu terbaiknya lebih lambat dari baseline * (1 + threshold)"""
+    for key in COMPARABLE_METADATA:
+        ours, theirs = current["metadata"].get(key), baseline["metadata"].get(key)
+        if ours != theirs:
+            print(f"⚠️ metadata differs: {key} = {ours!r} (baseline {theirs!r})")
+
+    regressions = []
+    print(f"\n{'case (best of rounds)':<26} {'baseline us':>12} {'current us':>12} {'change':>9}")
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            print(f"{name:<26} {'-':>12} {result['min_us']:>12.1f} {'new':>9}")
+            continue
+        change = result["min_us"] / reference["min_us"] - 1
+        marker = ""
+        if change > threshold:
+            regressions.append(name)
+            marker = "  ❌ regression"
+        print(f"{name:<26} {reference['min_us']:>12.1f} {result['min_us']:>12.1f} {change:>+8.1%}{marker}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", help="Daftar case dipisah koma (default semua)")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.2, help="Durasi minimum per round (detik)")
+    parser.add_argument("--save", help="Simpan hasil ke file JSON (baseline)")
+    parser.add_argument("--compare", help="Bandingkan dengan baseline JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Batas perlambatan relatif sebelum dianggap regresi (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    cases = build_cases()
+    selected = args.cases.split(",") if args.cases else list(cases)
+    unknown = [name for name in selected if name not in cases]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+
+    results = {}
+    print(f"{'case':<26} {'median us':>12} {'per row us':>12} {'spread':>9}")
+    for name in selected:
+        fn, rows = cases[name]
+        summary = summarize(run_case(fn, args.rounds, args.min_time), rows)
+        results[name] = summary
+        spread = (summary["max_us"] - summary["min_us"]) / summary["median_us"]
+        print(f"{name:<26} {summary['median_us']:>12.1f} {summary['per_row_us']:>12.3f} {spread:>8.1%}")
+
+    report = {"metadata": machine_metadata(), "results": results}
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\nsaved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} case(s) slower than baseline by more than {args.threshold:.0%}: "
+                  f"{', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\n✅ no regressions beyond {args.threshold:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Import-time budget dan waktu start-to-ready untuk backend
+
+Budget (dicek oleh script ini, exit code 1 jika dilanggar):
+- ``import main`` selesai dalam IMPORT_BUDGET_SECONDS (median beberapa run)
+- ``import main`` tidak memuat modul berat di LAZY_MODULES; sklearn, pandas,
+  scipy dan evaluator baru di-import saat model di-load / evaluasi diminta
+- dengan --serve: waktu dari start uvicorn sampai /ready = 200 dilaporkan
+  (tanpa MODEL_ARTIFACT_PATH termasuk training forest)
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5
+    MODEL_ARTIFACT_PATH=ml/artifacts/model.joblib python benchmarks/bench_startup.py --serve
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+IMPORT_BUDGET_SECONDS = 1.0
+LAZY_MODULES = ("sklearn", "pandas", "scipy", "joblib", "ml.model_evaluator")
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+def measure_import() -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE], cwd=SRC_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def slowest_imports(limit: int = 10) -> list:
+    """Modul dengan cumulative import time terbesar (python -X importtime)"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"], cwd=SRC_DIR, capture_output=True, text=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line.replace("import time:", "").split("|")
+        rows.append((int(cumulative_us), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:limit]
+
+def measure_ready(port: int, timeout: float) -> float:
+    env = dict(os.environ, API_RELOAD="false")
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=SRC_DIR, env=env
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError, OSError):
+                pass
+            time.sleep(0.05)
+        raise TimeoutError(f"/ready not 200 after {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--serve", action="store_true", help="Ukur juga start uvicorn sampai /ready")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ready-timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    results = [measure_import() for _ in range(args.runs)]
+    median_seconds = statistics.median(r["seconds"] for r in results)
+    loaded = set(results[-1]["modules"])
+    eager = sorted(m for m in LAZY_MODULES if m in loaded)
+
+    print(f"import main: median {median_seconds:.3f}s over {args.runs} runs (budget {IMPORT_BUDGET_SECONDS:.1f}s)")
+    print("slowest imports (cumulative):")
+    for cumulative_us, name in slowest_imports():
+        print(f"  {cumulative_us / 1e6:7.3f}s  {name}")
+    if eager:
+        print(f"modules that should be lazy but were imported: {', '.join(eager)}")
+
+    if args.serve:
+        print(f"start to /ready: {measure_ready(args.port, args.ready_timeout):.2f}s")
+
+    if median_seconds > IMPORT_BUDGET_SECONDS or eager:
+        print("❌ import-time budget exceeded")
+        sys.exit(1)
+    print("✅ within import-time budget")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark throughput prediksi untuk berbagai CPU thread budget
+
+Setiap konfigurasi dijalankan di subprocess terpisah karena batas thread
+native harus di-set sebelum numpy di-import. Di dalam subprocess, sejumlah
+client thread memanggil ``stress_model.predict`` secara closed-loop untuk
+mensimulasikan request thread di satu worker uvicorn.
+
+Usage:
+    python benchmarks/bench_thread_budget.py --duration 5 --clients 16
+    python benchmarks/bench_thread_budget.py --configs 1:1 2:1 all:1 all:4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+SAMPLE_INPUT = [
+    7.0, 60.0, 15, 45, 7.0, 2.0, 1.0, 2.5, 3.0, 2.0,
+    1.5, 1.0, 0.5, 0.3, 1, 1, 1, 1, 8
+]
+
+def run_worker(duration: float, clients: int) -> dict:
+    """Jalankan closed-loop load di proses ini dan kembalikan statistik"""
+    sys.path.insert(0, str(SRC_DIR))
+    from config.threads import configure_native_thread_env
+    configure_native_thread_env()
+    import logging
+    logging.disable(logging.INFO)
+    from ml.random_forest_model import stress_model
+
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        local = []
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            stress_model.predict(list(SAMPLE_INPUT))
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    stress_model.predict(list(SAMPLE_INPUT))  # warm-up
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else 0.0
+
+    return {
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": pct(0.50),
+        "p99_ms": pct(0.99),
+    }
+
+def run_config(inference_jobs: str, native_threads: str, duration: float, clients: int) -> dict:
+    """Jalankan satu konfigurasi thread budget di subprocess baru"""
+    env = dict(os.environ)
+    env["INFERENCE_N_JOBS"] = inference_jobs
+    env["NATIVE_THREADS"] = native_threads
+    for name in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        env.pop(name, None)
+    output = subprocess.run(
+        [sys.executable, __file__, "--worker", "--duration", str(duration), "--clients", str(clients)],
+        env=env, cwd=str(SRC_DIR), capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result.update({"inference_n_jobs": inference_jobs, "native_threads": native_threads})
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=5.0, help="Detik per konfigurasi")
+    parser.add_argument("--clients", type=int, default=16, help="Jumlah request thread konkuren")
+    parser.add_argument("--configs", nargs="*", default=["1:1", "2:1", "all:1", "all:all"],
+                        help="Daftar INFERENCE_N_JOBS:NATIVE_THREADS ('all' = semua core)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.duration, args.clients)))
+        return
+
+    cpu_count = os.cpu_count() or 1
+    print(f"CPU cores: {cpu_count}, clients: {args.clients}, duration: {args.duration}s")
+    print(f"{'inference n_jobs':>16} {'native':>7} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for config in args.configs:
+        inference_jobs, native_threads = config.split(":")
+        if inference_jobs == "all":
+            inference_jobs = "-1"
+        if native_threads == "all":
+            native_threads = str(cpu_count)
+        r = run_config(inference_jobs, native_threads, args.duration, args.clients)
+        print(f"{r['inference_n_jobs']:>16} {r['native_threads']:>7} {r['throughput_rps']:>9.1f} "
+              f"{r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+Load test end-to-end: PostgreSQL sementara + serve.py + campuran route
+
+Langkah:
+1. ``initdb`` + ``pg_ctl start`` di direktori sementara (port bebas, socket di
+   direktori yang sama), lalu ``database/schema.sql`` di-load. Dengan
+   --database-url dipakai database yang sudah ada (schema tidak di-load ulang).
+2. ``serve.py --workers N`` dijalankan terhadap database tersebut dan ditunggu
+   sampai /ready = 200.
+3. Untuk setiap level konkurensi, N virtual user (closed loop: kirim request,
+   tunggu response, kirim lagi) memilih route sesuai bobot --mix selama
+   --duration detik setelah --warmup. Setiap virtual user punya profil
+   aktivitas sintetis sendiri (seed tetap) sehingga input model bervariasi.
+4. Per level dan per route dilaporkan throughput, error (status >= 400 atau
+   exception) dan latency p50/p95/p99; --output menyimpan hasil sebagai JSON.
+
+Route di --mix:
+    predict    POST /prediksi (format modern)
+    advanced   POST /prediksi/advanced
+    dashboard  GET  /prediksi/dashboard-stats
+    riwayat    GET  /prediksi/riwayat
+    admin      GET  /admin/analytics/* (stress-distribution, feature-importance,
+               user-activity bergiliran)
+
+Catatan:
+- PostgreSQL menolak berjalan sebagai root; gunakan --run-as <user> (runuser)
+  jika script dijalankan sebagai root.
+- Binary dicari di --pg-bin / PG_BIN, lalu PATH.
+- Load generator berjalan di mesin yang sama dengan server; untuk capacity
+  planning yang akurat jalankan dengan --base-url ke deployment terpisah.
+- Membutuhkan httpx (sudah terpasang bersama TestClient FastAPI).
+
+Usage:
+    python benchmarks/load_test.py --workers 2 --concurrency 1,8,32 --duration 30
+    python benchmarks/load_test.py --mix advanced=70,dashboard=20,admin=10 --output load.json
+    python benchmarks/load_test.py --database-url postgresql://postgres@127.0.0.1:5432/relaxaid
+    python benchmarks/load_test.py --base-url http://staging:8000 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlparse
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SRC_DIR = BACKEND_DIR / "src"
+SCHEMA_PATH = BACKEND_DIR.parent / "database" / "schema.sql"
+
+DEFAULT_MIX = "predict=30,advanced=30,dashboard=15,riwayat=15,admin=10"
+ADMIN_ANALYTICS_PATHS = (
+    "/admin/analytics/stress-distribution",
+    "/admin/analytics/feature-importance",
+    "/admin/analytics/user-activity",
+)
+PERCENTILES = (50, 95, 99)
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _find_binary(name: str, pg_bin: str = None) -> str:
+    if pg_bin:
+        candidate = Path(pg_bin) / name
+        if candidate.exists():
+            return str(candidate)
+    found = shutil.which(name)
+    if not found:
+        sys.exit(f"❌ {name} not found; pass --pg-bin or set PG_BIN to the PostgreSQL bin directory")
+    return found
+
+class ThrowawayPostgres:
+    """Cluster PostgreSQL sementara yang dihapus saat keluar dari context"""
+
+    def __init__(self, pg_bin: str = None, run_as: str = None, database: str = "relaxaid_load"):
+        self.initdb = _find_binary("initdb", pg_bin)
+        self.pg_ctl = _find_binary("pg_ctl", pg_bin)
+        self.run_as = run_as
+        self.database = database
+        self.port = _free_port()
+        self.directory = tempfile.mkdtemp(prefix="relaxaid-pg-")
+        self.data_dir = os.path.join(self.directory, "data")
+
+    def _run(self, *command):
+        if self.run_as:
+            command = ("runuser", "-u", self.run_as, "--") + command
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+
+    def __enter__(self):
+        if self.run_as:
+            shutil.chown(self.directory, user=self.run_as)
+        elif os.geteuid() == 0:
+            sys.exit("❌ PostgreSQL refuses to run as root; pass --run-as <user>")
+        self._run(self.initdb, "-D", self.data_dir, "-U", "postgres", "-A", "trust", "--no-sync")
+        options = f"-p {self.port} -k {self.directory} -c listen_addresses=127.0.0.1 -c fsync=off"
+        self._run(self.pg_ctl, "-D", self.data_dir, "-l", os.path.join(self.directory, "postgres.log"),
+                  "-o", options, "-w", "start")
+        self._create_database()
+        return self
+
+    def _create_database(self):
+        import psycopg2
+        conn = psycopg2.connect(host="127.0.0.1", port=self.port, user="postgres", dbname="postgres")
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f'CREATE DATABASE "{self.database}"')
+        conn.close()
+
+        conn = psycopg2.connect(host="127.0.0.1", port=self.port, user="postgres", dbname=self.database)
+        with conn, conn.cursor() as cursor:
+            cursor.execute(SCHEMA_PATH.read_text())
+        conn.close()
+
+    @property
+    def url(self) -> str:
+        return f"postgresql://postgres@127.0.0.1:{self.port}/{self.database}"
+
+    def __exit__(self, *exc_info):
+        try:
+            self._run(self.pg_ctl, "-D", self.data_dir, "-m", "fast", "-w", "stop")
+        finally:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        return False
+
+def database_env(url: str) -> dict:
+    parsed = urlparse(url)
+    return {
+        "DATABASE_HOST": parsed.hostname or "127.0.0.1",
+        "DATABASE_PORT": str(parsed.port or 5432),
+        "DATABASE_NAME": parsed.path.lstrip("/"),
+        "DATABASE_USER": parsed.username or "postgres",
+        "DATABASE_PASSWORD": parsed.password or "",
+    }
+
+class AppServer:
+    """serve.py sebagai subprocess, ditunggu sampai /ready"""
+
+    def __init__(self, database_url: str, workers: int, extra_env: dict = None):
+        self.port = _free_port()
+        self.workers = workers
+        self.env = dict(os.environ, API_RELOAD="false", LOG_LEVEL="WARNING",
+                        **database_env(database_url), **(extra_env or {}))
+        self.process = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, "serve.py", "--port", str(self.port), "--workers", str(self.workers)],
+            cwd=SRC_DIR, env=self.env
+        )
+        wait_ready(self.base_url, timeout=300, process=self.process)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        return False
+
+def wait_ready(base_url: str, timeout: float, process=None):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            sys.exit(f"❌ server exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"{base_url}/ready", timeout=2) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.2)
+    sys.exit(f"❌ {base_url}/ready not 200 after {timeout}s")
+
+def synthetic_activity(rng: random.Random) -> dict:
+    """Profil aktivitas harian acak dalam rentang realistis (mirip _create_dummy_model)"""
+    durasi_pemakaian = round(rng.uniform(1, 14), 1)
+    activity = {
+        "durasi_pemakaian": durasi_pemakaian,
+        "frekuensi_penggunaan": round(rng.uniform(5, 80), 1),
+        "jumlah_aplikasi": rng.randint(3, 40),
+        "notifikasi_count": rng.randint(5, 200),
+        "durasi_tidur": round(rng.uniform(3, 10), 1),
+        "durasi_makan": round(rng.uniform(0.5, 3), 1),
+        "durasi_olahraga": round(rng.uniform(0, 2), 1),
+        "main_game": round(rng.uniform(0, 4), 1),
+        "belajar_online": round(rng.uniform(0, 5), 1),
+        "buka_sosmed": round(rng.uniform(0, 6), 1),
+        "streaming": round(rng.uniform(0, 4), 1),
+        "scroll_time": round(rng.uniform(0, 3), 1),
+        "email_time": round(rng.uniform(0, 1.5), 1),
+        "panggilan_time": round(rng.uniform(0, 1.5), 1),
+        "waktu_pagi": rng.randint(0, 1),
+        "waktu_siang": rng.randint(0, 1),
+        "waktu_sore": rng.randint(0, 1),
+        "waktu_malam": rng.randint(0, 1),
+        "jumlah_aktivitas": rng.randint(1, 12),
+    }
+    activity["screen_time_total"] = durasi_pemakaian
+    return activity
+
+def parse_mix(spec: str) -> dict:
+    mix = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if item:
+            name, weight = item.split("=")
+            mix[name.strip()] = float(weight)
+    unknown = set(mix) - set(ROUTES)
+    if unknown:
+        sys.exit(f"❌ unknown routes in --mix: {', '.join(sorted(unknown))}")
+    return mix
+
+def _route_predict(user):
+    return "POST", "/prediksi", user["activity"]
+
+def _route_advanced(user):
+    return "POST", "/prediksi/advanced", user["activity"]
+
+def _route_dashboard(user):
+    return "GET", "/prediksi/dashboard-stats", None
+
+def _route_riwayat(user):
+    return "GET", f"/prediksi/riwayat?limit=10&days={user['rng'].choice((7, 30, 90))}", None
+
+def _route_admin(user):
+    return "GET", f"{user['rng'].choice(ADMIN_ANALYTICS_PATHS)}?days={user['rng'].choice((7, 30, 365))}", None
+
+ROUTES = {
+    "predict": _route_predict,
+    "advanced": _route_advanced,
+    "dashboard": _route_dashboard,
+    "riwayat": _route_riwayat,
+    "admin": _route_admin,
+}
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return None
+    # Nearest-rank
+    index = min(len(sorted_values) - 1, max(0, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+async def run_level(base_url: str, concurrency: int, mix: dict, duration: float, warmup: float,
+                    seed: int, timeout: float) -> dict:
+    """Jalankan satu level konkurensi; return statistik per route"""
+    import httpx
+
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    status_counts = {name: {} for name in names}
+    start = time.monotonic()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    async def virtual_user(index: int, client):
+        rng = random.Random(seed * 100_003 + index)
+        user = {"rng": rng, "activity": synthetic_activity(rng)}
+        while True:
+            now = time.monotonic()
+            if now >= stop_at:
+                return
+            name = rng.choices(names, weights)[0]
+            method, path, body = ROUTES[name](user)
+            sent = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = "exception"
+            elapsed = time.perf_counter() - sent
+            if now < measure_from:
+                continue
+            samples[name].append(elapsed)
+            status_counts[name][str(status)] = status_counts[name].get(str(status), 0) + 1
+            if status == "exception" or status >= 400:
+                errors[name] += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        await asyncio.gather(*(virtual_user(index, client) for index in range(concurrency)))
+
+    routes = {}
+    all_samples = []
+    for name in names:
+        values = sorted(samples[name])
+        all_samples.extend(values)
+        routes[name] = _summarize(values, errors[name], duration)
+        routes[name]["status"] = status_counts[name]
+    overall = _summarize(sorted(all_samples), sum(errors.values()), duration)
+    return {"concurrency": concurrency, "duration_seconds": duration, "overall": overall, "routes": routes}
+
+def _summarize(sorted_values: list, errors: int, duration: float) -> dict:
+    summary = {
+        "requests": len(sorted_values),
+        "errors": errors,
+        "throughput_rps": round(len(sorted_values) / duration, 2),
+    }
+    for pct in PERCENTILES:
+        value = percentile(sorted_values, pct)
+        summary[f"p{pct}_ms"] = round(value * 1000, 2) if value is not None else None
+    return summary
+
+def print_level(result: dict):
+    print(f"\nconcurrency {result['concurrency']}:")
+    print(f"  {'route':<10} {'requests':>9} {'errors':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    rows = list(result["routes"].items()) + [("overall", result["overall"])]
+    for name, stats in rows:
+        cells = [f"{stats[f'p{pct}_ms']:>9.1f}" if stats[f"p{pct}_ms"] is not None else f"{'-':>9}"
+                 for pct in PERCENTILES]
+        print(f"  {name:<10} {stats['requests']:>9} {stats['errors']:>7} {stats['throughput_rps']:>8.1f} "
+              + " ".join(cells))
+
+def run_levels(base_url: str, args, mix: dict) -> list:
+    results = []
+    for concurrency in (int(value) for value in args.concurrency.split(",")):
+        result = asyncio.run(run_level(base_url, concurrency, mix, args.duration, args.warmup,
+                                       args.seed, args.request_timeout))
+        print_level(result)
+        results.append(result)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,8,32", help="Level konkurensi dipisah koma")
+    parser.add_argument("--duration", type=float, default=30.0, help="Durasi pengukuran per level (detik)")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Warmup per level, tidak diukur (detik)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Bobot route, mis. advanced=70,admin=30")
+    parser.add_argument("--workers", type=int, default=1, help="Jumlah worker serve.py")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--request-timeout", type=float, default=30.0)
+    parser.add_argument("--pg-bin", default=os.getenv("PG_BIN"), help="Direktori bin PostgreSQL (initdb, pg_ctl)")
+    parser.add_argument("--run-as", help="Jalankan PostgreSQL sebagai user ini (wajib jika script dijalankan root)")
+    parser.add_argument("--database-url", help="Pakai database yang sudah ada, bukan cluster sementara")
+    parser.add_argument("--base-url", help="Uji server yang sudah berjalan (tanpa database/serve.py lokal)")
+    parser.add_argument("--output", help="Simpan hasil JSON")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    report = {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "mix": mix,
+        "workers": args.workers,
+        "cpu_count": os.cpu_count(),
+    }
+
+    if args.base_url:
+        wait_ready(args.base_url, timeout=30)
+        report["base_url"] = args.base_url
+        report["levels"] = run_levels(args.base_url, args, mix)
+    elif args.database_url:
+        with AppServer(args.database_url, args.workers) as server:
+            report["levels"] = run_levels(server.base_url, args, mix)
+    else:
+        with ThrowawayPostgres(args.pg_bin, args.run_as) as postgres:
+            print(f"🐘 throwaway PostgreSQL at {postgres.url}")
+            with AppServer(postgres.url, args.workers) as server:
+                report["levels"] = run_levels(server.base_url, args, mix)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\nsaved to {args.output}")
+
+if __name__ == "__main__":
+    main()
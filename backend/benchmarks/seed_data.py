@@ -0,0 +1,411 @@
+"""
+Seeder data sintetis massal: users, digital_activities, predictions, feature logs
+
+Untuk benchmark endpoint analytics dengan volume realistis (puluhan juta baris).
+
+- Fitur aktivitas memakai distribusi yang sama dengan training dummy model
+  (``generate_activity_features`` di ml/random_forest_model.py). Setiap user
+  mendapat profil dasar sendiri; aktivitas harian = profil dasar dengan variasi
+  harian, efek akhir pekan (lebih banyak sosmed/streaming, lebih sedikit
+  belajar/email, tidur lebih lama) dan tingkat keaktifan per user (tidak semua
+  user mengisi setiap hari).
+- ``created_at`` mengikuti pola diurnal (puncak pagi, siang dan malam hari).
+- Label: ``rules`` (default) memakai skor stres klinis yang sama dengan label
+  training (``stress_scores``), probabilitas diturunkan dari jarak skor ke
+  ambang kelas. ``model`` menjalankan forest (lebih lambat, ~30 us per baris).
+- Feature log = personal importance per prediksi (19 baris per prediksi, sama
+  seperti yang ditulis services/predict.py).
+- Data dimuat lewat ``COPY ... FROM STDIN (FORMAT binary)`` yang dibangun
+  langsung dari array numpy, oleh --jobs proses paralel (satu koneksi per
+  proses, satu shard user per proses). Id diberikan eksplisit (blok id per
+  user) sehingga antar tabel tidak perlu RETURNING; sequence di-setval di akhir.
+- --defer-indexes menghapus index sekunder selama load lalu membuatnya ulang
+  (jauh lebih cepat untuk load besar), diakhiri ANALYZE.
+
+Usage:
+    python benchmarks/seed_data.py --users 10000 --days 365 --jobs 4 \\
+        --database-url postgresql://postgres@127.0.0.1:5432/relaxaid --defer-indexes
+    python benchmarks/seed_data.py --users 200 --days 30 --no-feature-logs
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import struct
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from urllib.parse import urlparse
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+PG_EPOCH = datetime(2000, 1, 1)
+COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+COPY_TRAILER = struct.pack(">h", -1)
+
+MODEL_VERSION = "1.0.0"
+STRESS_LABELS = np.array([b"Rendah", b"Sedang", b"Tinggi"])
+# Pusat skor per kelas (ambang 4.0 dan 7.5) untuk probabilitas mode rules
+CLASS_SCORE_CENTERS = np.array([2.0, 5.75, 9.5])
+PROBABILITY_TEMPERATURE = 1.5
+# Bobot jam aktivitas 00..23: puncak pagi, makan siang dan malam
+HOURLY_WEIGHTS = np.array([
+    0.6, 0.3, 0.2, 0.1, 0.1, 0.3, 1.2, 2.5, 2.8, 2.0, 1.6, 1.8,
+    2.6, 2.4, 1.6, 1.5, 1.7, 2.0, 2.6, 3.2, 3.6, 3.8, 3.0, 1.6,
+])
+# Efek akhir pekan: faktor pengali (fitur kontinu) atau tambahan jam (durasi_tidur)
+WEEKEND_FACTORS = {
+    "durasi_pemakaian": 1.2, "buka_sosmed": 1.3, "streaming": 1.4, "main_game": 1.3,
+    "belajar_online": 0.5, "email_time": 0.4, "durasi_olahraga": 1.2, "scroll_time": 1.2,
+}
+WEEKEND_EXTRA_SLEEP = 0.8
+INTEGER_FEATURES = ("jumlah_aplikasi", "notifikasi_count", "jumlah_aktivitas")
+BINARY_FEATURES = ("waktu_pagi", "waktu_siang", "waktu_sore", "waktu_malam")
+
+ACTIVITY_COLUMNS = (
+    "id", "user_id", "tanggal", "screen_time_total", "durasi_pemakaian", "frekuensi_penggunaan",
+    "jumlah_aplikasi", "notifikasi_count", "durasi_tidur", "durasi_makan", "durasi_olahraga",
+    "main_game", "belajar_online", "buka_sosmed", "streaming", "scroll_time", "email_time",
+    "panggilan_time", "waktu_pagi", "waktu_siang", "waktu_sore", "waktu_malam", "jumlah_aktivitas", "created_at",
+)
+PREDICTION_COLUMNS = (
+    "id", "user_id", "digital_activity_id", "predicted_stress_level", "confidence_score",
+    "probability_rendah", "probability_sedang", "probability_tinggi", "model_version", "prediction_date",
+)
+FEATURE_LOG_COLUMNS = (
+    "id", "prediction_id", "feature_name", "importance_score", "rank_position", "model_version", "created_at",
+)
+SEQUENCE_TABLES = ("users", "digital_activities", "predictions", "feature_importance_logs")
+DEFERRABLE_TABLES = ("digital_activities", "predictions", "feature_importance_logs")
+
+def connect(url: str):
+    import psycopg2
+    parsed = urlparse(url)
+    return psycopg2.connect(
+        host=parsed.hostname or "127.0.0.1", port=parsed.port or 5432, dbname=parsed.path.lstrip("/"),
+        user=parsed.username or "postgres", password=parsed.password or ""
+    )
+
+def database_url_from_settings() -> str:
+    from config.settings import settings
+    password = f":{settings.DATABASE_PASSWORD}" if settings.DATABASE_PASSWORD else ""
+    return (f"postgresql://{settings.DATABASE_USER}{password}@{settings.DATABASE_HOST}:"
+            f"{settings.DATABASE_PORT}/{settings.DATABASE_NAME}")
+
+# --- Binary COPY ---------------------------------------------------------------
+
+def _pg_dtype(kind: str):
+    return {"int4": ">i4", "int8": ">i8", "float8": ">f8", "date": ">i4", "timestamp": ">i8"}[kind]
+
+def binary_copy_block(columns: list) -> bytes:
+    """
+    Baris COPY binary dari kolom numpy berpanjang tetap, tanpa loop Python per baris
+
+    columns: list (kind, values). kind "int4"/"int8"/"float8"/"date"/"timestamp"
+    (values sudah dalam unit PostgreSQL: hari / mikrodetik sejak 2000-01-01) atau
+    "text" (bytes dengan panjang sama untuk semua baris, boleh skalar).
+    """
+    n_rows = next(len(values) for kind, values in columns if np.ndim(values) > 0)
+    fields = [("count", ">i2")]
+    for index, (kind, values) in enumerate(columns):
+        if kind == "text":
+            width = len(values) if np.ndim(values) == 0 else np.asarray(values).dtype.itemsize
+            fields += [(f"len{index}", ">i4"), (f"v{index}", f"S{width}")]
+        else:
+            fields += [(f"len{index}", ">i4"), (f"v{index}", _pg_dtype(kind))]
+    rows = np.empty(n_rows, dtype=np.dtype(fields))
+    rows["count"] = len(columns)
+    for index, (kind, values) in enumerate(columns):
+        dtype = rows.dtype[f"v{index}"]
+        rows[f"len{index}"] = dtype.itemsize
+        rows[f"v{index}"] = values
+    return rows.tobytes()
+
+def copy_binary(cursor, table: str, column_names: tuple, blocks: list):
+    payload = io.BytesIO()
+    payload.write(COPY_HEADER)
+    for block in blocks:
+        payload.write(block)
+    payload.write(COPY_TRAILER)
+    payload.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(column_names)}) FROM STDIN (FORMAT binary)", payload)
+    return payload.tell()
+
+def _pg_days(day: date) -> int:
+    return (day - PG_EPOCH.date()).days
+
+# --- Generator -----------------------------------------------------------------
+
+def daily_activities(feature_names: list, base: np.ndarray, n_days: int, weekend: np.ndarray,
+                     rng: np.random.Generator) -> np.ndarray:
+    """Array (n_users, n_days, n_features): profil dasar + variasi harian + efek akhir pekan"""
+    from ml.random_forest_model import generate_activity_features
+    n_users, n_features = base.shape
+    days = np.repeat(base[:, None, :], n_days, axis=1)
+    # Sebagian variasi harian diambil dari distribusi populasi, sisanya kebiasaan user
+    population = generate_activity_features(feature_names, n_users * n_days, rng).reshape(n_users, n_days, n_features)
+    days = 0.75 * days + 0.25 * population
+    days *= rng.lognormal(0.0, 0.15, size=days.shape)
+
+    for name, factor in WEEKEND_FACTORS.items():
+        column = feature_names.index(name)
+        days[:, weekend, column] *= factor
+    days[:, weekend, feature_names.index("durasi_tidur")] += WEEKEND_EXTRA_SLEEP
+
+    for name in BINARY_FEATURES:
+        column = feature_names.index(name)
+        # Kebiasaan user (profil dasar 0/1) menentukan peluang harian
+        probability = np.where(base[:, column] >= 0.5, 0.85, 0.15)[:, None]
+        if name == "waktu_malam":
+            probability = probability + np.where(weekend, 0.1, 0.0)[None, :]
+        days[:, :, column] = rng.random((n_users, n_days)) < probability
+    for name in INTEGER_FEATURES:
+        column = feature_names.index(name)
+        days[:, :, column] = np.maximum(1, np.round(days[:, :, column]))
+    days[:, :, feature_names.index("durasi_tidur")] = np.clip(days[:, :, feature_names.index("durasi_tidur")], 3.5, 12)
+    return np.round(days, 2)
+
+def rule_probabilities(scores: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Probabilitas (n, 3) dari jarak skor ke pusat kelas (+ jitter kecil agar confidence bervariasi)"""
+    logits = -np.abs(scores[:, None] - CLASS_SCORE_CENTERS[None, :]) / PROBABILITY_TEMPERATURE
+    logits += rng.normal(0.0, 0.25, size=logits.shape)
+    logits -= logits.max(axis=1, keepdims=True)
+    weights = np.exp(logits)
+    return weights / weights.sum(axis=1, keepdims=True)
+
+def seed_shard(job: dict) -> dict:
+    """Generate dan COPY data untuk user[first_user:last_user] (dijalankan di proses worker)"""
+    import logging
+    logging.disable(logging.CRITICAL)
+    from ml.random_forest_model import get_stress_model, generate_activity_features, stress_scores
+
+    model = get_stress_model()
+    feature_names = model.feature_names
+    n_features = len(feature_names)
+    global_importance = np.asarray(job["global_importance"])
+    n_days = job["days"]
+    start_day = job["start_day"]
+    day_dates = [start_day + timedelta(days=offset) for offset in range(n_days)]
+    weekend = np.array([day.weekday() >= 5 for day in day_dates])
+    day_numbers = np.array([_pg_days(day) for day in day_dates], dtype=np.int64)
+    feature_name_bytes = [name.encode() for name in feature_names]
+    hour_probabilities = HOURLY_WEIGHTS / HOURLY_WEIGHTS.sum()
+
+    rng = np.random.default_rng([job["seed"], job["first_user"]])
+    conn = connect(job["database_url"])
+    totals = {"activities": 0, "predictions": 0, "feature_logs": 0, "bytes": 0}
+    try:
+        with conn.cursor() as cursor:
+            for chunk_start in range(job["first_user"], job["last_user"], job["chunk_users"]):
+                chunk_end = min(chunk_start + job["chunk_users"], job["last_user"])
+                n_users = chunk_end - chunk_start
+
+                base = generate_activity_features(feature_names, n_users, rng)
+                days = daily_activities(feature_names, base, n_days, weekend, rng)
+                engagement = np.clip(rng.beta(2.0, 1.2, n_users), 0.2, 0.98)
+                active = rng.random((n_users, n_days)) < engagement[:, None]
+
+                user_index, day_index = np.nonzero(active)
+                rows = days[user_index, day_index]
+                n_rows = len(rows)
+                if n_rows == 0:
+                    continue
+
+                # Blok id per user-hari: id tidak bertabrakan antar shard tanpa koordinasi
+                local_ids = (chunk_start + user_index).astype(np.int64) * n_days + day_index
+                activity_ids = job["activity_id_base"] + local_ids
+                prediction_ids = job["prediction_id_base"] + local_ids
+                user_ids = job["user_id_base"] + chunk_start + user_index
+
+                seconds = (rng.choice(24, n_rows, p=hour_probabilities) * 3600
+                           + rng.integers(0, 3600, n_rows)).astype(np.int64)
+                created_us = day_numbers[day_index] * 86_400_000_000 + seconds * 1_000_000
+                predicted_us = created_us + rng.integers(50_000, 500_000, n_rows)
+
+                if job["labels"] == "model":
+                    probabilities = np.concatenate([
+                        model.predict_proba_batch(rows[offset:offset + 50_000])
+                        for offset in range(0, n_rows, 50_000)
+                    ])
+                else:
+                    probabilities = rule_probabilities(stress_scores(rows, feature_names, rng), rng)
+                predicted_class = probabilities.argmax(axis=1)
+
+                column = {name: rows[:, index] for index, name in enumerate(feature_names)}
+                activity_columns = [("int4", activity_ids), ("int4", user_ids), ("date", day_numbers[day_index]),
+                                    ("float8", column["durasi_pemakaian"])]
+                for name in ACTIVITY_COLUMNS[4:-1]:
+                    kind = "int4" if name in INTEGER_FEATURES or name in BINARY_FEATURES else "float8"
+                    activity_columns.append((kind, column[name]))
+                activity_columns.append(("timestamp", created_us))
+                totals["bytes"] += copy_binary(cursor, "digital_activities", ACTIVITY_COLUMNS,
+                                               [binary_copy_block(activity_columns)])
+
+                prediction_block = binary_copy_block([
+                    ("int4", prediction_ids), ("int4", user_ids), ("int4", activity_ids),
+                    ("text", STRESS_LABELS[predicted_class]), ("float8", probabilities.max(axis=1)),
+                    ("float8", probabilities[:, 0]), ("float8", probabilities[:, 1]), ("float8", probabilities[:, 2]),
+                    ("text", MODEL_VERSION.encode()), ("timestamp", predicted_us),
+                ])
+                totals["bytes"] += copy_binary(cursor, "predictions", PREDICTION_COLUMNS, [prediction_block])
+
+                if job["feature_logs"]:
+                    importance = model.personal_importance_batch(rows, global_importance)
+                    # rank 1 = importance terbesar (sama dengan save_feature_importance_logs)
+                    ranks = np.empty_like(importance, dtype=np.int64)
+                    order = np.argsort(-importance, axis=1, kind="stable")
+                    np.put_along_axis(ranks, order, np.arange(1, n_features + 1)[None, :], axis=1)
+                    blocks = []
+                    for index in range(n_features):
+                        blocks.append(binary_copy_block([
+                            ("int4", job["feature_log_id_base"] + local_ids * n_features + index),
+                            ("int4", prediction_ids), ("text", feature_name_bytes[index]),
+                            ("float8", importance[:, index]), ("int4", ranks[:, index]),
+                            ("text", MODEL_VERSION.encode()), ("timestamp", predicted_us),
+                        ]))
+                    totals["bytes"] += copy_binary(cursor, "feature_importance_logs", FEATURE_LOG_COLUMNS, blocks)
+                    totals["feature_logs"] += n_rows * n_features
+
+                conn.commit()
+                totals["activities"] += n_rows
+                totals["predictions"] += n_rows
+    finally:
+        conn.close()
+    return totals
+
+# --- Orkestrasi ----------------------------------------------------------------
+
+def _max_ids(cursor) -> dict:
+    ids = {}
+    for table in SEQUENCE_TABLES:
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+        ids[table] = cursor.fetchone()[0]
+    return ids
+
+def overflowing_tables(base_ids: dict, n_users: int, n_days: int, n_features: int, feature_logs: bool) -> list:
+    """Tabel yang id terbesarnya (max(id) yang ada + blok id run ini) melewati int4"""
+    rows = {
+        "users": n_users,
+        "digital_activities": n_users * n_days,
+        "predictions": n_users * n_days,
+        "feature_importance_logs": n_users * n_days * n_features if feature_logs else 0,
+    }
+    return [table for table in SEQUENCE_TABLES if base_ids[table] + rows[table] >= 2 ** 31]
+
+def insert_users(cursor, first_id: int, n_users: int, start_day: date, run_tag: str):
+    """Users sintetis lewat COPY text (jumlahnya kecil dibanding tabel aktivitas)"""
+    # Hash bcrypt placeholder yang sama dengan user default di schema.sql
+    password = "$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewdBPj9wvq2JKfxG"
+    registered = datetime.combine(start_day, datetime.min.time()) - timedelta(days=1)
+    buffer = io.StringIO()
+    for offset in range(n_users):
+        user_id = first_id + offset
+        buffer.write(f"{user_id}\tSynthetic User {user_id}\tseed-{run_tag}-{user_id}@relaxaid.test\t"
+                     f"{password}\tuser\t{registered.isoformat(sep=' ')}\tt\n")
+    buffer.seek(0)
+    cursor.copy_expert(
+        "COPY users (id, nama, email, password, role, tanggal_daftar, is_active) FROM STDIN", buffer
+    )
+
+def deferred_indexes(cursor) -> list:
+    cursor.execute("""
+        SELECT indexname, indexdef FROM pg_indexes
+        WHERE schemaname = current_schema() AND tablename = ANY(%s) AND indexname NOT LIKE '%%_pkey'
+    """, (list(DEFERRABLE_TABLES),))
+    return cursor.fetchall()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, required=True)
+    parser.add_argument("--days", type=int, required=True, help="Hari riwayat sampai kemarin")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Jumlah proses/stream COPY paralel")
+    parser.add_argument("--chunk-users", type=int, default=500, help="User per batch COPY (batas memori)")
+    parser.add_argument("--labels", choices=("rules", "model"), default="rules")
+    parser.add_argument("--no-feature-logs", action="store_true", help="Lewati feature_importance_logs (19x baris)")
+    parser.add_argument("--defer-indexes", action="store_true", help="Drop index sekunder selama load, buat ulang di akhir")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", help="Default: DATABASE_* dari config/settings.py")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.CRITICAL)
+    from ml.random_forest_model import get_stress_model
+
+    database_url = args.database_url or database_url_from_settings()
+    n_features = 19
+
+    # Model di-load sekali sebelum fork; worker berbagi salinan yang sama
+    model = get_stress_model()
+    global_importance = [float(value) for value in model.feature_importances]
+    start_day = date.today() - timedelta(days=args.days)
+    run_tag = datetime.now().strftime("%Y%m%d%H%M%S")
+
+    started = time.perf_counter()
+    conn = connect(database_url)
+    with conn, conn.cursor() as cursor:
+        base_ids = _max_ids(cursor)
+        # Dicek sebelum apa pun ditulis atau index di-drop
+        overflow = overflowing_tables(base_ids, args.users, args.days, n_features, not args.no_feature_logs)
+        if overflow:
+            sys.exit(f"❌ Existing max(id) + {args.users} users x {args.days} days exceeds the int4 id range of "
+                     f"{', '.join(overflow)}")
+        insert_users(cursor, base_ids["users"] + 1, args.users, start_day, run_tag)
+        indexes = deferred_indexes(cursor) if args.defer_indexes else []
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX IF EXISTS "{name}"')
+    print(f"👥 {args.users} users inserted; seeding {args.days} days with {args.jobs} parallel COPY streams")
+
+    shard_size = -(-args.users // args.jobs)
+    jobs = [{
+        "database_url": database_url,
+        "first_user": first,
+        "last_user": min(first + shard_size, args.users),
+        "chunk_users": args.chunk_users,
+        "days": args.days,
+        "start_day": start_day,
+        "seed": args.seed,
+        "labels": args.labels,
+        "feature_logs": not args.no_feature_logs,
+        "global_importance": global_importance,
+        "user_id_base": base_ids["users"] + 1,
+        "activity_id_base": base_ids["digital_activities"] + 1,
+        "prediction_id_base": base_ids["predictions"] + 1,
+        "feature_log_id_base": base_ids["feature_importance_logs"] + 1,
+    } for first in range(0, args.users, shard_size)]
+
+    context = multiprocessing.get_context("fork")
+    try:
+        with context.Pool(len(jobs)) as pool:
+            results = pool.map(seed_shard, jobs)
+        load_seconds = time.perf_counter() - started
+    finally:
+        # Juga saat load gagal: shard yang sudah commit butuh sequence yang benar,
+        # dan tabel tidak boleh tertinggal tanpa index sekunder
+        with conn, conn.cursor() as cursor:
+            for table in SEQUENCE_TABLES:
+                cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                               f"(SELECT GREATEST(COALESCE(MAX(id), 1), 1) FROM {table}))")
+            index_started = time.perf_counter()
+            for name, definition in indexes:
+                cursor.execute(definition)
+            index_seconds = time.perf_counter() - index_started
+
+    totals = {key: sum(result[key] for result in results) for key in results[0]}
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        for table in SEQUENCE_TABLES:
+            cursor.execute(f"ANALYZE {table}")
+    conn.close()
+
+    elapsed = time.perf_counter() - started
+    rows = totals["activities"] + totals["predictions"] + totals["feature_logs"] + args.users
+    print(f"✅ {totals['activities']:,} activities, {totals['predictions']:,} predictions, "
+          f"{totals['feature_logs']:,} feature logs")
+    print(f"   load {load_seconds:.1f}s ({rows / load_seconds:,.0f} rows/s, {totals['bytes'] / 1e6:,.0f} MB COPY)"
+          + (f", index rebuild {index_seconds:.1f}s" if indexes else "") + f", total {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,193 @@
+import re
+import threading
+import time
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from config.settings import settings
+from services.metrics import DB_STATEMENT_DURATION, DB_CONNECTION_WAIT, DB_ERRORS, registry
+from services.tracing import record_span, record_statement
+from services.slow_queries import slow_query_log
+from services.query_deadline import statement_timeout_ms, current_route_group
 import logging
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def get_connection():
-    """Membuat koneksi ke database PostgreSQL"""
+class DatabaseUnavailableError(Exception):
+    """Database tidak bisa dipakai: circuit breaker open atau gagal connect"""
+
+class StatementTimeoutError(Exception):
+    """Statement dibatalkan PostgreSQL karena melewati statement_timeout koneksi"""
+
+    def __init__(self, label: str, timeout_ms: int, route_group: str = None):
+        super().__init__(f"{label} exceeded statement_timeout of {timeout_ms} ms")
+        self.label = label
+        self.timeout_ms = timeout_ms
+        self.route_group = route_group
+
+class CircuitBreaker:
+    """
+    Circuit breaker untuk koneksi database
+
+    closed    : semua panggilan diteruskan; kegagalan beruntun dihitung
+    open      : setelah failure_threshold kegagalan, panggilan langsung gagal
+                (DatabaseUnavailableError) tanpa menunggu connect timeout
+    half_open : setelah reset_timeout detik satu panggilan dijadikan probe;
+                sukses -> closed (listener recovery dipanggil), gagal -> open lagi
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self._recovery_listeners = []
+
+    def on_recovery(self, callback):
+        """Daftarkan callback yang dipanggil saat breaker kembali closed"""
+        self._recovery_listeners.append(callback)
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == self.OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def before_call(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    raise DatabaseUnavailableError(f"{self.name} circuit breaker is open")
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = True
+                logger.info(f"🔌 {self.name} circuit breaker half-open, probing")
+                return
+            if self._probe_in_flight:
+                raise DatabaseUnavailableError(f"{self.name} circuit breaker is half-open (probe in flight)")
+            self._probe_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            recovered = self.state != self.CLOSED
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+        if recovered:
+            logger.info(f"✅ {self.name} circuit breaker closed, database recovered")
+            for callback in self._recovery_listeners:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error(f"❌ Recovery listener failed: {e}")
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"⚠️ {self.name} circuit breaker opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        return {"state": self.state, "failures": self.failures}
+
+database_breaker = CircuitBreaker(
+    "database",
+    settings.DB_BREAKER_FAILURE_THRESHOLD,
+    settings.DB_BREAKER_RESET_TIMEOUT
+)
+
+_BREAKER_STATE_VALUES = {CircuitBreaker.CLOSED: 0.0, CircuitBreaker.HALF_OPEN: 1.0, CircuitBreaker.OPEN: 2.0}
+registry.gauge(
+    "relaxaid_db_circuit_state", "Database circuit breaker state (0=closed, 1=half_open, 2=open)",
+    callback=lambda: {(): _BREAKER_STATE_VALUES[database_breaker.state]}
+)
+
+def is_connection_failure(error: Exception) -> bool:
+    """OperationalError karena koneksi (bukan statement yang dibatalkan)"""
+    return isinstance(error, psycopg2.OperationalError) and not isinstance(error, psycopg2.errors.QueryCanceled)
+
+_STATEMENT_TARGET = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+([A-Za-z_][\w.]*)", re.IGNORECASE)
+_statement_labels = {}
+
+def statement_label(query) -> str:
+    """Label metrics berkardinalitas rendah untuk SQL: "<VERB> <tabel>" """
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    label = _statement_labels.get(query)
+    if label is None:
+        words = str(query).split(None, 1)
+        verb = words[0].upper() if words else "UNKNOWN"
+        match = _STATEMENT_TARGET.search(str(query))
+        label = f"{verb} {match.group(1).lower()}" if match else verb
+        if len(_statement_labels) < 1024:
+            _statement_labels[query] = label
+    return label
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    """Koneksi yang menyimpan statement_timeout dan route group saat checkout"""
+    statement_timeout_ms = 0
+    route_group = None
+
+def _raise_statement_error(cursor, label: str, error: Exception):
+    DB_ERRORS.labels(label).inc()
+    if isinstance(error, psycopg2.errors.QueryCanceled):
+        connection = cursor.connection
+        raise StatementTimeoutError(label, connection.statement_timeout_ms, connection.route_group) from error
+    if is_connection_failure(error):
+        database_breaker.record_failure()
+    raise error
+
+class InstrumentedCursor(RealDictCursor):
+    """
+    RealDictCursor yang mencatat durasi setiap statement ke /metrics, menghitung
+    statement per request dan meneruskan statement lambat ke slow-query log
+    """
+
+    def execute(self, query, vars=None):
+        label = statement_label(query)
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        except Exception as e:
+            _raise_statement_error(self, label, e)
+        finally:
+            duration = time.perf_counter() - start
+            DB_STATEMENT_DURATION.labels(label).observe(duration)
+            record_statement(label, start, duration)
+            if slow_query_log.is_slow(duration):
+                slow_query_log.record(self, query, vars, label, duration)
+
+    def executemany(self, query, vars_list):
+        label = statement_label(query)
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        except Exception as e:
+            _raise_statement_error(self, label, e)
+        finally:
+            duration = time.perf_counter() - start
+            DB_STATEMENT_DURATION.labels(label).observe(duration)
+            record_statement(label, start, duration)
+            if slow_query_log.is_slow(duration):
+                slow_query_log.record(self, query, vars_list, label, duration, many=True)
+
+def get_connection(statement_timeout: int = None):
+    """
+    Membuat koneksi ke database PostgreSQL
+    Raise DatabaseUnavailableError tanpa menunggu jika circuit breaker open.
+    statement_timeout (ms) default mengikuti route group request (STATEMENT_TIMEOUTS)
+    """
+    database_breaker.before_call()
+    timeout_ms = statement_timeout_ms(statement_timeout)
+    start = time.perf_counter()
     try:
         connection = psycopg2.connect(
             host=settings.DATABASE_HOST,
@@ -16,12 +195,24 @@ def get_connection():
             database=settings.DATABASE_NAME,
             user=settings.DATABASE_USER,
             password=settings.DATABASE_PASSWORD,
-            cursor_factory=RealDictCursor
+            connect_timeout=settings.DATABASE_CONNECT_TIMEOUT,
+            options=f"-c statement_timeout={timeout_ms}",
+            connection_factory=InstrumentedConnection,
+            cursor_factory=InstrumentedCursor
         )
+        connection.statement_timeout_ms = timeout_ms
+        connection.route_group = current_route_group()
+        database_breaker.record_success()
         return connection
     except psycopg2.Error as e:
+        database_breaker.record_failure()
         logger.error(f"Database connection error: {e}")
-        raise Exception(f"Failed to connect to database: {e}")
+        raise DatabaseUnavailableError(f"Failed to connect to database: {e}")
+    finally:
+        # Belum ada pool: waktu connect adalah waktu tunggu koneksi per request
+        duration = time.perf_counter() - start
+        DB_CONNECTION_WAIT.observe(duration)
+        record_span("db_connect", start, duration)
 
 def test_connection():
     """Test koneksi database"""
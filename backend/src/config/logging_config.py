@@ -0,0 +1,220 @@
+"""
+Konfigurasi logging: handler berbasis queue, record key=value dan sampling
+
+Thread request hanya membuat LogRecord dan memasukkannya ke queue; formatting
+dan write ke stderr dilakukan oleh satu thread QueueListener. Message dengan
+%-args (dan nilai ``fields``) baru di-format di thread listener, bukan di
+thread request.
+
+Baris sukses bervolume tinggi ditandai ``sampled_fields(...)`` dan hanya
+sebagian yang diteruskan sesuai LOG_SAMPLING (rate per logger). WARNING ke
+atas dan baris tanpa tanda sampling selalu ditulis.
+
+Usage:
+    logger.info("prediction", extra=sampled_fields(label=label, confidence=confidence))
+    logger.debug("dashboard step=%s user_id=%s", step, user_id)
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from typing import Dict
+
+from config.settings import settings
+from services.tracing import current_trace
+
+class lazy:
+    """Nilai log yang baru dihitung saat di-format di thread listener"""
+
+    __slots__ = ("fn", "args")
+
+    def __init__(self, fn, *args):
+        self.fn = fn
+        self.args = args
+
+    def __str__(self):
+        return str(self.fn(*self.args))
+
+def fields(**values) -> dict:
+    """Extra untuk record terstruktur: ``logger.info("event", extra=fields(k=v))``"""
+    return {"fields": values}
+
+def sampled_fields(**values) -> dict:
+    """Seperti fields(), tetapi record boleh di-sample (baris sukses bervolume tinggi)"""
+    return {"fields": values, "sampled": True}
+
+def parse_sampling_rates(spec: str) -> Dict[str, float]:
+    """Parse "ml.random_forest_model=0.01,routers.prediksi=0.1" menjadi {logger: rate}"""
+    rates = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, rate = item.split("=")
+        rates[name.strip()] = float(rate)
+    return rates
+
+class SamplingFilter(logging.Filter):
+    """Loloskan sebagian record bertanda sampled sesuai rate logger (atau parent terdekat)"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: Dict[str, float] = {}
+        self.dropped = 0
+
+    def _rate_for(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            candidate = name
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition(".")[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False) or record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate_for(record.name)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        self.dropped += 1
+        return False
+
+def _quote(value) -> str:
+    text = str(value)
+    if text == "" or any(c in text for c in ' "=\n'):
+        return '"' + text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+    return text
+
+def _format_field(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return _quote(value)
+
+class KeyValueFormatter(logging.Formatter):
+    """ts=... level=INFO logger=... trace_id=... msg="..." key=value ..."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        parts = [
+            f"ts={self.formatTime(record, '%Y-%m-%dT%H:%M:%S')}.{int(record.msecs):03d}",
+            f"level={record.levelname}",
+            f"logger={record.name}",
+            f"pid={record.process}",
+        ]
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id:
+            parts.append(f"trace_id={trace_id}")
+        parts.append(f"msg={_quote(record.getMessage())}")
+        for key, value in getattr(record, "fields", {}).items():
+            parts.append(f"{key}={_format_field(value)}")
+        line = " ".join(parts)
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+class PlainFormatter(logging.Formatter):
+    """Format lama (levelname:logger:message) ditambah fields jika ada"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        values = getattr(record, "fields", None)
+        if values:
+            line += " " + " ".join(f"{key}={_format_field(value)}" for key, value in values.items())
+        return line
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler yang tidak pernah memblokir thread request: record di-drop
+    (dan dihitung) jika queue penuh, dan message tidak di-format di sini
+    """
+
+    def __init__(self, log_queue, max_size: int):
+        super().__init__(log_queue)
+        self.max_size = max_size
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # QueueHandler bawaan memformat message di thread pemanggil; di sini
+        # hanya trace_id yang diambil (contextvar hanya terlihat dari thread ini).
+        # Konsekuensinya args log tidak boleh dimutasi setelah logger dipanggil.
+        trace = current_trace()
+        record.trace_id = trace.trace_id if trace is not None else None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        # SimpleQueue (tanpa Condition lock) jauh lebih murah dari queue.Queue;
+        # batas ukuran dicek manual (perkiraan, cukup untuk mencegah memori tak terbatas)
+        if self.queue.qsize() >= self.max_size:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(record)
+
+_listener = None
+_queue_handler = None
+
+def _build_formatter() -> logging.Formatter:
+    if settings.LOG_FORMAT == "plain":
+        return PlainFormatter("%(levelname)s:%(name)s:%(message)s")
+    return KeyValueFormatter()
+
+def _start_listener(stream=None):
+    global _listener, _queue_handler
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(stream or sys.stderr)
+    stream_handler.setFormatter(_build_formatter())
+
+    queue_handler = NonBlockingQueueHandler(log_queue, settings.LOG_QUEUE_SIZE)
+    queue_handler.addFilter(SamplingFilter(parse_sampling_rates(settings.LOG_SAMPLING)))
+
+    root = logging.getLogger()
+    if _queue_handler is not None:
+        root.removeHandler(_queue_handler)
+    root.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=False)
+    _listener.start()
+    _queue_handler = queue_handler
+
+def _restart_after_fork():
+    # Thread listener tidak ikut ter-fork (serve.py): buat queue + listener baru di child
+    global _listener
+    if _listener is not None:
+        _listener = None
+        _start_listener()
+
+def stop_logging():
+    """Flush record yang masih di queue (dipanggil saat exit)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def setup_logging(level: str = None):
+    """Pasang queue handler di root logger (menggantikan logging.basicConfig)"""
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, (level or settings.LOG_LEVEL).upper()))
+    if _listener is not None:
+        return
+
+    if not settings.LOG_ASYNC:
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(_build_formatter())
+        handler.addFilter(SamplingFilter(parse_sampling_rates(settings.LOG_SAMPLING)))
+        root.addHandler(handler)
+        return
+
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    _start_listener()
+    atexit.register(stop_logging)
+    os.register_at_fork(after_in_child=_restart_after_fork)
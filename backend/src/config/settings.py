@@ -11,11 +11,42 @@ class Settings:
     DATABASE_NAME: str = os.getenv("DATABASE_NAME", "relaxaid_db")
     DATABASE_USER: str = os.getenv("DATABASE_USER", "postgres")
     DATABASE_PASSWORD: str = os.getenv("DATABASE_PASSWORD", "")
+    DATABASE_CONNECT_TIMEOUT: int = int(os.getenv("DATABASE_CONNECT_TIMEOUT", "3"))
+    # Backend repository: "postgres" atau "sqlite" embedded (lihat storage/)
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "postgres")
+    STORAGE_SQLITE_PATH: str = os.getenv("STORAGE_SQLITE_PATH", ":memory:")
+    
+    # Circuit breaker database (lihat config/connection.py)
+    DB_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("DB_BREAKER_FAILURE_THRESHOLD", "3"))
+    DB_BREAKER_RESET_TIMEOUT: float = float(os.getenv("DB_BREAKER_RESET_TIMEOUT", "15"))
+    # Spool prediksi saat database tidak tersedia (lihat services/prediction_spool.py)
+    PREDICTION_SPOOL_PATH: str = os.getenv("PREDICTION_SPOOL_PATH", "spool/predictions.jsonl")
+    PREDICTION_SPOOL_MAX_RECORDS: int = int(os.getenv("PREDICTION_SPOOL_MAX_RECORDS", "100000"))
+    
+    # Statement timeout per route group dalam ms (lihat services/query_deadline.py)
+    STATEMENT_TIMEOUTS: str = os.getenv(
+        "STATEMENT_TIMEOUTS", "prediction=2000,dashboard=5000,admin_analytics=15000,auth=2000,default=10000"
+    )
+    # Deadline insert hasil prediksi; lewat batas ini hasil ditulis ke spool
+    PREDICTION_INSERT_TIMEOUT_MS: int = int(os.getenv("PREDICTION_INSERT_TIMEOUT_MS", "500"))
+    
+    # Slow-query log (lihat services/slow_queries.py)
+    SLOW_QUERY_MS: float = float(os.getenv("SLOW_QUERY_MS", "200"))
+    # EXPLAIN ANALYZE menjalankan ulang query: hanya SELECT, opt-in
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", "0"))
+    DB_STATEMENTS_PER_REQUEST_WARN: int = int(os.getenv("DB_STATEMENTS_PER_REQUEST_WARN", "15"))
     
     # API
     API_HOST: str = os.getenv("API_HOST", "127.0.0.1")
     API_PORT: int = int(os.getenv("API_PORT", "8000"))
     API_RELOAD: bool = os.getenv("API_RELOAD", "true").lower() == "true"
+    WEB_WORKERS: int = int(os.getenv("WEB_WORKERS", "1"))
+    
+    # Admission control per route group: "group=max_concurrency:max_queue" (lihat services/admission.py)
+    ADMISSION_CONTROL_ENABLED: bool = os.getenv("ADMISSION_CONTROL_ENABLED", "true").lower() == "true"
+    ADMISSION_LIMITS: str = os.getenv("ADMISSION_LIMITS", "prediction=32:64,dashboard=16:32,admin_analytics=4:8,auth=16:32")
+    ADMISSION_QUEUE_TIMEOUT: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "0.5"))
+    ADMISSION_RETRY_AFTER: int = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
     
     # Security
     JWT_SECRET: str = os.getenv("JWT_SECRET", "your-secret-key-change-in-production")
@@ -28,10 +59,70 @@ class Settings:
     # ML Model
     MODEL_PATH: str = os.getenv("MODEL_PATH", "src/ml/model_stres.pkl")
     MODEL_VERSION: str = os.getenv("MODEL_VERSION", "1.0.0")
+    # Artifact joblib (model + scaler); kosong = selalu training ulang saat start
+    MODEL_ARTIFACT_PATH: str = os.getenv("MODEL_ARTIFACT_PATH", "")
+    # Lipat StandardScaler ke threshold pohon saat load (ml/folded_forest.py): request tanpa scaler.transform
+    MODEL_FOLD_SCALER: bool = os.getenv("MODEL_FOLD_SCALER", "true").lower() == "true"
+    # Batch lebih besar dari ini tetap lewat scaler + traversal Cython sklearn (lebih cepat per baris, hasil identik)
+    MODEL_FOLD_MAX_BATCH: int = int(os.getenv("MODEL_FOLD_MAX_BATCH", "256"))
+    
+    # Retraining di background (lihat services/retraining.py)
+    MODEL_ARTIFACT_DIR: str = os.getenv("MODEL_ARTIFACT_DIR", "ml/artifacts")
+    RETRAIN_N_JOBS: int = int(os.getenv("RETRAIN_N_JOBS", "1"))
+    RETRAIN_MIN_ROWS: int = int(os.getenv("RETRAIN_MIN_ROWS", "200"))
+    RETRAIN_HOLDOUT_FRACTION: float = float(os.getenv("RETRAIN_HOLDOUT_FRACTION", "0.2"))
+    # Selisih F1 macro minimum di atas model aktif agar kandidat dipromosikan
+    RETRAIN_MIN_IMPROVEMENT: float = float(os.getenv("RETRAIN_MIN_IMPROVEMENT", "0.0"))
+    # Penurunan F1 macro maksimum pada holdout tetap (ml/holdout.py) yang masih boleh dipromosikan
+    RETRAIN_HOLDOUT_TOLERANCE: float = float(os.getenv("RETRAIN_HOLDOUT_TOLERANCE", "0.02"))
+    RETRAIN_FETCH_SIZE: int = int(os.getenv("RETRAIN_FETCH_SIZE", "5000"))
+    RETRAIN_QUERY_TIMEOUT_MS: int = int(os.getenv("RETRAIN_QUERY_TIMEOUT_MS", "300000"))
+    # Interval cek marker promosi (model dipromosikan worker lain); 0 = nonaktif
+    MODEL_PROMOTION_POLL_SECONDS: float = float(os.getenv("MODEL_PROMOTION_POLL_SECONDS", "2.0"))
+    # Dataset holdout tetap berversi (ml/holdout.py), dibangun sekali lalu di-mmap
+    HOLDOUT_DIR: str = os.getenv("HOLDOUT_DIR", "ml/artifacts/holdout")
+    # Hasil evaluasi model per (model hash, evaluation set hash); kosong = hanya di memori
+    EVALUATION_RESULT_DIR: str = os.getenv("EVALUATION_RESULT_DIR", "ml/artifacts/evaluations")
+    
+    # CPU thread budget (lihat config/threads.py)
+    INFERENCE_N_JOBS: int = int(os.getenv("INFERENCE_N_JOBS", "1"))
+    TRAINING_N_JOBS: int = int(os.getenv("TRAINING_N_JOBS", "-1"))
+    NATIVE_THREADS: int = int(os.getenv("NATIVE_THREADS", "1"))
+    # Core untuk cross-validation /admin/model/evaluation (<= 0 = semua core)
+    EVALUATION_N_JOBS: int = int(os.getenv("EVALUATION_N_JOBS", "1"))
+    
+    # Inference backend: "inprocess" atau "sidecar" (lihat ml/inference_sidecar.py)
+    INFERENCE_BACKEND: str = os.getenv("INFERENCE_BACKEND", "inprocess").lower()
+    INFERENCE_SOCKET_PATH: str = os.getenv("INFERENCE_SOCKET_PATH", "/tmp/relaxaid-inference.sock")
+    INFERENCE_TIMEOUT: float = float(os.getenv("INFERENCE_TIMEOUT", "2.0"))
+    # Umur cache metadata model sidecar (classes, content_hash) di tiap worker
+    INFERENCE_INFO_TTL_SECONDS: float = float(os.getenv("INFERENCE_INFO_TTL_SECONDS", "5.0"))
+    SIDECAR_MAX_BATCH_ROWS: int = int(os.getenv("SIDECAR_MAX_BATCH_ROWS", "256"))
+    SIDECAR_MAX_WAIT_MS: float = float(os.getenv("SIDECAR_MAX_WAIT_MS", "2"))
+    
+    # Interval background probe database untuk /health (detik)
+    HEALTH_PROBE_INTERVAL: float = float(os.getenv("HEALTH_PROBE_INTERVAL", "10"))
+    
+    # Request tracing (lihat services/tracing.py)
+    TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", "0.05"))
+    TRACE_SLOW_MS: float = float(os.getenv("TRACE_SLOW_MS", "500"))
+    TRACE_BUFFER_SIZE: int = int(os.getenv("TRACE_BUFFER_SIZE", "500"))
+    
+    # Sampling profiler yang dipicu admin (lihat services/profiler.py)
+    PROFILER_MAX_SECONDS: float = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+    PROFILER_INTERVAL_MS: float = float(os.getenv("PROFILER_INTERVAL_MS", "10"))
+    PROFILER_OUTPUT_DIR: str = os.getenv("PROFILER_OUTPUT_DIR", "")
     
     # Debug
     DEBUG: bool = os.getenv("DEBUG", "true").lower() == "true"
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "info")
+    
+    # Logging (lihat config/logging_config.py): "kv" atau "plain"
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "kv").lower()
+    LOG_ASYNC: bool = os.getenv("LOG_ASYNC", "true").lower() == "true"
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # Rate sampling per logger untuk baris sukses bervolume tinggi
+    LOG_SAMPLING: str = os.getenv("LOG_SAMPLING", "ml.random_forest_model=0.05,services.predict=0.05,routers.prediksi=0.05")
 
 # Create settings instance
 settings = Settings()
@@ -0,0 +1,70 @@
+"""
+CPU thread budget untuk inference, training dan native thread pools
+
+Setiap worker uvicorn sudah menjalankan puluhan request thread, sehingga
+forest dengan ``n_jobs=-1`` dan BLAS/OpenMP yang ikut membuat thread sendiri
+menyebabkan oversubscription. Modul ini memusatkan tiga knob yang independen:
+
+- ``INFERENCE_N_JOBS``: ``n_jobs`` forest saat ``predict_proba`` (default 1)
+- ``TRAINING_N_JOBS``: ``n_jobs`` forest saat ``fit`` (default -1, semua core)
+- ``NATIVE_THREADS``: ukuran thread pool BLAS/OpenMP (default 1)
+- ``EVALUATION_N_JOBS``: total core untuk cross-validation evaluasi model (default 1)
+"""
+import os
+import logging
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Environment variables yang dibaca native libraries saat pertama kali di-load
+NATIVE_THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+def configure_native_thread_env():
+    """
+    Set batas thread native lewat environment variables.
+    Harus dipanggil sebelum numpy/sklearn di-import; nilai yang sudah
+    di-set secara eksplisit di environment tidak ditimpa.
+    """
+    for name in NATIVE_THREAD_ENV_VARS:
+        os.environ.setdefault(name, str(settings.NATIVE_THREADS))
+
+def apply_thread_budget():
+    """
+    Terapkan batas NATIVE_THREADS ke thread pool BLAS/OpenMP yang sudah ter-load.
+    Aman dipanggil berulang kali (startup dan setiap model load).
+    """
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=settings.NATIVE_THREADS)
+        logger.info(
+            f"🧵 Thread budget: inference n_jobs={settings.INFERENCE_N_JOBS}, "
+            f"training n_jobs={settings.TRAINING_N_JOBS}, native threads={settings.NATIVE_THREADS}"
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to apply native thread limits: {e}")
+
+def inference_n_jobs() -> int:
+    """n_jobs untuk prediksi (satu request = satu thread secara default)"""
+    return settings.INFERENCE_N_JOBS
+
+def training_n_jobs() -> int:
+    """n_jobs untuk training forest"""
+    return settings.TRAINING_N_JOBS
+
+def evaluation_parallelism(n_folds: int) -> tuple:
+    """
+    Bagi EVALUATION_N_JOBS antara fold paralel dan n_jobs forest per fold.
+    Return (fold_jobs, forest_jobs); total thread tidak melebihi budget.
+    """
+    budget = settings.EVALUATION_N_JOBS
+    if budget < 1:
+        budget = os.cpu_count() or 1
+    fold_jobs = max(1, min(budget, n_folds))
+    return fold_jobs, max(1, budget // fold_jobs)
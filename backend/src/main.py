@@ -9,15 +9,29 @@ sys.path.append(str(Path(__file__).parent))
 from dotenv import load_dotenv
 load_dotenv()
 
+# Batasi BLAS/OpenMP threads sebelum numpy/sklearn di-import
+from config.threads import configure_native_thread_env, apply_thread_budget
+configure_native_thread_env()
+
+# Setup logging sebelum router di-import agar log training model ikut tertulis
+# (queue handler + key=value, lihat config/logging_config.py)
+from config.logging_config import setup_logging
+setup_logging()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routers import prediksi, admin, auth
 from config.settings import settings
-from config.connection import test_connection
+from services.health import database_prober, model_loader
+from services.prediction_spool import prediction_spool
+from config.connection import database_breaker, StatementTimeoutError
+from services.admission import AdmissionControlMiddleware, admission_controller
+from services.metrics import MetricsMiddleware, registry, PROMETHEUS_CONTENT_TYPE
+from services.tracing import TracingMiddleware
+from services.query_deadline import QueryDeadlineMiddleware, statement_timeout_handler
+from fastapi.responses import Response, JSONResponse
 import logging
 
-# Setup logging
-logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL.upper()))
 logger = logging.getLogger(__name__)
 
 # Create FastAPI app
@@ -29,6 +43,20 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Route group request untuk statement_timeout per koneksi database
+app.add_middleware(QueryDeadlineMiddleware)
+app.add_exception_handler(StatementTimeoutError, statement_timeout_handler)
+
+# Admission control (di dalam CORS agar response 503 tetap membawa CORS headers)
+if settings.ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(AdmissionControlMiddleware)
+
+# Latency per route template (di luar admission agar request yang di-shed ikut tercatat)
+app.add_middleware(MetricsMiddleware)
+
+# Trace span per request + header Server-Timing
+app.add_middleware(TracingMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -54,26 +82,57 @@ def health_check():
 
 @app.get("/health")
 def detailed_health_check():
-    """Detailed health check including database connectivity"""
-    db_status = test_connection()
+    """
+    Liveness + status database terakhir dari background prober
+    (tidak membuka koneksi database per panggilan)
+    """
     return {
         "api": "healthy",
-        "database": "connected" if db_status else "disconnected",
+        **database_prober.status(),
+        "database_circuit": database_breaker.snapshot(),
+        "prediction_spool": prediction_spool.status(),
         "version": "1.0.0"
     }
 
+@app.get("/ready")
+def readiness_check():
+    """Readiness: 200 setelah model selesai di-load, 503 selama masih loading"""
+    status = model_loader.status()
+    if not model_loader.ready:
+        return JSONResponse(status_code=503, content={"ready": False, **status})
+    return {"ready": True, **status}
+
+@app.get("/load")
+def load_status():
+    """In-flight dan queued request per route group untuk load balancer"""
+    groups = admission_controller.snapshot()
+    return {
+        "saturated": any(group["saturated"] for group in groups.values()),
+        "route_groups": groups
+    }
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Metrics Prometheus (text format) untuk worker ini"""
+    return Response(content=registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
     logger.info("Starting RelaxaID API...")
     logger.info(f"API Host: {settings.API_HOST}:{settings.API_PORT}")
     logger.info(f"Debug Mode: {settings.DEBUG}")
+    apply_thread_budget()
+    
+    # Model di-load di background; /ready melaporkan kapan selesai
+    model_loader.start()
     
-    # Test database connection
-    if test_connection():
-        logger.info("Database connection successful")
-    else:
-        logger.warning("Database connection failed - check your configuration")
+    # Status database dicek periodik oleh prober, dibaca oleh /health
+    database_prober.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    database_prober.stop()
 
 if __name__ == "__main__":
     import uvicorn
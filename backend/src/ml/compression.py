@@ -0,0 +1,153 @@
+"""
+Kompresi RandomForestClassifier: lebih sedikit pohon, pohon lebih dangkal, presisi float32
+
+Latensi inference naik linear dengan jumlah pohon dan kedalaman traversal, dan
+ukuran artifact mengikuti jumlah node. Tiga transformasi di sini menghasilkan
+varian baru tanpa training ulang (model asli tidak diubah):
+
+- select_trees: simpan subset pohon. rank_trees mengurutkan pohon secara greedy
+  (forward selection) sehingga k pohon pertama paling sering setuju dengan
+  prediksi forest penuh pada data seleksi; tidak butuh label.
+- limit_depth: potong setiap pohon di kedalaman tertentu. Node di batas
+  kedalaman menjadi leaf dengan distribusi kelas yang sudah tersimpan di node
+  tersebut; node di bawahnya dibuang sehingga artifact ikut mengecil.
+- round_to_float32: threshold dibulatkan ke bawah ke float32 terdekat dan nilai
+  leaf di-cast ke float32. sklearn membandingkan input sebagai float32, sehingga
+  threshold float32 yang <= threshold asli memberi keputusan split yang identik.
+  Layout node sklearn tetap float64, jadi ukuran pickle tidak ikut turun;
+  bench_compression.py melaporkan efek nyatanya per varian.
+
+Lihat benchmarks/bench_compression.py untuk laporan ukuran/latensi/akurasi.
+"""
+import copy
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+TREE_LEAF = -1
+TREE_UNDEFINED = -2
+# Atribut OOB tidak berlaku lagi setelah pohon dibuang atau dipotong
+OOB_ATTRIBUTES = ("oob_score_", "oob_decision_function_")
+
+def _with_estimators(model, estimators: list):
+    variant = copy.copy(model)
+    variant.estimators_ = estimators
+    variant.n_estimators = len(estimators)
+    for attribute in OOB_ATTRIBUTES:
+        variant.__dict__.pop(attribute, None)
+    return variant
+
+def _with_tree_state(estimator, state: dict):
+    """Salinan DecisionTreeClassifier dengan tree_ dibangun ulang dari state baru"""
+    tree_cls, args = estimator.tree_.__reduce__()[:2]
+    tree = tree_cls(*args)
+    tree.__setstate__(state)
+    variant = copy.copy(estimator)
+    variant.tree_ = tree
+    return variant
+
+def tree_probabilities(model, X: np.ndarray) -> np.ndarray:
+    """Probabilitas per pohon, shape (n_trees, n_samples, n_classes)"""
+    return np.stack([estimator.predict_proba(X) for estimator in model.estimators_])
+
+def rank_trees(model, X_select: np.ndarray, max_trees: int = None) -> List[int]:
+    """
+    Urutan pohon hasil greedy forward selection: di setiap langkah pilih pohon
+    yang membuat prediksi ensemble sementara paling sering sama dengan forest
+    penuh pada X_select (sudah di-scale). Seri dipecah dengan indeks terkecil.
+    """
+    probabilities = tree_probabilities(model, X_select)
+    n_trees = len(probabilities)
+    max_trees = n_trees if max_trees is None else min(max_trees, n_trees)
+    target = probabilities.mean(axis=0).argmax(axis=1)
+
+    order: List[int] = []
+    remaining = np.arange(n_trees)
+    running = np.zeros_like(probabilities[0])
+    for _ in range(max_trees):
+        candidates = running[None, :, :] + probabilities[remaining]
+        agreement = (candidates.argmax(axis=2) == target[None, :]).sum(axis=1)
+        best = int(np.argmax(agreement))
+        order.append(int(remaining[best]))
+        running += probabilities[remaining[best]]
+        remaining = np.delete(remaining, best)
+    return order
+
+def select_trees(model, indices: Sequence[int]):
+    """Varian forest dengan pohon pada indices (urutan dipertahankan)"""
+    return _with_estimators(model, [model.estimators_[index] for index in indices])
+
+def _truncate_state(state: dict, max_depth: int) -> dict:
+    nodes, values = state["nodes"], state["values"]
+    kept, depths = [0], [0]
+    new_index = {0: 0}
+    # Breadth-first dari root; node di max_depth tidak diikuti anaknya
+    position = 0
+    while position < len(kept):
+        node, depth = kept[position], depths[position]
+        if nodes[node]["left_child"] != TREE_LEAF and depth < max_depth:
+            for child in (nodes[node]["left_child"], nodes[node]["right_child"]):
+                new_index[int(child)] = len(kept)
+                kept.append(int(child))
+                depths.append(depth + 1)
+        position += 1
+
+    new_nodes = nodes[kept].copy()
+    for row, node in enumerate(kept):
+        if nodes[node]["left_child"] == TREE_LEAF or depths[row] >= max_depth:
+            new_nodes[row]["left_child"] = TREE_LEAF
+            new_nodes[row]["right_child"] = TREE_LEAF
+            new_nodes[row]["feature"] = TREE_UNDEFINED
+            new_nodes[row]["threshold"] = TREE_UNDEFINED
+        else:
+            new_nodes[row]["left_child"] = new_index[int(nodes[node]["left_child"])]
+            new_nodes[row]["right_child"] = new_index[int(nodes[node]["right_child"])]
+    return dict(state, nodes=new_nodes, values=values[kept].copy(),
+                node_count=len(kept), max_depth=min(state["max_depth"], max_depth))
+
+def limit_depth(model, max_depth: int):
+    """Varian forest dengan setiap pohon dipotong di max_depth (root = kedalaman 0)"""
+    if max_depth < 1:
+        raise ValueError("max_depth must be at least 1")
+    estimators = [
+        _with_tree_state(estimator, _truncate_state(estimator.tree_.__getstate__(), max_depth))
+        for estimator in model.estimators_
+    ]
+    return _with_estimators(model, estimators)
+
+def _float32_state(state: dict) -> dict:
+    nodes = state["nodes"].copy()
+    split = nodes["feature"] >= 0
+    threshold = nodes["threshold"][split]
+    rounded = threshold.astype(np.float32)
+    # Bulatkan ke bawah: untuk input float32 x, x <= t32 setara dengan x <= threshold
+    rounded = np.where(rounded > threshold, np.nextafter(rounded, np.float32(-np.inf)), rounded)
+    nodes["threshold"][split] = rounded.astype(np.float64)
+    values = state["values"].astype(np.float32).astype(np.float64)
+    return dict(state, nodes=nodes, values=values)
+
+def round_to_float32(model):
+    """Varian forest dengan threshold dan nilai leaf berpresisi float32"""
+    estimators = [
+        _with_tree_state(estimator, _float32_state(estimator.tree_.__getstate__()))
+        for estimator in model.estimators_
+    ]
+    return _with_estimators(model, estimators)
+
+def compress_forest(model, n_trees: int = None, max_depth: int = None, float32: bool = False,
+                    tree_order: Optional[Sequence[int]] = None):
+    """
+    Terapkan select_trees (n_trees pertama dari tree_order), limit_depth dan
+    round_to_float32 sesuai argumen. tree_order wajib jika n_trees diisi
+    (hasil rank_trees, dihitung sekali untuk semua varian).
+    """
+    variant = model
+    if n_trees is not None and n_trees < len(model.estimators_):
+        if tree_order is None:
+            raise ValueError("tree_order is required to select a subset of trees")
+        variant = select_trees(variant, tree_order[:n_trees])
+    if max_depth is not None:
+        variant = limit_depth(variant, max_depth)
+    if float32:
+        variant = round_to_float32(variant)
+    return variant
@@ -0,0 +1,161 @@
+"""
+Forest dengan StandardScaler dilipat ke threshold (inference tanpa scaler.transform)
+
+Random forest invarian terhadap transformasi affine per fitur: split
+``scaled(x) <= t`` selalu setara dengan ``x <= T`` untuk suatu threshold T
+dalam satuan fitur mentah. FoldedForest menghitung T sekali saat model
+di-load, lalu menelusuri semua pohon langsung pada input mentah.
+
+Kesetaraannya dibuat exact, bukan sekadar ``T = t * scale + mean``:
+
+- jalur scaler menghitung ``(x - mean) / scale`` dalam float64, lalu sklearn
+  meng-cast input ke float32 sebelum dibandingkan dengan threshold. Fungsi
+  g(x) = float32((x - mean) / scale) monoton tidak turun di x (setiap operasi
+  floating point dengan pembulatan ke terdekat monoton), sehingga himpunan
+  {x : g(x) <= t} selalu berbentuk ``x <= T``.
+- T dicari dengan binary search atas semua nilai float64 terurut (64 langkah,
+  tervektorisasi untuk semua node sekaligus): nilai float64 terbesar dengan
+  g(x) <= t. Tidak ada pembulatan float32 di jalur folded, jadi keputusan
+  split identik untuk setiap input float64 berhingga.
+- probabilitas leaf diambil dari ``tree_.value`` yang sama dan dijumlahkan
+  berurutan per pohon (cumsum) lalu dibagi jumlah pohon, sama seperti
+  RandomForestClassifier.predict_proba dengan n_jobs=1: hasilnya bit-identik.
+
+Pohon disimpan sebagai array datar (semua pohon digabung); leaf menunjuk ke
+dirinya sendiri sehingga traversal cukup ``max_depth`` langkah vektor tanpa
+cabang. Input harus berhingga (tanpa NaN), seperti yang dijamin validasi input.
+"""
+from typing import Optional
+
+import numpy as np
+
+TREE_LEAF = -1
+# Rentang pencarian T: semua float64 berhingga
+FLOAT64_MAX = np.finfo(np.float64).max
+SIGN_BIT = np.int64(-0x8000000000000000)
+MAGNITUDE_MASK = np.int64(0x7FFFFFFFFFFFFFFF)
+# Jumlah baris per langkah traversal (array kerja rows x trees tetap kecil)
+ROW_CHUNK = 256
+
+def _ordered_keys(values: np.ndarray) -> np.ndarray:
+    """float64 -> int64 dengan urutan yang sama (-0.0 dan +0.0 bersebelahan)"""
+    bits = values.view(np.int64)
+    return np.where(bits < 0, -(bits & MAGNITUDE_MASK) - 1, bits)
+
+def _from_keys(keys: np.ndarray) -> np.ndarray:
+    bits = np.where(keys < 0, (-(keys + 1)) | SIGN_BIT, keys)
+    return bits.view(np.float64)
+
+def raw_thresholds(thresholds: np.ndarray, mean: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """
+    Threshold dalam satuan mentah: float64 terbesar x dengan
+    float32((x - mean) / scale) <= threshold; -inf jika tidak ada,
+    +inf jika semua float64 berhingga memenuhi
+    """
+    def goes_left(keys):
+        x = _from_keys(keys)
+        with np.errstate(over="ignore", invalid="ignore"):
+            return ((x - mean) / scale).astype(np.float32) <= thresholds
+
+    n = len(thresholds)
+    lo = np.full(n, _ordered_keys(np.array([-FLOAT64_MAX]))[0], dtype=np.int64)
+    hi = np.full(n, _ordered_keys(np.array([FLOAT64_MAX]))[0], dtype=np.int64)
+    never = ~goes_left(lo)
+    always = goes_left(hi)
+    # Invariant: goes_left(lo) benar, jawaban di [lo, hi]
+    for _ in range(64):
+        active = lo < hi
+        if not active.any():
+            break
+        # ceil((lo + hi) / 2) tanpa overflow int64
+        mid = (lo >> 1) + (hi >> 1) + (((lo & 1) + (hi & 1) + 1) >> 1)
+        left = goes_left(mid)
+        lo = np.where(active & left, mid, lo)
+        hi = np.where(active & ~left, mid - 1, hi)
+
+    result = _from_keys(lo)
+    result[never] = -np.inf
+    result[always] = np.inf
+    return result
+
+class FoldedForest:
+    """Semua pohon RandomForestClassifier sebagai array datar dengan threshold satuan mentah"""
+
+    def __init__(self, model, scaler=None):
+        n_features = model.n_features_in_
+        mean = getattr(scaler, "mean_", None) if scaler is not None else None
+        scale = getattr(scaler, "scale_", None) if scaler is not None else None
+        mean = np.zeros(n_features) if mean is None else np.asarray(mean, dtype=np.float64)
+        scale = np.ones(n_features) if scale is None else np.asarray(scale, dtype=np.float64)
+
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count)
+            leaf = tree.children_left == TREE_LEAF
+            feature = np.where(leaf, 0, tree.feature)
+            # Leaf menunjuk dirinya sendiri di kedua sisi
+            left = np.where(leaf, node_ids, tree.children_left) + offset
+            right = np.where(leaf, node_ids, tree.children_right) + offset
+
+            threshold = np.full(tree.node_count, np.inf)
+            split = ~leaf
+            threshold[split] = raw_thresholds(
+                tree.threshold[split], mean[feature[split]], scale[feature[split]]
+            )
+
+            features.append(feature)
+            thresholds.append(threshold)
+            children.append(np.stack([left, right], axis=1))
+            values.append(tree.value[:, 0, :model.n_classes_])
+            roots.append(offset)
+            offset += tree.node_count
+
+        self.classes_ = model.classes_
+        self.n_features = n_features
+        self.n_trees = len(model.estimators_)
+        self.max_depth = max(estimator.tree_.max_depth for estimator in model.estimators_)
+        self.feature = np.concatenate(features).astype(np.intp)
+        self.threshold = np.concatenate(thresholds)
+        # children[2 * node] = kiri, children[2 * node + 1] = kanan
+        self.children = np.concatenate(children).astype(np.intp).ravel()
+        self.value = np.ascontiguousarray(np.concatenate(values), dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.intp)
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Indeks node leaf (global) per baris per pohon, shape (n_samples, n_trees)"""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected input with {self.n_features} features, got shape {X.shape}")
+        leaves = np.empty((X.shape[0], self.n_trees), dtype=np.intp)
+        for start in range(0, X.shape[0], ROW_CHUNK):
+            rows = X[start:start + ROW_CHUNK]
+            flat = rows.ravel()
+            row_offset = (np.arange(len(rows), dtype=np.intp) * self.n_features)[:, None]
+            node = np.broadcast_to(self.roots, (len(rows), self.n_trees)).copy()
+            for _ in range(self.max_depth):
+                go_right = flat[row_offset + self.feature[node]] > self.threshold[node]
+                node = self.children[2 * node + go_right]
+            leaves[start:start + len(rows)] = node
+        return leaves
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Sama dengan RandomForestClassifier.predict_proba(scaler.transform(X)), n_jobs=1"""
+        leaves = self.apply(X)
+        proba = np.empty((leaves.shape[0], self.value.shape[1]), dtype=np.float64)
+        for start in range(0, leaves.shape[0], ROW_CHUNK):
+            # Jumlah berurutan per pohon, seperti akumulasi out += tree_proba di sklearn
+            summed = np.cumsum(self.value[leaves[start:start + ROW_CHUNK]], axis=1)[:, -1]
+            summed /= self.n_trees
+            proba[start:start + ROW_CHUNK] = summed
+        return proba
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+def fold_scaler(model, scaler=None) -> Optional[FoldedForest]:
+    """FoldedForest untuk model + scaler, atau None jika model bukan forest klasifikasi ber-tree_"""
+    if model is None or not hasattr(model, "estimators_"):
+        return None
+    return FoldedForest(model, scaler)
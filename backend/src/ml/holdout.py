@@ -0,0 +1,135 @@
+"""
+Dataset holdout tetap dan berversi untuk evaluasi, benchmark dan promosi model
+
+Fitur dibangkitkan dengan distribusi yang sama seperti training
+(generate_activity_features) dan label memakai aturan klinis yang sama
+(stress_scores + stress_labels_from_scores), dengan seed tetap per versi,
+sehingga angka evaluasi bisa dibandingkan antar model dan antar run.
+
+Dataset dibangun sekali lalu disimpan di HOLDOUT_DIR/<versi>/:
+
+    X.npy          float64 (n, n_features), urutan FEATURE_NAMES
+    y.npy          int8 (n,), indeks kelas 0=Rendah, 1=Sedang, 2=Tinggi
+    manifest.json  versi, seed, feature_names, distribusi label, hash isi
+
+Pemanggil berikutnya memuat file dengan ``np.load(mmap_mode="r")``: tidak ada
+pembangkitan ulang, page dibagi antar worker lewat page cache, dan array
+read-only sehingga tidak bisa diubah tanpa sengaja. Ubah HOLDOUT_VERSION
+(atau seed/ukuran) jika resep dataset berubah; versi lama tetap di disk.
+
+Usage:
+    python -m ml.holdout            # bangun (jika belum ada) dan tampilkan manifest
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+HOLDOUT_VERSION = "v1"
+HOLDOUT_SEED = 20241
+HOLDOUT_SIZE = 2000
+
+class HoldoutDataset:
+    """X, y (memory-mapped, read-only) dan manifest satu versi holdout"""
+
+    def __init__(self, X: np.ndarray, y: np.ndarray, manifest: dict):
+        self.X = X
+        self.y = y
+        self.manifest = manifest
+
+    @property
+    def version(self) -> str:
+        return self.manifest["version"]
+
+    @property
+    def content_hash(self) -> str:
+        return self.manifest["content_hash"]
+
+    @property
+    def feature_names(self) -> list:
+        return self.manifest["feature_names"]
+
+def build_holdout(feature_names: Sequence[str], n_samples: int = HOLDOUT_SIZE,
+                  seed: int = HOLDOUT_SEED) -> Tuple[np.ndarray, np.ndarray]:
+    """Bangkitkan fitur dan label holdout secara deterministik (RandomState dengan seed tetap)"""
+    from ml.random_forest_model import generate_activity_features, stress_labels_from_scores, stress_scores
+
+    rng = np.random.RandomState(seed)
+    X = generate_activity_features(list(feature_names), n_samples, random_state=rng)
+    y = stress_labels_from_scores(stress_scores(X, list(feature_names), random_state=rng)).astype(np.int8)
+    return X, y
+
+def _write_npy(directory: str, name: str, array: np.ndarray):
+    # Tulis ke file sementara lalu rename agar pembaca tidak melihat file setengah jadi
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npy.tmp")
+    with os.fdopen(fd, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, os.path.join(directory, name))
+
+def _create(directory: str, version: str, feature_names: Sequence[str]) -> dict:
+    from ml.model_evaluator import evaluation_set_hash
+
+    logger.info(f"🧪 Building holdout dataset {version} ({HOLDOUT_SIZE} rows, seed {HOLDOUT_SEED})...")
+    X, y = build_holdout(feature_names)
+    os.makedirs(directory, exist_ok=True)
+    _write_npy(directory, "X.npy", X)
+    _write_npy(directory, "y.npy", y)
+    manifest = {
+        "version": version,
+        "seed": HOLDOUT_SEED,
+        "n_samples": int(len(y)),
+        "feature_names": list(feature_names),
+        "label_distribution": {str(label): int(count) for label, count in enumerate(np.bincount(y, minlength=3))},
+        "content_hash": evaluation_set_hash(X, y),
+    }
+    # Manifest ditulis terakhir: keberadaannya menandakan X/y lengkap
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".json.tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(directory, "manifest.json"))
+    return manifest
+
+_cache: Dict[str, HoldoutDataset] = {}
+_cache_lock = threading.Lock()
+
+def load_holdout(feature_names: Optional[Sequence[str]] = None, version: str = HOLDOUT_VERSION,
+                 holdout_dir: str = None) -> HoldoutDataset:
+    """
+    Holdout versi ``version``, dibangun sekali jika belum ada di disk.
+    Raise ValueError jika urutan fitur di manifest berbeda dari feature_names.
+    """
+    from ml.random_forest_model import FEATURE_NAMES
+
+    feature_names = list(FEATURE_NAMES if feature_names is None else feature_names)
+    directory = os.path.join(holdout_dir or settings.HOLDOUT_DIR, version)
+    with _cache_lock:
+        dataset = _cache.get(directory)
+        if dataset is None:
+            manifest_path = os.path.join(directory, "manifest.json")
+            if os.path.exists(manifest_path):
+                with open(manifest_path) as f:
+                    manifest = json.load(f)
+            else:
+                manifest = _create(directory, version, feature_names)
+            dataset = HoldoutDataset(
+                np.load(os.path.join(directory, "X.npy"), mmap_mode="r"),
+                np.load(os.path.join(directory, "y.npy"), mmap_mode="r"),
+                manifest
+            )
+            _cache[directory] = dataset
+
+    if dataset.feature_names != feature_names:
+        raise ValueError(f"Holdout {version} was built for features {dataset.feature_names}, got {feature_names}")
+    return dataset
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(load_holdout().manifest, indent=2))
@@ -0,0 +1,255 @@
+"""
+Inference sidecar: satu proses yang memiliki Random Forest untuk semua worker HTTP
+
+Worker web mengirim feature vectors (sudah divalidasi) lewat Unix domain socket.
+Sidecar menggabungkan request dari semua koneksi menjadi satu batch
+``predict_proba`` sehingga hanya ada satu salinan model di RAM dan CPU inference
+tidak berjalan di proses web.
+
+Framing biner (little-endian):
+    header  : magic b"RXID", version (u8), opcode (u8), reserved (u16), payload length (u32)
+    PREDICT : request  = n_rows (u32), n_features (u32), float64[n_rows * n_features]
+              response = n_rows (u32), n_classes (u32), float64[n_rows * n_classes]
+    INFO    : request kosong, response = JSON metadata model (UTF-8)
+    ERROR   : response = pesan error (UTF-8)
+
+Usage (dari direktori backend/src):
+    MODEL_ARTIFACT_PATH=ml/artifacts/model.joblib python -m ml.inference_sidecar
+    INFERENCE_BACKEND=sidecar python serve.py --workers 4
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"RXID"
+PROTOCOL_VERSION = 1
+OP_PREDICT = 1
+OP_INFO = 2
+OP_ERROR = 255
+
+HEADER = struct.Struct("<4sBBHI")
+SHAPE = struct.Struct("<II")
+
+class SidecarError(Exception):
+    """Error dari sidecar atau protokol yang tidak valid"""
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:], size - received)
+        if n == 0:
+            raise ConnectionError("Socket closed by peer")
+        received += n
+    return bytes(buffer)
+
+def send_frame(sock: socket.socket, opcode: int, payload: bytes = b""):
+    sock.sendall(HEADER.pack(MAGIC, PROTOCOL_VERSION, opcode, 0, len(payload)) + payload)
+
+def recv_frame(sock: socket.socket) -> Tuple[int, bytes]:
+    magic, version, opcode, _, length = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    if magic != MAGIC or version != PROTOCOL_VERSION:
+        raise SidecarError(f"Invalid frame header: {magic!r} v{version}")
+    return opcode, _recv_exact(sock, length) if length else b""
+
+def encode_matrix(matrix: np.ndarray) -> bytes:
+    matrix = np.ascontiguousarray(matrix, dtype="<f8")
+    return SHAPE.pack(*matrix.shape) + matrix.tobytes()
+
+def decode_matrix(payload: bytes) -> np.ndarray:
+    n_rows, n_cols = SHAPE.unpack_from(payload)
+    data = np.frombuffer(payload, dtype="<f8", offset=SHAPE.size)
+    if data.size != n_rows * n_cols:
+        raise SidecarError("Matrix payload size does not match its shape")
+    return data.reshape(n_rows, n_cols)
+
+class SidecarInferenceClient:
+    """
+    Client yang dipakai StressPredictionModel saat INFERENCE_BACKEND=sidecar.
+    Satu koneksi persistent per thread; reconnect sekali jika koneksi putus.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 2.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            finally:
+                self._local.sock = None
+
+    def _request(self, opcode: int, payload: bytes = b"") -> bytes:
+        for attempt in range(2):
+            sock = getattr(self._local, "sock", None) or self._connect()
+            try:
+                send_frame(sock, opcode, payload)
+                response_op, response = recv_frame(sock)
+                break
+            except (ConnectionError, BrokenPipeError, socket.timeout, OSError):
+                self._close()
+                if attempt:
+                    raise
+        if response_op == OP_ERROR:
+            raise SidecarError(response.decode("utf-8", "replace"))
+        return response
+
+    def predict_proba(self, rows: np.ndarray) -> np.ndarray:
+        """Kirim batch fitur tervalidasi, terima probabilitas per kelas"""
+        return decode_matrix(self._request(OP_PREDICT, encode_matrix(rows)))
+
+    def info(self) -> dict:
+        """Metadata model di sidecar (classes, feature_importances, ...)"""
+        return json.loads(self._request(OP_INFO).decode("utf-8"))
+
+class _Batcher:
+    """Gabungkan request dari semua koneksi menjadi satu panggilan predict_proba"""
+
+    def __init__(self, model, max_batch_rows: int, max_wait_ms: float):
+        self.model = model
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[Tuple[np.ndarray, Future]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="sidecar-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, rows: np.ndarray) -> Future:
+        future = Future()
+        self._queue.put((rows, future))
+        return future
+
+    def _collect(self) -> List[Tuple[np.ndarray, Future]]:
+        batch = [self._queue.get()]
+        n_rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while n_rows < self.max_batch_rows:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            n_rows += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                rows = np.vstack([item[0] for item in batch]) if len(batch) > 1 else batch[0][0]
+                probabilities = self.model.predict_proba_batch(rows)
+                offset = 0
+                for item_rows, future in batch:
+                    future.set_result(probabilities[offset:offset + len(item_rows)])
+                    offset += len(item_rows)
+            except Exception as e:
+                logger.error(f"❌ Sidecar batch failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+class _ConnectionHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = self.server
+        while True:
+            try:
+                opcode, payload = recv_frame(self.request)
+            except (ConnectionError, OSError):
+                return
+            try:
+                if opcode == OP_PREDICT:
+                    rows = decode_matrix(payload)
+                    if rows.shape[1] != len(server.model.feature_names):
+                        raise SidecarError(f"Expected {len(server.model.feature_names)} features, got {rows.shape[1]}")
+                    probabilities = server.batcher.submit(rows).result()
+                    send_frame(self.request, OP_PREDICT, encode_matrix(probabilities))
+                elif opcode == OP_INFO:
+                    send_frame(self.request, OP_INFO, json.dumps(server.model_info).encode("utf-8"))
+                else:
+                    raise SidecarError(f"Unknown opcode {opcode}")
+            except (ConnectionError, OSError):
+                return
+            except Exception as e:
+                send_frame(self.request, OP_ERROR, str(e).encode("utf-8"))
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server yang memiliki satu instance StressPredictionModel"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, model, max_batch_rows: int = 256, max_wait_ms: float = 2.0):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.model = model
+        self.batcher = _Batcher(model, max_batch_rows, max_wait_ms)
+        self.model_info = {
+            "classes": [float(c) for c in model.model.classes_],
+            "feature_names": model.feature_names,
+            "feature_importances": [float(v) for v in model.model.feature_importances_],
+            "n_estimators": len(model.model.estimators_),
+            "content_hash": model.content_hash,
+            "pid": os.getpid(),
+        }
+        super().__init__(socket_path, _ConnectionHandler)
+
+def main():
+    from config.settings import settings
+
+    parser = argparse.ArgumentParser(description="RelaxaID inference sidecar")
+    parser.add_argument("--socket", default=settings.INFERENCE_SOCKET_PATH)
+    parser.add_argument("--max-batch-rows", type=int, default=settings.SIDECAR_MAX_BATCH_ROWS)
+    parser.add_argument("--max-wait-ms", type=float, default=settings.SIDECAR_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    from config.logging_config import setup_logging
+    setup_logging()
+
+    # Sidecar selalu memegang model in-process
+    settings.INFERENCE_BACKEND = "inprocess"
+    from ml.random_forest_model import get_stress_model
+    stress_model = get_stress_model()
+
+    server = InferenceServer(args.socket, stress_model, args.max_batch_rows, args.max_wait_ms)
+    logger.info(f"🚀 Inference sidecar listening on {args.socket} (pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+if __name__ == "__main__":
+    import sys
+    from pathlib import Path
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from dotenv import load_dotenv
+    load_dotenv()
+    main()
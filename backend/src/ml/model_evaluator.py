@@ -2,15 +2,22 @@
 Model Evaluation Module for Stress Prediction System
 Provides comprehensive model validation and accuracy metrics
 """
+import hashlib
 import numpy as np
 import pandas as pd
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score, f1_score
-from sklearn.model_selection import cross_val_score, StratifiedKFold
+from sklearn.base import clone
+from sklearn.model_selection import cross_validate, StratifiedKFold
 from typing import Dict, List, Tuple
 import logging
 
+from config.threads import evaluation_parallelism
+
 logger = logging.getLogger(__name__)
 
+# Metrik cross-validation (nama scorer sklearn), dihitung dari fit fold yang sama
+CV_METRICS = ('accuracy', 'f1_macro', 'precision_macro', 'recall_macro')
+
 class StressModelEvaluator:
     """
     Evaluasi komprehensif untuk model prediksi stres
@@ -22,13 +29,19 @@ class StressModelEvaluator:
         self.scaler = scaler
         self.stress_labels = {0: "Rendah", 1: "Sedang", 2: "Tinggi"}
     
-    def evaluate_model_performance(self, X_test: np.ndarray, y_test: np.ndarray) -> Dict:
+    def evaluate_model_performance(self, X_test: np.ndarray, y_test: np.ndarray,
+                                   cross_validation: bool = True) -> Dict:
         """
         Comprehensive model evaluation with medical-grade metrics
+        cross_validation=False melewati refit per fold (lihat evaluate_oob untuk mode murah)
         """
         try:
             # Make predictions
             if self.scaler:
+                # Scaler yang di-fit dengan DataFrame mengharapkan nama kolom yang sama
+                feature_names = getattr(self.scaler, 'feature_names_in_', None)
+                if feature_names is not None and not isinstance(X_test, pd.DataFrame):
+                    X_test = pd.DataFrame(X_test, columns=feature_names)
                 X_test_scaled = self.scaler.transform(X_test)
             else:
                 X_test_scaled = X_test
@@ -49,8 +62,8 @@ class StressModelEvaluator:
             # Confusion matrix
             conf_matrix = confusion_matrix(y_test, y_pred)
             
-            # Cross-validation scores
-            cv_scores = self._cross_validation_analysis(X_test_scaled, y_test)
+            # Cross-validation scores (deep check: refit forest per fold)
+            cv_scores = self._cross_validation_analysis(X_test_scaled, y_test) if cross_validation else None
             
             # Model reliability metrics
             reliability = self._calculate_reliability_metrics(y_pred_proba)
@@ -67,12 +80,8 @@ class StressModelEvaluator:
                 'cross_validation': cv_scores,
                 'reliability_metrics': reliability,
                 'clinical_metrics': clinical_metrics,
-                'model_info': {
-                    'algorithm': 'Random Forest',
-                    'n_estimators': getattr(self.model, 'n_estimators', 'Unknown'),
-                    'max_depth': getattr(self.model, 'max_depth', 'Unknown'),
-                    'oob_score': getattr(self.model, 'oob_score_', None)
-                }
+                'model_info': self._model_info(),
+                'evaluation_mode': 'holdout'
             }
             
             logger.info(f"✅ Model evaluation completed:")
@@ -86,45 +95,97 @@ class StressModelEvaluator:
             logger.error(f"❌ Model evaluation error: {e}")
             return {'error': str(e)}
     
-    def _cross_validation_analysis(self, X: np.ndarray, y: np.ndarray) -> Dict:
-        """Perform stratified cross-validation for robust evaluation"""
+    def evaluate_oob(self, y_train: np.ndarray) -> Dict:
+        """
+        Evaluasi dari prediksi out-of-bag yang tersimpan di forest (oob_decision_function_)
+
+        Setiap baris training hanya diprediksi oleh pohon yang tidak melihatnya
+        saat bootstrap, sehingga hasilnya estimasi generalisasi tanpa data test
+        dan tanpa refit. Biayanya hanya argmax + metrik atas n baris training.
+        y_train: label training dengan urutan baris yang sama seperti saat fit.
+        """
         try:
-            cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+            decision = getattr(self.model, 'oob_decision_function_', None)
+            if decision is None:
+                raise ValueError("Model was trained without oob_score=True")
+            if y_train is None or len(y_train) != len(decision):
+                raise ValueError("Training labels are missing or do not match the out-of-bag predictions")
             
-            # Accuracy scores
-            accuracy_scores = cross_val_score(self.model, X, y, cv=cv, scoring='accuracy')
+            # Baris yang tidak pernah out-of-bag (forest kecil) tidak punya prediksi
+            covered = np.isfinite(decision).all(axis=1) & (decision.sum(axis=1) > 0)
+            y_true = np.asarray(y_train)[covered].astype(int)
+            y_pred_proba = decision[covered]
+            y_pred = np.asarray(self.model.classes_)[y_pred_proba.argmax(axis=1)].astype(int)
             
-            # F1 scores
-            f1_scores = cross_val_score(self.model, X, y, cv=cv, scoring='f1_macro')
+            conf_matrix = confusion_matrix(y_true, y_pred, labels=list(self.stress_labels))
+            class_report = classification_report(y_true, y_pred, labels=list(self.stress_labels),
+                                               target_names=list(self.stress_labels.values()),
+                                               output_dict=True, zero_division=0)
+            accuracy = accuracy_score(y_true, y_pred)
+            f1_macro = f1_score(y_true, y_pred, average='macro')
             
-            # Precision scores
-            precision_scores = cross_val_score(self.model, X, y, cv=cv, scoring='precision_macro')
+            evaluation_results = {
+                'accuracy': float(accuracy),
+                'f1_macro': float(f1_macro),
+                'f1_weighted': float(f1_score(y_true, y_pred, average='weighted')),
+                'classification_report': class_report,
+                'confusion_matrix': conf_matrix.tolist(),
+                'reliability_metrics': self._calculate_reliability_metrics(y_pred_proba),
+                'clinical_metrics': self._calculate_clinical_metrics(y_true, y_pred),
+                'model_info': self._model_info(),
+                'evaluation_mode': 'oob',
+                'oob_coverage': {
+                    'evaluated_samples': int(covered.sum()),
+                    'training_samples': int(len(decision))
+                }
+            }
             
-            # Recall scores
-            recall_scores = cross_val_score(self.model, X, y, cv=cv, scoring='recall_macro')
+            logger.info(f"✅ OOB evaluation completed: accuracy {accuracy:.3f}, F1 (macro) {f1_macro:.3f}")
+            return evaluation_results
             
-            return {
-                'accuracy': {
-                    'mean': float(accuracy_scores.mean()),
-                    'std': float(accuracy_scores.std()),
-                    'scores': accuracy_scores.tolist()
-                },
-                'f1_macro': {
-                    'mean': float(f1_scores.mean()),
-                    'std': float(f1_scores.std()),
-                    'scores': f1_scores.tolist()
-                },
-                'precision_macro': {
-                    'mean': float(precision_scores.mean()),
-                    'std': float(precision_scores.std()),
-                    'scores': precision_scores.tolist()
-                },
-                'recall_macro': {
-                    'mean': float(recall_scores.mean()),
-                    'std': float(recall_scores.std()),
-                    'scores': recall_scores.tolist()
+        except Exception as e:
+            logger.error(f"❌ OOB evaluation error: {e}")
+            return {'error': str(e)}
+    
+    def _model_info(self) -> Dict:
+        return {
+            'algorithm': 'Random Forest',
+            'n_estimators': getattr(self.model, 'n_estimators', 'Unknown'),
+            'max_depth': getattr(self.model, 'max_depth', 'Unknown'),
+            'oob_score': getattr(self.model, 'oob_score_', None)
+        }
+    
+    def _cross_validation_analysis(self, X: np.ndarray, y: np.ndarray) -> Dict:
+        """
+        Stratified cross-validation: satu pass, semua metrik dari fit fold yang sama
+
+        Setiap fold di-fit sekali (clone model) lalu di-score untuk accuracy,
+        F1, precision dan recall macro; nilainya sama dengan empat panggilan
+        cross_val_score terpisah. Fold berjalan paralel dalam EVALUATION_N_JOBS
+        core (lihat config/threads.py).
+        """
+        try:
+            cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+            fold_jobs, forest_jobs = evaluation_parallelism(cv.get_n_splits())
+            
+            # n_jobs forest hanya mempengaruhi kecepatan, bukan hasil fit
+            estimator = clone(self.model).set_params(n_jobs=forest_jobs)
+            results = cross_validate(estimator, X, y, cv=cv, scoring=CV_METRICS, n_jobs=fold_jobs)
+            
+            cv_results = {}
+            for metric in CV_METRICS:
+                scores = results[f'test_{metric}']
+                cv_results[metric] = {
+                    'mean': float(scores.mean()),
+                    'std': float(scores.std()),
+                    'scores': scores.tolist()
                 }
-            }
+            cv_results['fold_timings'] = [
+                {'fold': fold, 'fit_seconds': float(fit_time), 'score_seconds': float(score_time)}
+                for fold, (fit_time, score_time) in enumerate(zip(results['fit_time'], results['score_time']), 1)
+            ]
+            cv_results['n_jobs'] = fold_jobs
+            return cv_results
             
         except Exception as e:
             logger.warning(f"Cross-validation failed: {e}")
@@ -213,8 +274,8 @@ class StressModelEvaluator:
         report.append(f"   • Low Confidence Predictions: {reliability['low_confidence_rate']:.1%}")
         
         # Cross-validation
-        if 'error' not in evaluation_results['cross_validation']:
-            cv = evaluation_results['cross_validation']
+        cv = evaluation_results.get('cross_validation')
+        if cv and 'error' not in cv:
             report.append(f"\n✅ **CROSS-VALIDATION ROBUSTNESS**")
             report.append(f"   • CV Accuracy: {cv['accuracy']['mean']:.1%} (±{cv['accuracy']['std']:.1%})")
             report.append(f"   • CV F1-Score: {cv['f1_macro']['mean']:.1%} (±{cv['f1_macro']['std']:.1%})")
@@ -236,25 +297,29 @@ class StressModelEvaluator:
         
         return "\n".join(report)
 
-def evaluate_stress_model(model, scaler=None, test_data=None) -> Dict:
+def evaluation_set_hash(X: np.ndarray, y: np.ndarray) -> str:
+    """SHA-256 dari isi data evaluasi (shape, dtype dan bytes), kunci cache hasil evaluasi"""
+    digest = hashlib.sha256()
+    for array in (X, y):
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.shape}{array.dtype.str}".encode())
+        digest.update(memoryview(array).cast("B"))
+    return digest.hexdigest()
+
+def evaluate_stress_model(model, scaler=None, test_data=None, cross_validation: bool = True) -> Dict:
     """
     Quick evaluation function for the stress prediction model
     """
     evaluator = StressModelEvaluator(model, scaler)
     
     if test_data is None:
-        # Generate synthetic test data if none provided
-        logger.info("🔧 Generating synthetic test data for evaluation...")
-        np.random.seed(123)  # Different seed from training
-        n_test = 500
-        
-        # Generate test features with different patterns than training
-        X_test = np.random.rand(n_test, len(model.feature_importances_))
-        
-        # Simple stress classification for testing
-        y_test = np.random.choice([0, 1, 2], n_test, p=[0.4, 0.4, 0.2])
+        # Holdout tetap berversi (fitur realistis, label dari aturan training)
+        from ml.holdout import load_holdout
+        holdout = load_holdout(getattr(scaler, 'feature_names_in_', None))
+        logger.info(f"🧪 Evaluating on holdout {holdout.version} ({len(holdout.y)} rows)")
+        X_test, y_test = holdout.X, holdout.y
         
     else:
         X_test, y_test = test_data
     
-    return evaluator.evaluate_model_performance(X_test, y_test)
+    return evaluator.evaluate_model_performance(X_test, y_test, cross_validation=cross_validation)
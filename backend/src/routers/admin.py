@@ -2,14 +2,21 @@
 Router untuk fitur admin management
 Sesuai dengan spesifikasi laporan penelitian
 """
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from schemas.digital_activity_schema import UserResponse
-from config.connection import get_connection
+from config.connection import get_connection, StatementTimeoutError
+from services.serialization import FastJSONResponse
+from services.model_cache import model_payload_response, cached_payload_response
+from services.evaluation_jobs import evaluation_jobs, evaluation_set
+from services.tracing import trace_buffer
+from services.slow_queries import slow_query_log
+from services.profiler import profiler, ProfilerBusyError
+from services.retraining import retrain_pipeline, RetrainBusyError
+from fastapi.responses import PlainTextResponse
 from datetime import datetime, timedelta
 from typing import List, Optional
 import logging
-from ml.model_evaluator import evaluate_stress_model
-from ml.random_forest_model import stress_model
+from ml.random_forest_model import get_stress_model
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["Admin Management"])
@@ -59,6 +66,8 @@ def get_all_users(
         
         return result
         
+    except StatementTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"❌ Error getting users: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -121,8 +130,10 @@ def get_stress_distribution(
         cursor.close()
         conn.close()
         
-        return result
+        return FastJSONResponse(result)
         
+    except StatementTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"❌ Error getting stress distribution: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -176,8 +187,10 @@ def get_feature_importance_analysis(
         cursor.close()
         conn.close()
         
-        return result
+        return FastJSONResponse(result)
         
+    except StatementTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"❌ Error getting feature importance: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -228,8 +241,10 @@ def get_user_activity_summary(
         cursor.close()
         conn.close()
         
-        return result
+        return FastJSONResponse(result)
         
+    except StatementTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"❌ Error getting user activity: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -281,10 +296,93 @@ def get_system_performance(admin_user = Depends(get_current_admin_user)):
             "last_updated": datetime.now().isoformat()
         }
         
+    except StatementTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"❌ Error getting system performance: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/system/traces")
+def get_request_traces(
+    limit: int = Query(50, ge=1, le=500),
+    route: Optional[str] = Query(None, description="Route template atau path, mis. /prediksi/advanced"),
+    min_duration_ms: float = Query(0, ge=0),
+    admin_user = Depends(get_current_admin_user)
+):
+    """
+    Trace span request yang di-sample (terbaru dulu) dari worker ini
+    Untuk menelusuri stage mana yang membuat satu request prediksi lambat
+    """
+    traces = trace_buffer.query(limit=limit, route=route, min_duration_ms=min_duration_ms)
+    return FastJSONResponse({
+        "status": "success",
+        "buffered": len(trace_buffer),
+        "count": len(traces),
+        "traces": traces
+    })
+
+@router.get("/system/slow-queries")
+def get_slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    order_by: str = Query("total", pattern="^(total|max|count)$"),
+    admin_user = Depends(get_current_admin_user)
+):
+    """
+    Top-N statement lambat (SQL ternormalisasi) dan route dengan terlalu banyak
+    statement per request dari worker ini
+    """
+    return FastJSONResponse({
+        "status": "success",
+        "since": slow_query_log.started_at.isoformat(),
+        "threshold_ms": slow_query_log.threshold * 1000,
+        "statements": slow_query_log.top(limit=limit, order_by=order_by),
+        "chatty_routes": slow_query_log.chatty_routes()
+    })
+
+@router.delete("/system/slow-queries")
+def reset_slow_queries(admin_user = Depends(get_current_admin_user)):
+    """Kosongkan agregat slow-query (mis. setelah index baru dipasang)"""
+    slow_query_log.reset()
+    return {"status": "success"}
+
+@router.post("/system/profile")
+def capture_profile(
+    seconds: float = Query(10, gt=0, description="Durasi capture (dipotong ke PROFILER_MAX_SECONDS)"),
+    interval_ms: Optional[float] = Query(None, ge=1, le=1000),
+    include_idle: bool = Query(False, description="Ikutkan thread yang sedang idle/menunggu"),
+    wait: bool = Query(True, description="False = jalankan di background, ambil hasil via GET /system/profile"),
+    format: str = Query("json", pattern="^(json|collapsed)$"),
+    admin_user = Depends(get_current_admin_user)
+):
+    """
+    Sampling profiler di worker ini selama N detik (satu capture pada satu waktu)
+    Output collapsed stacks bisa langsung dibuka di speedscope/flamegraph.pl
+    """
+    try:
+        if not wait:
+            profiler.start_background(seconds, interval_ms, include_idle)
+            return FastJSONResponse({"status": "started", "seconds": min(seconds, profiler.max_seconds)}, status_code=202)
+        result = profiler.capture(seconds, interval_ms, include_idle)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    if format == "collapsed":
+        return PlainTextResponse(result.collapsed())
+    return FastJSONResponse({"status": "success", **result.summary(), "collapsed": result.collapsed()})
+
+@router.get("/system/profile")
+def get_last_profile(
+    format: str = Query("json", pattern="^(json|collapsed)$"),
+    admin_user = Depends(get_current_admin_user)
+):
+    """Hasil capture profiler terakhir di worker ini"""
+    result = profiler.last_result
+    if result is None:
+        raise HTTPException(status_code=404, detail="No profile captured yet" if not profiler.running else "Capture still running")
+    if format == "collapsed":
+        return PlainTextResponse(result.collapsed())
+    return FastJSONResponse({"status": "success", "running": profiler.running, **result.summary(), "collapsed": result.collapsed()})
+
 @router.get("/audit/login-logs")
 def get_login_audit_logs(
     days: int = Query(7, ge=1, le=30),
@@ -346,6 +444,8 @@ def get_login_audit_logs(
         
         return result
         
+    except StatementTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"❌ Error getting login audit logs: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -498,100 +598,175 @@ def get_dashboard_stats(
             "user_id": user_id
         }
         
+    except StatementTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"❌ Error fetching dashboard stats: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.get("/model/evaluation")
-def evaluate_prediction_model(admin_user = Depends(get_current_admin_user)):
+def evaluate_prediction_model(
+    request: Request,
+    mode: str = Query("oob", pattern="^(oob|full)$",
+                      description="oob = metrik out-of-bag dari forest (instan); full = holdout tetap + cross-validation"),
+    refresh: bool = Query(False, description="mode=full: hitung ulang walaupun hasil sudah ada di cache"),
+    admin_user = Depends(get_current_admin_user)
+):
     """
     Comprehensive model evaluation for stress prediction system
     Provides detailed metrics on model performance and reliability
+    mode=oob dihitung dari prediksi out-of-bag yang tersimpan di forest, tanpa refit.
+    mode=full berjalan sebagai job di background per (model hash, evaluation set hash):
+    202 + status job selama berjalan, hasil yang selesai dilayani dari cache dengan ETag
     """
+    stress_model = get_stress_model()
+    if stress_model.model is None:
+        raise HTTPException(status_code=503, detail="Model evaluation requires the in-process inference backend")
+    
+    if mode == "oob":
+        if stress_model.training_labels is None or not hasattr(stress_model.model, "oob_decision_function_"):
+            raise HTTPException(
+                status_code=409,
+                detail="Out-of-bag evaluation is not available for this model (no OOB predictions or training labels); use mode=full"
+            )
+        try:
+            return model_payload_response(
+                request, "model-evaluation-oob", stress_model.content_hash, lambda: _build_oob_evaluation(stress_model)
+            )
+        except Exception as e:
+            logger.error(f"❌ Model evaluation error: {e}")
+            raise HTTPException(status_code=500, detail=f"Model evaluation failed: {str(e)}")
+    
     try:
-        logger.info("🔬 Starting comprehensive model evaluation...")
+        model_hash = stress_model.content_hash
+        X_test, y_test, set_hash = evaluation_set(stress_model.feature_names)
         
-        # Evaluate the current model
-        evaluation_results = evaluate_stress_model(stress_model.model, stress_model.scaler)
+        cached = None if refresh else evaluation_jobs.result(model_hash, set_hash)
+        if cached is not None:
+            return cached_payload_response(request, *cached)
         
-        # Generate human-readable report
-        from ml.model_evaluator import StressModelEvaluator
-        evaluator = StressModelEvaluator(stress_model.model, stress_model.scaler)
-        evaluation_report = evaluator.generate_evaluation_report(evaluation_results)
+        # Job yang gagal tidak di-cache; error-nya ikut dilaporkan saat job baru dimulai
+        previous = evaluation_jobs.job(model_hash, set_hash)
+        previous_error = previous.error if previous is not None and previous.status == "failed" else None
+        job = evaluation_jobs.start(
+            model_hash, set_hash, lambda: _build_model_evaluation(stress_model, (X_test, y_test)), refresh=refresh
+        )
         
-        logger.info("✅ Model evaluation completed successfully")
-        
-        return {
-            "status": "success",
-            "evaluation_timestamp": datetime.now().isoformat(),
-            "detailed_metrics": evaluation_results,
-            "human_readable_report": evaluation_report,
-            "model_version": "1.0.0",
-            "recommendations": {
-                "accuracy_status": "excellent" if evaluation_results.get('accuracy', 0) >= 0.85 else "good" if evaluation_results.get('accuracy', 0) >= 0.75 else "needs_improvement",
-                "deployment_ready": evaluation_results.get('accuracy', 0) >= 0.75 and evaluation_results.get('clinical_metrics', {}).get('safety_score', 0) >= 0.80,
-                "next_actions": [
-                    "Monitor prediction confidence scores",
-                    "Track real-world performance",
-                    "Consider model retraining if accuracy drops below 75%"
-                ]
-            }
-        }
+        return FastJSONResponse(
+            {"status": "accepted", "job": job.to_dict(), "previous_error": previous_error},
+            status_code=202, headers={"Retry-After": "5"}
+        )
         
     except Exception as e:
         logger.error(f"❌ Model evaluation error: {e}")
         raise HTTPException(status_code=500, detail=f"Model evaluation failed: {str(e)}")
 
+def _build_oob_evaluation(stress_model) -> dict:
+    from ml.model_evaluator import StressModelEvaluator
+    
+    evaluation_results = StressModelEvaluator(stress_model.model, stress_model.scaler).evaluate_oob(stress_model.training_labels)
+    if 'error' in evaluation_results:
+        raise RuntimeError(evaluation_results['error'])
+    return _evaluation_payload(stress_model, evaluation_results)
+
+def _build_model_evaluation(stress_model, test_data) -> dict:
+    logger.info("🔬 Starting comprehensive model evaluation...")
+    
+    # Evaluator (sklearn.metrics, model_selection) di-import saat dibutuhkan saja
+    from ml.model_evaluator import evaluate_stress_model
+    
+    # Evaluate the model captured when the job started (bukan model global yang bisa di-swap)
+    evaluation_results = evaluate_stress_model(stress_model.model, stress_model.scaler, test_data)
+    if 'error' in evaluation_results:
+        raise RuntimeError(evaluation_results['error'])
+    
+    logger.info("✅ Model evaluation completed successfully")
+    return _evaluation_payload(stress_model, evaluation_results)
+
+def _evaluation_payload(stress_model, evaluation_results: dict) -> dict:
+    from ml.model_evaluator import StressModelEvaluator
+    
+    # Generate human-readable report
+    evaluator = StressModelEvaluator(stress_model.model, stress_model.scaler)
+    evaluation_report = evaluator.generate_evaluation_report(evaluation_results)
+    
+    return {
+        "status": "success",
+        "evaluation_mode": evaluation_results.get('evaluation_mode'),
+        "evaluation_timestamp": datetime.now().isoformat(),
+        "detailed_metrics": evaluation_results,
+        "human_readable_report": evaluation_report,
+        "model_version": "1.0.0",
+        "model_build": stress_model.version_tag,
+        "recommendations": {
+            "accuracy_status": "excellent" if evaluation_results.get('accuracy', 0) >= 0.85 else "good" if evaluation_results.get('accuracy', 0) >= 0.75 else "needs_improvement",
+            "deployment_ready": evaluation_results.get('accuracy', 0) >= 0.75 and evaluation_results.get('clinical_metrics', {}).get('safety_score', 0) >= 0.80,
+            "next_actions": [
+                "Monitor prediction confidence scores",
+                "Track real-world performance",
+                "Consider model retraining if accuracy drops below 75%"
+            ]
+        }
+    }
+
 @router.get("/model/feature-importance")
-def get_model_feature_importance(admin_user = Depends(get_current_admin_user)):
+def get_model_feature_importance(request: Request, admin_user = Depends(get_current_admin_user)):
     """
     Get current model feature importance rankings
     Helps understand which factors most influence stress predictions
+    Ranking dihitung sekali per versi model dan dilayani dengan ETag
     """
+    stress_model = get_stress_model()
+    if stress_model.model is None and stress_model.backend is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
     try:
-        if stress_model.model is None:
-            raise HTTPException(status_code=503, detail="Model not loaded")
-        
-        # Get feature importances
-        feature_importance = dict(zip(stress_model.feature_names, stress_model.model.feature_importances_))
-        
-        # Sort by importance
-        sorted_features = sorted(feature_importance.items(), key=lambda x: x[1], reverse=True)
-        
-        # Calculate cumulative importance
-        total_importance = sum(feature_importance.values())
-        cumulative_importance = 0
-        feature_analysis = []
-        
-        for i, (feature, importance) in enumerate(sorted_features):
-            cumulative_importance += importance
-            feature_analysis.append({
-                "rank": i + 1,
-                "feature_name": feature.replace('_', ' ').title(),
-                "feature_key": feature,
-                "importance_score": float(importance),
-                "importance_percentage": float(importance / total_importance * 100),
-                "cumulative_percentage": float(cumulative_importance / total_importance * 100),
-                "interpretation": _get_feature_interpretation(feature, importance)
-            })
-        
-        return {
-            "status": "success",
-            "model_version": "1.0.0",
-            "analysis_timestamp": datetime.now().isoformat(),
-            "top_features": feature_analysis[:10],
-            "all_features": feature_analysis,
-            "summary": {
-                "most_important_factor": sorted_features[0][0].replace('_', ' ').title(),
-                "top_3_cumulative_importance": float(sum([x[1] for x in sorted_features[:3]]) / total_importance * 100),
-                "model_focus": "digital_wellness" if any("sosmed" in f[0] or "screen" in f[0] for f in sorted_features[:3]) else "lifestyle_balance"
-            }
-        }
+        return model_payload_response(request, "feature-importance", stress_model.content_hash, _build_feature_importance)
         
     except Exception as e:
         logger.error(f"❌ Feature importance analysis error: {e}")
         raise HTTPException(status_code=500, detail=f"Feature analysis failed: {str(e)}")
 
+def _build_feature_importance() -> dict:
+    stress_model = get_stress_model()
+    
+    # Get feature importances (in-process model atau metadata dari sidecar)
+    feature_importance = dict(zip(stress_model.feature_names, stress_model.feature_importances))
+    
+    # Sort by importance
+    sorted_features = sorted(feature_importance.items(), key=lambda x: x[1], reverse=True)
+    
+    # Calculate cumulative importance
+    total_importance = sum(feature_importance.values())
+    cumulative_importance = 0
+    feature_analysis = []
+    
+    for i, (feature, importance) in enumerate(sorted_features):
+        cumulative_importance += importance
+        feature_analysis.append({
+            "rank": i + 1,
+            "feature_name": feature.replace('_', ' ').title(),
+            "feature_key": feature,
+            "importance_score": float(importance),
+            "importance_percentage": float(importance / total_importance * 100),
+            "cumulative_percentage": float(cumulative_importance / total_importance * 100),
+            "interpretation": _get_feature_interpretation(feature, importance)
+        })
+    
+    return {
+        "status": "success",
+        "model_version": "1.0.0",
+        "model_build": stress_model.version_tag,
+        "analysis_timestamp": datetime.now().isoformat(),
+        "top_features": feature_analysis[:10],
+        "all_features": feature_analysis,
+        "summary": {
+            "most_important_factor": sorted_features[0][0].replace('_', ' ').title(),
+            "top_3_cumulative_importance": float(sum([x[1] for x in sorted_features[:3]]) / total_importance * 100),
+            "model_focus": "digital_wellness" if any("sosmed" in f[0] or "screen" in f[0] for f in sorted_features[:3]) else "lifestyle_balance"
+        }
+    }
+
 def _get_feature_interpretation(feature_name: str, importance: float) -> str:
     """Get human-readable interpretation of feature importance"""
     
@@ -618,34 +793,47 @@ def _get_feature_interpretation(feature_name: str, importance: float) -> str:
         return f"{base_interpretation} (Supporting factor - low influence)"
 
 @router.post("/model/retrain")
-def trigger_model_retraining(admin_user = Depends(get_current_admin_user)):
+def trigger_model_retraining(
+    n_jobs: Optional[int] = Query(None, ge=1, description="CPU budget proses training (default RETRAIN_N_JOBS)"),
+    promote: bool = Query(True, description="False = latih dan evaluasi saja, tanpa promosi"),
+    admin_user = Depends(get_current_admin_user)
+):
     """
-    Trigger model retraining with latest data
-    (Placeholder for production implementation)
+    Mulai retraining di background dari data berlabel (actual_stress_level)
+    Pantau progres lewat GET /admin/model/retrain, batalkan lewat DELETE
     """
+    stress_model = get_stress_model()
+    if stress_model.model is None:
+        raise HTTPException(status_code=503, detail="Model retraining requires the in-process inference backend")
+    
     try:
-        # In production, this would:
-        # 1. Fetch latest prediction data from database
-        # 2. Validate data quality
-        # 3. Retrain model with new data
-        # 4. Evaluate new model performance
-        # 5. Deploy if performance is better
-        
-        logger.info("🔄 Model retraining request received")
-        
-        # For now, return a placeholder response
-        return {
-            "status": "accepted",
-            "message": "Model retraining request queued",
-            "estimated_completion": (datetime.now() + timedelta(hours=2)).isoformat(),
-            "current_model_version": "1.0.0",
-            "next_model_version": "1.1.0",
-            "note": "This is a placeholder implementation. Production version would retrain with real data."
-        }
-        
-    except Exception as e:
-        logger.error(f"❌ Model retraining error: {e}")
-        raise HTTPException(status_code=500, detail=f"Retraining request failed: {str(e)}")
+        job = retrain_pipeline.start(n_jobs=n_jobs, promote=promote)
+    except RetrainBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    logger.info(f"🔄 Model retraining started: job {job.id}")
+    return FastJSONResponse({
+        "status": "accepted",
+        "message": "Model retraining started",
+        "current_model_build": stress_model.version_tag,
+        "job": job.to_dict()
+    }, status_code=202)
+
+@router.get("/model/retrain")
+def get_model_retraining_status(admin_user = Depends(get_current_admin_user)):
+    """Status run retraining yang sedang berjalan atau terakhir di host ini (worker mana pun)"""
+    job = retrain_pipeline.status()
+    if job is None:
+        raise HTTPException(status_code=404, detail="No retraining run on this host")
+    return FastJSONResponse({"status": "success", "running": retrain_pipeline.running, "job": job})
+
+@router.delete("/model/retrain")
+def cancel_model_retraining(admin_user = Depends(get_current_admin_user)):
+    """Batalkan run retraining yang sedang berjalan (juga jika dijalankan worker lain)"""
+    job_id = retrain_pipeline.cancel()
+    if job_id is None:
+        raise HTTPException(status_code=404, detail="No retraining run in progress")
+    return {"status": "cancelling", "job_id": job_id}
 
 @router.post("/model/test-prediction")
 def test_model_prediction(
@@ -656,6 +844,7 @@ def test_model_prediction(
     Test model prediction with custom input data
     Useful for validating model behavior with known cases
     """
+    stress_model = get_stress_model()
     try:
         # Validate test data has required fields
         required_fields = stress_model.feature_names
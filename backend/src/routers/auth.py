@@ -1,9 +1,10 @@
 """
 Router untuk autentikasi pengguna (login dan register)
 """
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
 from schemas.auth_schema import UserRegister, UserLogin, UserResponse
-from config.connection import get_connection
+from config.connection import StatementTimeoutError
+from storage import DuplicateEmailError, get_storage
 import bcrypt
 import logging
 from datetime import datetime
@@ -17,12 +18,10 @@ def register_user(user_data: UserRegister):
     Registrasi pengguna baru
     """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
+        storage = get_storage()
         
         # Check if email already exists
-        cursor.execute("SELECT id FROM users WHERE email = %s", (user_data.email,))
-        if cursor.fetchone():
+        if storage.get_user_by_email(user_data.email):
             raise HTTPException(
                 status_code=400, 
                 detail="Email sudah terdaftar"
@@ -35,18 +34,20 @@ def register_user(user_data: UserRegister):
         ).decode('utf-8')
         
         # Insert new user
-        cursor.execute(
-            """
-            INSERT INTO users (nama, email, password, role, tanggal_daftar)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING id, nama, email, role, tanggal_daftar
-            """,
-            (user_data.nama, user_data.email, hashed_password, 
-             user_data.role or 'user', datetime.now())
-        )
-        
-        new_user = cursor.fetchone()
-        conn.commit()
+        try:
+            new_user = storage.create_user(
+                nama=user_data.nama,
+                email=user_data.email,
+                password_hash=hashed_password,
+                role=user_data.role or 'user',
+                tanggal_daftar=datetime.now()
+            )
+        except DuplicateEmailError:
+            # Registrasi bersamaan dengan email yang sama
+            raise HTTPException(
+                status_code=400, 
+                detail="Email sudah terdaftar"
+            )
         
         logger.info(f"✅ New user registered: {user_data.email}")
         
@@ -64,6 +65,8 @@ def register_user(user_data: UserRegister):
         
     except HTTPException:
         raise
+    except StatementTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"❌ Registration error: {e}")
         raise HTTPException(
@@ -71,22 +74,30 @@ def register_user(user_data: UserRegister):
             detail=f"Terjadi kesalahan saat registrasi: {str(e)}"
         )
 
+def _audit_login(storage, request: Request, user_id: int, login_status: str, failure_reason: str = None):
+    """Catat audit login; kegagalan menulis audit tidak menggagalkan login"""
+    try:
+        storage.record_login(
+            user_id=user_id,
+            login_status=login_status,
+            ip_address=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent"),
+            failure_reason=failure_reason
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to record login audit for user {user_id}: {e}")
+
 @router.post("/login", response_model=dict)
-def login_user(login_data: UserLogin):
+def login_user(login_data: UserLogin, request: Request):
     """
     Login pengguna
+    Setiap percobaan login untuk email yang terdaftar dicatat di login_audit_logs
     """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
+        storage = get_storage()
         
         # Get user by email
-        cursor.execute(
-            "SELECT id, nama, email, password, role, is_active FROM users WHERE email = %s",
-            (login_data.email,)
-        )
-        
-        user = cursor.fetchone()
+        user = storage.get_user_by_email(login_data.email)
         
         if not user:
             raise HTTPException(
@@ -94,7 +105,7 @@ def login_user(login_data: UserLogin):
                 detail="Email atau password salah"
             )
         
-        # Extract user data using named access (RealDictCursor)
+        # Extract user data
         user_id = user['id']
         user_nama = user['nama']
         user_email = user['email']
@@ -104,6 +115,7 @@ def login_user(login_data: UserLogin):
         
         # Check if user is active
         if not user_is_active:
+            _audit_login(storage, request, user_id, "blocked", "Akun tidak aktif")
             raise HTTPException(
                 status_code=401,
                 detail="Akun tidak aktif"
@@ -111,17 +123,15 @@ def login_user(login_data: UserLogin):
         
         # Verify password
         if not bcrypt.checkpw(login_data.password.encode('utf-8'), user_password.encode('utf-8')):
+            _audit_login(storage, request, user_id, "failed", "Password salah")
             raise HTTPException(
                 status_code=401,
                 detail="Email atau password salah"
             )
         
         # Update last login
-        cursor.execute(
-            "UPDATE users SET last_login = %s WHERE id = %s",
-            (datetime.now(), user_id)
-        )
-        conn.commit()
+        storage.update_last_login(user_id, datetime.now())
+        _audit_login(storage, request, user_id, "success")
         
         logger.info(f"✅ User logged in: {login_data.email}")
         
@@ -140,6 +150,8 @@ def login_user(login_data: UserLogin):
         
     except HTTPException:
         raise
+    except StatementTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"❌ Login error: {e}")
         raise HTTPException(
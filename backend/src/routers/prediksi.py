@@ -2,11 +2,16 @@
 Router untuk prediksi stres menggunakan Random Forest
 Sesuai dengan spesifikasi laporan penelitian
 """
-from fastapi import APIRouter, HTTPException, Depends, Query
-from schemas.digital_activity_schema import DigitalActivityInput, StressPredictionResponse
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from schemas.digital_activity_schema import DigitalActivityInput, StressPredictionResponse, AdvancedPredictionResponse
 from schemas.input_schema import InputData  # Backward compatibility
 from services.predict import predict_stress_from_digital_activity, prediksi_model
-from config.connection import get_connection
+from config.connection import get_connection, StatementTimeoutError
+from storage import get_storage
+from services.serialization import FastJSONResponse, ModelJSONResponse
+from config.logging_config import sampled_fields
+from services.model_cache import model_payload_response
+from ml.random_forest_model import get_stress_model
 from datetime import datetime, timedelta
 from typing import List, Optional
 import logging
@@ -35,30 +40,25 @@ def prediksi_stres_advanced(activity_data: DigitalActivityInput):
             user_id=1  # Default user untuk testing
         )
         
-        logger.info(f"✅ Advanced Random Forest prediction: {result.predicted_label} (confidence: {result.confidence_score:.3f})")
+        logger.info("✅ Advanced Random Forest prediction", extra=sampled_fields(
+            label=result.predicted_label, confidence=result.confidence_score))
         
-        return {
-            "status": "success",
-            "predicted_class": result.predicted_class,
-            "predicted_label": result.predicted_label,
-            "confidence_score": result.confidence_score,
-            "probabilities": result.probabilities,
-            "top_features": result.top_features,
-            "model_info": result.model_info,
-            "recommendations": result.recommendations,
-            "wellness_score": activity_data.get_digital_wellness_score(),
-            "timestamp": datetime.now().isoformat()
-        }
+        # Serialize langsung dari model yang sudah tervalidasi (tanpa salinan dict)
+        return ModelJSONResponse(AdvancedPredictionResponse.from_prediction(
+            result,
+            wellness_score=activity_data.get_digital_wellness_score(),
+            timestamp=datetime.now().isoformat()
+        ))
         
     except Exception as e:
         logger.error(f"❌ Error in advanced prediction: {str(e)}")
-        return {
+        return FastJSONResponse({
             "status": "error",
             "predicted_label": "Sedang",
             "confidence_score": 0.5,
             "message": f"Error dalam prediksi: {str(e)}",
             "timestamp": datetime.now().isoformat()
-        }
+        })
 
 @router.post("")
 def prediksi_stres_universal(data: dict):
@@ -109,71 +109,12 @@ def prediksi_stres_universal(data: dict):
                     user_id=1  # Default user untuk testing
                 )
                 
-                logger.info(f"✅ Random Forest prediction completed: {result.predicted_label} (confidence: {result.confidence_score:.3f})")
+                logger.info("✅ Random Forest prediction completed", extra=sampled_fields(
+                    label=result.predicted_label, confidence=result.confidence_score))
                 
-                # Save prediction to database
-                try:
-                    conn = get_connection()
-                    cursor = conn.cursor()
-                    
-                    # First, save digital activity
-                    cursor.execute("""
-                        INSERT INTO digital_activities (
-                            user_id, tanggal, screen_time_total, durasi_pemakaian, 
-                            frekuensi_penggunaan, jumlah_aplikasi, notifikasi_count,
-                            durasi_tidur, durasi_makan, durasi_olahraga, main_game,
-                            belajar_online, buka_sosmed, streaming, scroll_time,
-                            email_time, panggilan_time, waktu_pagi, waktu_siang,
-                            waktu_sore, waktu_malam, jumlah_aktivitas
-                        ) VALUES (
-                            %s, CURRENT_DATE, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-                        ) RETURNING id
-                    """, (
-                        1, activity_data.screen_time_total, activity_data.durasi_pemakaian,
-                        activity_data.frekuensi_penggunaan, activity_data.jumlah_aplikasi,
-                        activity_data.notifikasi_count, activity_data.durasi_tidur,
-                        activity_data.durasi_makan, activity_data.durasi_olahraga,
-                        activity_data.main_game, activity_data.belajar_online,
-                        activity_data.buka_sosmed, activity_data.streaming,
-                        activity_data.scroll_time, activity_data.email_time,
-                        activity_data.panggilan_time, activity_data.waktu_pagi,
-                        activity_data.waktu_siang, activity_data.waktu_sore,
-                        activity_data.waktu_malam, activity_data.jumlah_aktivitas
-                    ))
-                    
-                    digital_activity_id = cursor.fetchone()['id']
-                    
-                    # Then save prediction
-                    cursor.execute("""
-                        INSERT INTO predictions (
-                            user_id, digital_activity_id, predicted_stress_level,
-                            confidence_score, prediction_date, model_version
-                        ) VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP, %s)
-                    """, (
-                        1, digital_activity_id, result.predicted_label,
-                        result.confidence_score, "1.0.0"
-                    ))
-                    
-                    conn.commit()
-                    cursor.close()
-                    conn.close()
-                    
-                    logger.info(f"💾 Prediction saved to database successfully")
-                    
-                except Exception as db_error:
-                    logger.error(f"❌ Error saving to database: {str(db_error)}")
-                    # Continue with response even if DB save fails
-                
-                return {
-                    "predicted_class": result.predicted_class,
-                    "predicted_label": result.predicted_label,
-                    "confidence_score": result.confidence_score,
-                    "probabilities": result.probabilities,
-                    "top_features": result.top_features,
-                    "model_info": result.model_info,
-                    "recommendations": result.recommendations
-                }
+                # Prediksi sudah disimpan oleh service (storage backend / spool);
+                # result.prediction_id None jika penyimpanan ditunda atau gagal
+                return ModelJSONResponse(result)
             except Exception as modern_error:
                 logger.error(f"❌ Error in modern prediction: {str(modern_error)}")
                 return {
@@ -207,7 +148,8 @@ def prediksi_stres_random_forest(
             user_id=current_user["user_id"]
         )
         
-        logger.info(f"✅ Random Forest prediction completed: {result.predicted_label} (confidence: {result.confidence_score:.3f})")
+        logger.info("✅ Random Forest prediction completed", extra=sampled_fields(
+            label=result.predicted_label, confidence=result.confidence_score))
         
         return result
         
@@ -253,49 +195,31 @@ def get_riwayat_prediksi(
     Sesuai dengan fitur pemantauan tren stres dalam laporan
     """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT 
-                p.predicted_stress_level,
-                p.confidence_score,
-                p.prediction_date,
-                da.screen_time_total,
-                da.buka_sosmed,
-                da.notifikasi_count,
-                da.waktu_malam
-            FROM predictions p
-            JOIN digital_activities da ON p.digital_activity_id = da.id
-            WHERE p.user_id = %s 
-            AND p.prediction_date >= %s
-            ORDER BY p.prediction_date DESC 
-            LIMIT %s
-        """, (current_user["user_id"], datetime.now() - timedelta(days=days), limit))
-        
-        results = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        results = get_storage().prediction_history(
+            current_user["user_id"], datetime.now() - timedelta(days=days), limit
+        )
 
         riwayat = []
         for row in results:
             riwayat.append({
-                "predicted_stress_level": row[0],
-                "confidence_score": row[1],
-                "prediction_date": row[2].isoformat() if row[2] else None,
-                "screen_time_total": row[3],
-                "social_media_time": row[4],
-                "notification_count": row[5],
-                "night_usage": row[6]
+                "predicted_stress_level": row["predicted_stress_level"],
+                "confidence_score": row["confidence_score"],
+                "prediction_date": row["prediction_date"].isoformat() if row["prediction_date"] else None,
+                "screen_time_total": row["screen_time_total"],
+                "social_media_time": row["buka_sosmed"],
+                "notification_count": row["notifikasi_count"],
+                "night_usage": row["waktu_malam"]
             })
 
-        return {
+        return FastJSONResponse({
             "status": "success",
             "data": riwayat,
             "total": len(riwayat),
             "period_days": days
-        }
+        })
 
+    except StatementTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"Error getting history: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Terjadi kesalahan: {str(e)}")
@@ -385,19 +309,26 @@ def get_analisis_tren_stres(
             ]
         }
 
+    except StatementTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"Error getting trend analysis: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Terjadi kesalahan: {str(e)}")
 
 @router.get("/model/info")
-def get_model_info():
+def get_model_info(request: Request):
     """
     Informasi tentang model Random Forest yang digunakan
     Sesuai dengan dokumentasi teknis dalam laporan
+    Payload dibangun sekali per versi model dan dilayani dengan ETag
     """
+    return model_payload_response(request, "model-info", get_stress_model().content_hash, _build_model_info)
+
+def _build_model_info() -> dict:
     return {
         "model_algorithm": "Random Forest",
         "model_version": "1.0.0",
+        "model_build": get_stress_model().version_tag,
         "features_count": 20,
         "stress_classes": ["Rendah", "Sedang", "Tinggi"],
         "key_features": [
@@ -467,13 +398,13 @@ def get_user_dashboard_stats(
     """
     try:
         user_id = current_user["user_id"]
-        logger.info(f"🔍 Fetching dashboard stats for user_id: {user_id}")
+        logger.debug("🔍 Fetching dashboard stats for user_id: %s", user_id)
         
         conn = get_connection()
         cursor = conn.cursor()
         
         # Get total predictions for this user
-        logger.info(f"📊 Step 1: Getting total predictions...")
+        logger.debug("📊 Step 1: Getting total predictions...")
         cursor.execute("""
             SELECT COUNT(*) as total_predictions
             FROM predictions p
@@ -482,10 +413,10 @@ def get_user_dashboard_stats(
         
         result = cursor.fetchone()
         total_predictions = result['total_predictions'] if result and result.get('total_predictions') is not None else 0
-        logger.info(f"   Total predictions found: {total_predictions}")
+        logger.debug("   Total predictions found: %s", total_predictions)
         
         # Get last prediction
-        logger.info(f"📊 Step 2: Getting last prediction...")
+        logger.debug("📊 Step 2: Getting last prediction...")
         cursor.execute("""
             SELECT p.predicted_stress_level, p.prediction_date, p.confidence_score
             FROM predictions p
@@ -502,12 +433,12 @@ def get_user_dashboard_stats(
                 "prediction_date": last_prediction_data['prediction_date'].isoformat(),
                 "confidence_score": float(last_prediction_data['confidence_score']) * 100
             }
-            logger.info(f"   Last prediction: {last_prediction['predicted_label']}")
+            logger.debug("   Last prediction: %s", last_prediction['predicted_label'])
         else:
-            logger.info(f"   No previous predictions found")
+            logger.debug("   No previous predictions found")
         
         # Get recent stress levels distribution (last 30 days)
-        logger.info(f"📊 Step 3: Getting stress distribution...")
+        logger.debug("📊 Step 3: Getting stress distribution...")
         thirty_days_ago = datetime.now() - timedelta(days=30)
         cursor.execute("""
             SELECT 
@@ -527,10 +458,10 @@ def get_user_dashboard_stats(
             if level in recent_stress_levels:
                 recent_stress_levels[level] = count
         
-        logger.info(f"   Stress distribution: {recent_stress_levels}")
+        logger.debug("   Stress distribution: %s", recent_stress_levels)
         
         # Calculate weekly trend
-        logger.info(f"📊 Step 4: Calculating weekly trends...")
+        logger.debug("📊 Step 4: Calculating weekly trends...")
         seven_days_ago = datetime.now() - timedelta(days=7)
         fourteen_days_ago = datetime.now() - timedelta(days=14)
         
@@ -602,21 +533,27 @@ def get_user_dashboard_stats(
                 "stress_level": activity.get('predicted_stress_level') or "Tidak Ada Data"
             })
         
-        logger.info(f"📊 Step 5: Completed successfully!")
-        logger.info(f"   Found {len(recent_activities)} recent activities")
+        logger.info("📊 Dashboard stats completed", extra=sampled_fields(
+            user_id=user_id,
+            total_predictions=total_predictions,
+            weekly_trend=weekly_trend,
+            recent_activities=len(recent_activities)
+        ))
         
         cursor.close()
         conn.close()
         
-        return {
+        return FastJSONResponse({
             "total_predictions": total_predictions,
             "last_prediction": last_prediction,
             "recent_stress_levels": recent_stress_levels,
             "weekly_trend": weekly_trend,
             "recent_activities": recent_activities,
             "user_id": user_id
-        }
+        })
         
+    except StatementTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"❌ Error fetching user dashboard stats: {type(e).__name__}: {str(e)}")
         logger.error(f"   User ID: {current_user.get('user_id', 'unknown') if current_user else 'no user'}")
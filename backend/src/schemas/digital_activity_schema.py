@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import Optional
 from datetime import date
+from services.tracing import span
 
 class DigitalActivityInput(BaseModel):
     """Schema input untuk data aktivitas digital - sesuai dengan laporan penelitian"""
@@ -83,6 +84,13 @@ class DigitalActivityInput(BaseModel):
             raise ValueError('Durasi olahraga maksimal 6 jam per hari')
         return v
         
+    @model_validator(mode='wrap')
+    @classmethod
+    def time_validation(cls, data, handler):
+        # Durasi seluruh validasi schema (stage request_validation di /metrics)
+        with span("request_validation"):
+            return handler(data)
+    
     def calculate_total_digital_time(self) -> float:
         """Calculate total digital activity time for validation"""
         return (self.main_game + self.belajar_online + self.buka_sosmed + 
@@ -146,6 +154,9 @@ class StressPredictionResponse(BaseModel):
     # Rekomendasi berdasarkan hasil
     recommendations: Optional[list] = Field(default=[], description="Rekomendasi berdasarkan prediksi")
     
+    # ID baris predictions; None jika tidak disimpan (tanpa user, di-spool, atau gagal)
+    prediction_id: Optional[int] = Field(default=None, description="ID prediksi tersimpan")
+    
     class Config:
         protected_namespaces = ()
         json_schema_extra = {
@@ -173,6 +184,18 @@ class StressPredictionResponse(BaseModel):
             }
         }
 
+class AdvancedPredictionResponse(StressPredictionResponse):
+    """Response endpoint /prediksi/advanced: hasil prediksi + wellness score"""
+    
+    status: str = Field("success", description="Status request")
+    wellness_score: dict = Field(..., description="Indikator digital wellness")
+    timestamp: str = Field(..., description="Waktu prediksi (ISO 8601)")
+    
+    @classmethod
+    def from_prediction(cls, result: StressPredictionResponse, **extra) -> "AdvancedPredictionResponse":
+        """Bangun response dari hasil prediksi yang sudah tervalidasi tanpa validasi ulang"""
+        return cls.model_construct(**result.__dict__, status="success", **extra)
+
 class UserInput(BaseModel):
     """Schema input untuk data pengguna"""
     nama: str = Field(..., min_length=2, max_length=255)
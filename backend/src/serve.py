@@ -0,0 +1,168 @@
+"""
+Pre-fork launcher untuk menjalankan beberapa worker uvicorn dengan satu salinan model
+
+`uvicorn --workers N` men-spawn proses baru yang masing-masing meng-import
+`main` sendiri, sehingga model ditraining N kali dan disimpan N kali di RAM.
+Launcher ini meng-import aplikasi (termasuk load/training model) sekali di
+proses master, membekukan heap dengan `gc.freeze()` lalu melakukan fork.
+Node arrays pohon sklearn dialokasikan di C dan tidak pernah ditulis saat
+inference, sehingga halaman memorinya tetap dibagi (copy-on-write) antar worker.
+
+Usage:
+    python serve.py --workers 4
+    MODEL_ARTIFACT_PATH=ml/artifacts/model.joblib python serve.py --workers 4
+    kill -USR1 <master_pid>   # log laporan unique RSS per worker
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).parent))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from config.threads import configure_native_thread_env
+configure_native_thread_env()
+
+from config.settings import settings
+from config.logging_config import setup_logging
+
+logger = logging.getLogger("serve")
+
+def read_memory_usage(pid: int) -> Dict[str, int]:
+    """Baca pemakaian memori proses (kB) dari /proc/<pid>/smaps_rollup"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1])
+    return {
+        "rss_kb": fields.get("Rss", 0),
+        "pss_kb": fields.get("Pss", 0),
+        "uss_kb": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+        "shared_kb": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+    }
+
+def worker_memory_report(pids: List[int]) -> List[Dict]:
+    """Laporan RSS, PSS dan unique RSS (USS) untuk setiap worker"""
+    report = []
+    for pid in pids:
+        try:
+            usage = read_memory_usage(pid)
+        except OSError:
+            continue
+        usage["pid"] = pid
+        report.append(usage)
+    return report
+
+def log_memory_report(master_pid: int, pids: List[int]):
+    """Tulis laporan memori master dan worker ke log"""
+    for row in worker_memory_report([master_pid] + pids):
+        role = "master" if row["pid"] == master_pid else "worker"
+        logger.info(
+            f"📊 {role} pid={row['pid']} rss={row['rss_kb'] / 1024:.1f}MB "
+            f"pss={row['pss_kb'] / 1024:.1f}MB unique={row['uss_kb'] / 1024:.1f}MB "
+            f"shared={row['shared_kb'] / 1024:.1f}MB"
+        )
+
+def preload_application():
+    """Import aplikasi dan load model di master sebelum fork"""
+    from main import app
+    from ml.random_forest_model import get_stress_model
+    stress_model = get_stress_model()
+
+    logger.info(f"📦 Model preloaded in master (pid {os.getpid()}): {type(stress_model.model).__name__}")
+
+    # Pindahkan semua objek yang ada ke generasi permanen supaya GC di worker
+    # tidak menulis header objek (dan memecah halaman copy-on-write)
+    gc.collect()
+    gc.freeze()
+    return app
+
+def run_worker(app, sock: socket.socket):
+    """Jalankan satu worker uvicorn pada socket yang sudah di-bind master"""
+    import uvicorn
+
+    signal.signal(signal.SIGUSR1, signal.SIG_DFL)
+    config = uvicorn.Config(app, log_level=settings.LOG_LEVEL, lifespan="on")
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+def spawn_worker(app, sock: socket.socket) -> int:
+    pid = os.fork()
+    if pid == 0:
+        try:
+            run_worker(app, sock)
+        finally:
+            os._exit(0)
+    return pid
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork multi-worker launcher")
+    parser.add_argument("--host", default=settings.API_HOST)
+    parser.add_argument("--port", type=int, default=settings.API_PORT)
+    parser.add_argument("--workers", type=int, default=settings.WEB_WORKERS)
+    parser.add_argument("--report-delay", type=float, default=10.0,
+                        help="Detik setelah start sebelum laporan memori pertama")
+    args = parser.parse_args()
+
+    setup_logging()
+
+    app = preload_application()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    master_pid = os.getpid()
+    workers = [spawn_worker(app, sock) for _ in range(args.workers)]
+    logger.info(f"🚀 Serving on {args.host}:{args.port} with {len(workers)} workers: {workers}")
+
+    shutting_down = False
+
+    def handle_shutdown(signum, frame):
+        nonlocal shutting_down
+        shutting_down = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, handle_shutdown)
+    signal.signal(signal.SIGINT, handle_shutdown)
+    signal.signal(signal.SIGUSR1, lambda signum, frame: log_memory_report(master_pid, workers))
+
+    report_at = time.monotonic() + args.report_delay
+    while workers:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid:
+            workers.remove(pid)
+            if not shutting_down:
+                logger.warning(f"⚠️ Worker {pid} exited with status {status}, respawning")
+                workers.append(spawn_worker(app, sock))
+            continue
+        if report_at and time.monotonic() >= report_at:
+            log_memory_report(master_pid, workers)
+            report_at = None
+        time.sleep(0.5)
+
+    sock.close()
+    logger.info("👋 All workers stopped")
+
+if __name__ == "__main__":
+    main()
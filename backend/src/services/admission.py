@@ -0,0 +1,182 @@
+"""
+Admission control dan load shedding per route group
+
+Tanpa batas, setiap request diterima dan mengantre di threadpool sampai client
+timeout. Middleware ini membatasi jumlah request yang berjalan bersamaan per
+route group (prediction, dashboard, admin_analytics, auth) dengan antrean
+pendek. Request yang tidak mendapat slot dalam ADMISSION_QUEUE_TIMEOUT detik,
+atau datang saat antrean penuh, langsung dijawab 503 dengan header Retry-After.
+
+Format ADMISSION_LIMITS: "group=max_concurrency:max_queue,..."
+"""
+import asyncio
+import collections
+import logging
+from typing import Dict, Optional
+
+from config.settings import settings
+from services.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+def route_group_for_path(path: str) -> Optional[str]:
+    """Tentukan route group dari path request; None = tidak dibatasi"""
+    if path.startswith("/prediksi/dashboard-stats") or path.startswith("/admin/dashboard-stats"):
+        return "dashboard"
+    if path.startswith("/prediksi"):
+        return "prediction"
+    if path.startswith(("/admin/analytics", "/admin/model", "/admin/system")):
+        return "admin_analytics"
+    if path.startswith("/auth"):
+        return "auth"
+    return None
+
+def parse_admission_limits(spec: str) -> Dict[str, tuple]:
+    """Parse "prediction=32:64,auth=16:32" menjadi {group: (concurrency, queue)}"""
+    limits = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        group, values = item.split("=")
+        concurrency, queue_size = values.split(":")
+        limits[group.strip()] = (int(concurrency), int(queue_size))
+    return limits
+
+class AdmissionLimiter:
+    """Batas konkurensi + antrean FIFO pendek untuk satu route group (single event loop)"""
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.rejected_total = 0
+        self.admitted_total = 0
+        self._waiters = collections.deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        """True jika request mendapat slot, False jika harus di-shed"""
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            self.admitted_total += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self.rejected_total += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            done, _ = await asyncio.wait({waiter}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # Client disconnect saat mengantre: kembalikan slot jika sudah diberikan
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                waiter.cancel()
+                self._discard(waiter)
+            raise
+
+        if not done:
+            waiter.cancel()
+            self._discard(waiter)
+            self.rejected_total += 1
+            return False
+        self.admitted_total += 1
+        return True
+
+    def release(self):
+        """Serahkan slot ke waiter berikutnya, atau kurangi in_flight"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self.in_flight -= 1
+
+    def _discard(self, waiter):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def snapshot(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "admitted_total": self.admitted_total,
+            "rejected_total": self.rejected_total,
+            "saturated": self.in_flight >= self.max_concurrency,
+        }
+
+class AdmissionController:
+    """Registry limiter per route group, dibaca oleh endpoint /load dan metrics"""
+
+    def __init__(self, limits: Dict[str, tuple], queue_timeout: float):
+        self.limiters = {
+            group: AdmissionLimiter(group, concurrency, queue_size, queue_timeout)
+            for group, (concurrency, queue_size) in limits.items()
+        }
+
+    def limiter_for_path(self, path: str) -> Optional[AdmissionLimiter]:
+        group = route_group_for_path(path)
+        return self.limiters.get(group) if group else None
+
+    def snapshot(self) -> dict:
+        return {group: limiter.snapshot() for group, limiter in self.limiters.items()}
+
+admission_controller = AdmissionController(
+    parse_admission_limits(settings.ADMISSION_LIMITS),
+    settings.ADMISSION_QUEUE_TIMEOUT
+)
+
+class AdmissionControlMiddleware:
+    """Pure ASGI middleware: shed request dengan 503 + Retry-After saat group penuh"""
+
+    def __init__(self, app, controller: AdmissionController = admission_controller,
+                 retry_after: int = settings.ADMISSION_RETRY_AFTER):
+        self.app = app
+        self.controller = controller
+        self.retry_after = str(retry_after)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        limiter = self.controller.limiter_for_path(scope["path"])
+        if limiter is None:
+            return await self.app(scope, receive, send)
+
+        if not await limiter.acquire():
+            logger.warning(f"🚦 Shedding {scope['method']} {scope['path']} (group {limiter.name} saturated)")
+            return await self._reject(limiter, send)
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    async def _reject(self, limiter: AdmissionLimiter, send):
+        body = dumps({
+            "detail": "Server sedang sibuk, silakan coba lagi",
+            "route_group": limiter.name,
+            "retry_after_seconds": int(self.retry_after)
+        })
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", self.retry_after.encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
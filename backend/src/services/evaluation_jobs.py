@@ -0,0 +1,163 @@
+"""
+Job evaluasi model di background untuk GET /admin/model/evaluation
+
+Evaluasi lengkap (prediksi data test, cross-validation, metrik klinis) memakan
+waktu beberapa detik sampai menit, terlalu lama untuk thread request. Hasilnya
+hanya bergantung pada dua hal, sehingga dipakai sebagai kunci:
+
+- content hash model (model + scaler)
+- hash data evaluasi (holdout berversi di ml/holdout.py, hash isi X/y)
+
+Request pertama untuk kunci baru memulai job di thread background dan langsung
+dijawab 202 dengan status job; request berikutnya selama job berjalan mendapat
+status yang sama. Hasil yang selesai disimpan sebagai JSON di
+EVALUATION_RESULT_DIR sehingga request berikutnya (juga di worker lain dan
+setelah restart) dilayani langsung dari cache dengan ETag.
+"""
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from config.settings import settings
+from services.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+class EvaluationJob:
+    """Status satu run evaluasi untuk satu (model hash, evaluation set hash)"""
+
+    def __init__(self, model_hash: str, set_hash: str):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.model_hash = model_hash
+        self.set_hash = set_hash
+        self.status = "running"
+        self.started_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self._start = time.perf_counter()
+        self.duration: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "model_hash": self.model_hash,
+            "evaluation_set_hash": self.set_hash,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "elapsed_seconds": round(self.duration if self.duration is not None else time.perf_counter() - self._start, 3),
+            "error": self.error
+        }
+
+class EvaluationJobs:
+    """
+    Cache hasil evaluasi (memori + disk) dan job yang sedang berjalan per kunci
+
+    Satu job per kunci per worker; request lain untuk kunci yang sama tidak
+    memulai job kedua. Job yang gagal tidak di-cache: request berikutnya
+    memulai ulang.
+    """
+
+    def __init__(self, result_dir: str = ""):
+        self.result_dir = result_dir
+        self._results: Dict[str, Tuple[bytes, str]] = {}
+        self._jobs: Dict[str, EvaluationJob] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model_hash: str, set_hash: str) -> str:
+        return f"{model_hash[:16]}-{set_hash[:16]}"
+
+    def _path(self, key: str) -> Optional[str]:
+        if not self.result_dir:
+            return None
+        return os.path.join(self.result_dir, f"evaluation-{key}.json")
+
+    def result(self, model_hash: str, set_hash: str) -> Optional[Tuple[bytes, str]]:
+        """(body, etag) hasil yang sudah selesai, atau None"""
+        key = self.key(model_hash, set_hash)
+        cached = self._results.get(key)
+        if cached is not None:
+            return cached
+
+        path = self._path(key)
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                body = f.read()
+            cached = (body, f'"model-evaluation-{key}"')
+            self._results[key] = cached
+            return cached
+        return None
+
+    def job(self, model_hash: str, set_hash: str) -> Optional[EvaluationJob]:
+        return self._jobs.get(self.key(model_hash, set_hash))
+
+    def start(self, model_hash: str, set_hash: str, builder: Callable[[], dict],
+              refresh: bool = False) -> EvaluationJob:
+        """Mulai job untuk kunci ini, atau kembalikan job yang sedang berjalan"""
+        key = self.key(model_hash, set_hash)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status == "running":
+                return job
+            if refresh:
+                self._results.pop(key, None)
+            job = EvaluationJob(model_hash, set_hash)
+            self._jobs[key] = job
+
+        threading.Thread(target=self._run, args=(key, job, builder), name="model-evaluation", daemon=True).start()
+        logger.info(f"🔬 Model evaluation job {job.job_id} started for {key}")
+        return job
+
+    def _run(self, key: str, job: EvaluationJob, builder: Callable[[], dict]):
+        try:
+            payload = builder()
+            payload["evaluation_job"] = {
+                "job_id": job.job_id,
+                "model_hash": job.model_hash,
+                "evaluation_set_hash": job.set_hash,
+                "duration_seconds": round(time.perf_counter() - job._start, 3)
+            }
+            body = dumps(payload)
+            self._persist(key, body)
+            self._results[key] = (body, f'"model-evaluation-{key}"')
+            job.status = "succeeded"
+            logger.info(f"✅ Model evaluation job {job.job_id} finished")
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error(f"❌ Model evaluation job {job.job_id} failed: {e}")
+        finally:
+            job.finished_at = datetime.now()
+            job.duration = time.perf_counter() - job._start
+
+    def _persist(self, key: str, body: bytes):
+        path = self._path(key)
+        if not path:
+            return
+        try:
+            os.makedirs(self.result_dir, exist_ok=True)
+            # Tulis ke file sementara lalu rename: worker lain tidak membaca file setengah jadi
+            fd, tmp_path = tempfile.mkstemp(dir=self.result_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not persist evaluation result {key}: {e}")
+
+    def invalidate(self):
+        """Kosongkan cache memori (file di disk tetap, kuncinya content hash)"""
+        self._results.clear()
+
+evaluation_jobs = EvaluationJobs(settings.EVALUATION_RESULT_DIR)
+
+def evaluation_set(feature_names: list) -> tuple:
+    """(X, y, hash) holdout tetap (ml/holdout.py) untuk model dengan urutan fitur ini"""
+    from ml.holdout import load_holdout
+    holdout = load_holdout(feature_names)
+    return holdout.X, holdout.y, holdout.content_hash
@@ -0,0 +1,127 @@
+"""
+Status kesehatan yang dihitung di background untuk /health dan /ready
+
+- ``DatabaseHealthProber``: thread yang mengecek koneksi database setiap
+  HEALTH_PROBE_INTERVAL detik; /health hanya membaca hasil terakhir sehingga
+  probe load balancer tidak membuka koneksi baru per panggilan.
+  Probe yang sukses juga memicu replay spool prediksi (services/prediction_spool.py).
+- ``ModelLoader``: load model (artifact atau training) di thread terpisah saat
+  startup; /ready baru mengembalikan 200 setelah model siap dipakai.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+class DatabaseHealthProber:
+    """Cek database secara periodik dan simpan hasil terakhir"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.connected: Optional[bool] = None
+        self.checked_at: Optional[datetime] = None
+        self.latency_ms: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def probe(self) -> bool:
+        from config.connection import test_connection
+        start = time.perf_counter()
+        connected = test_connection()
+        self.latency_ms = round((time.perf_counter() - start) * 1000, 2)
+        if connected != self.connected:
+            log = logger.info if connected else logger.warning
+            log(f"🩺 Database status changed: {'connected' if connected else 'disconnected'}")
+        self.connected = connected
+        self.checked_at = datetime.now()
+        if connected:
+            # Spool dari outage sebelumnya (termasuk sebelum restart) di-replay saat database sehat
+            from services.prediction_spool import prediction_spool
+            prediction_spool.replay_async()
+        return connected
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.probe()
+            except Exception as e:
+                logger.error(f"❌ Database health probe failed: {e}")
+                self.connected = False
+                self.checked_at = datetime.now()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="db-health-prober", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self) -> dict:
+        if self.connected is None:
+            database = "unknown"
+        else:
+            database = "connected" if self.connected else "disconnected"
+        return {
+            "database": database,
+            "database_checked_at": self.checked_at.isoformat() if self.checked_at else None,
+            "database_latency_ms": self.latency_ms,
+        }
+
+class ModelLoader:
+    """Load model global di background; state dibaca oleh /ready"""
+
+    def __init__(self):
+        self.state = "pending"
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self.state in ("loading", "ready"):
+                return
+            self.state = "loading"
+        threading.Thread(target=self._load, name="model-loader", daemon=True).start()
+
+    def _load(self):
+        from ml.random_forest_model import get_stress_model
+        start = time.perf_counter()
+        try:
+            get_stress_model()
+            self.load_seconds = round(time.perf_counter() - start, 3)
+            self.state = "ready"
+            logger.info(f"✅ Model ready in {self.load_seconds}s")
+        except Exception as e:
+            self.error = str(e)
+            self.state = "failed"
+            logger.error(f"❌ Model loading failed: {e}")
+
+    @property
+    def ready(self) -> bool:
+        from ml.random_forest_model import is_model_loaded
+        if self.state != "ready" and is_model_loaded():
+            # Model sudah di-load sebelumnya (mis. serve.py sebelum fork)
+            self.state = "ready"
+        return self.state == "ready"
+
+    def status(self) -> dict:
+        ready = self.ready
+        status = {"model": self.state, "model_load_seconds": self.load_seconds}
+        if ready:
+            from ml.random_forest_model import get_stress_model
+            status["model_build"] = get_stress_model().version_tag
+        if self.error:
+            status["model_error"] = self.error
+        return status
+
+database_prober = DatabaseHealthProber(settings.HEALTH_PROBE_INTERVAL)
+model_loader = ModelLoader()
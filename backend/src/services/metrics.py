@@ -0,0 +1,327 @@
+"""
+Metrics in-process dengan output Prometheus text format (endpoint /metrics)
+
+Counter, Gauge dan Histogram di sini sengaja sederhana agar aman dinyalakan di
+production: setiap label set punya child sendiri dengan lock kecil yang hampir
+tidak pernah contended, dan lock registry hanya dipakai saat child baru dibuat.
+Histogram memakai bucket tetap (tanpa alokasi per observasi).
+
+Dengan serve.py (pre-fork, beberapa worker) setiap worker punya registry
+sendiri; metrics diberi label ``worker`` (pid) agar scrape dari worker berbeda
+tidak tertukar.
+
+Usage:
+    from services.metrics import time_stage, STAGE_DURATION
+
+    with time_stage("scaling"):
+        scaled = scaler.transform(rows)
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Bucket latency (detik): dari 0.1 ms (stage ML) sampai 10 s (request lambat)
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class _Metric:
+    """Basis metric berlabel; child per kombinasi label dibuat sekali lalu di-cache"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        # Fast path: label set yang sudah pernah dipakai
+        child = self._children.get(values)
+        if child is not None:
+            return child
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        key = tuple(str(v) for v in values)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+        return child
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def samples(self, extra=()) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key, extra)} {_format_value(child.value)}"
+            for key, child in list(self._children.items())
+        ]
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = float(value)
+
+class Gauge(_Metric):
+    """Gauge dengan nilai yang di-set langsung, atau dihitung saat scrape lewat callback"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 callback: Callable[[], Dict[Tuple[str, ...], float]] = None):
+        self.callback = callback
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def samples(self, extra=()) -> List[str]:
+        if self.callback is not None:
+            values = self.callback().items()
+        else:
+            values = [(key, child.value) for key, child in list(self._children.items())]
+        return [f"{self.name}{_format_labels(self.labelnames, key, extra)} {_format_value(value)}" for key, value in values]
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def samples(self, extra=()) -> List[str]:
+        lines = []
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = (("le", _format_value(bound)),)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, extra + le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key, extra)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class MetricsRegistry:
+    """Kumpulan metric yang di-render bersama untuk /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), callback=None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format 0.0.4"""
+        extra = (("worker", str(os.getpid())),)
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.samples(extra))
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# HTTP
+HTTP_REQUESTS = registry.counter(
+    "relaxaid_http_requests_total", "HTTP requests per route template and status", ("method", "route", "status"))
+HTTP_REQUEST_DURATION = registry.histogram(
+    "relaxaid_http_request_duration_seconds", "HTTP request latency per route template", ("method", "route"))
+
+# Pipeline prediksi: request_validation, input_validation, scaling, forest_evaluation,
+# personal_importance, recommendations
+STAGE_DURATION = registry.histogram(
+    "relaxaid_stage_duration_seconds", "Time spent per pipeline stage", ("stage",))
+
+# Database
+DB_STATEMENT_DURATION = registry.histogram(
+    "relaxaid_db_statement_duration_seconds", "Database statement latency per statement kind", ("statement",))
+DB_CONNECTION_WAIT = registry.histogram(
+    "relaxaid_db_connection_wait_seconds", "Time waiting for a database connection (connect/pool checkout)")
+DB_ERRORS = registry.counter(
+    "relaxaid_db_errors_total", "Failed database statements per statement kind", ("statement",))
+
+# Cache
+CACHE_REQUESTS = registry.counter(
+    "relaxaid_cache_requests_total", "Cache lookups per cache and result (hit/miss)", ("cache", "result"))
+
+class _StageTimer:
+    """Context manager ringan (tanpa generator) untuk mengukur satu stage"""
+
+    __slots__ = ("child", "start")
+
+    def __init__(self, child: _HistogramChild):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.child.observe(time.perf_counter() - self.start)
+        return False
+
+def time_stage(stage: str) -> _StageTimer:
+    """Catat durasi satu stage pipeline ke relaxaid_stage_duration_seconds"""
+    return _StageTimer(STAGE_DURATION.labels(stage))
+
+def _model_info() -> Dict[Tuple[str, ...], float]:
+    from ml.random_forest_model import get_stress_model, is_model_loaded
+    if not is_model_loaded():
+        return {}
+    stress_model = get_stress_model()
+    backend = "sidecar" if stress_model.backend is not None else "inprocess"
+    try:
+        return {(stress_model.version_tag, backend): 1.0}
+    except Exception:
+        return {}
+
+def _admission_load() -> Dict[Tuple[str, ...], float]:
+    from services.admission import admission_controller
+    values = {}
+    for group, limiter in admission_controller.limiters.items():
+        values[(group, "in_flight")] = float(limiter.in_flight)
+        values[(group, "queued")] = float(limiter.queued)
+    return values
+
+MODEL_INFO = registry.gauge(
+    "relaxaid_model_info", "Model version currently serving predictions (value is always 1)",
+    ("version", "backend"), callback=_model_info)
+ADMISSION_LOAD = registry.gauge(
+    "relaxaid_admission_requests", "In-flight and queued requests per admission route group",
+    ("route_group", "state"), callback=_admission_load)
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: latency dan jumlah request per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Template route (mis. /prediksi/riwayat/{user_id}) agar cardinality tetap kecil
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.labels(method, route_path).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(method, route_path, str(status_holder[0])).inc()
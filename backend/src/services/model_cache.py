@@ -0,0 +1,87 @@
+"""
+Cache payload yang hanya berubah ketika model berganti, dengan ETag dan HTTP 304
+
+Payload seperti /prediksi/model/info, /admin/model/feature-importance dan
+/admin/model/evaluation dibangun sekali per versi model (content hash), disimpan
+sebagai JSON bytes yang sudah di-encode, lalu dilayani dengan strong ETag.
+Request dengan If-None-Match yang cocok dijawab 304 tanpa body.
+"""
+import logging
+import threading
+from typing import Callable, Dict, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from services.serialization import dumps
+from services.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# Hanya cache client yang boleh menyimpan payload (route /admin/model/* butuh
+# token admin, jadi shared proxy tidak boleh), dan harus revalidasi (murah, 304)
+# sehingga model baru langsung terlihat setelah di-swap
+MODEL_PAYLOAD_CACHE_CONTROL = "private, no-cache"
+
+class ModelPayloadCache:
+    """Menyimpan satu payload ter-encode per key untuk model hash terakhir"""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[str, bytes, str]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+        self._hits = CACHE_REQUESTS.labels("model_payload", "hit")
+        self._misses = CACHE_REQUESTS.labels("model_payload", "miss")
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get_or_build(self, key: str, model_hash: str, builder: Callable[[], dict]) -> Tuple[bytes, str]:
+        """Kembalikan (body, etag); builder hanya dipanggil sekali per model hash"""
+        entry = self._entries.get(key)
+        if entry and entry[0] == model_hash:
+            self._hits.inc()
+            return entry[1], entry[2]
+
+        # Satu builder per key; request lain menunggu hasil yang sama
+        with self._lock_for(key):
+            entry = self._entries.get(key)
+            if entry and entry[0] == model_hash:
+                self._hits.inc()
+                return entry[1], entry[2]
+
+            self._misses.inc()
+            body = dumps(builder())
+            etag = f'"{key}-{model_hash[:32]}"'
+            self._entries[key] = (model_hash, body, etag)
+            logger.info(f"🗂️ Cached {key} payload for model {model_hash[:12]}")
+            return body, etag
+
+    def invalidate(self, key: str = None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+model_payload_cache = ModelPayloadCache()
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return etag in candidates or f"W/{etag}" in candidates
+
+def model_payload_response(request: Request, key: str, model_hash: str, builder: Callable[[], dict]) -> Response:
+    """Response JSON dengan ETag dari model hash; 304 jika client sudah punya versi ini"""
+    body, etag = model_payload_cache.get_or_build(key, model_hash, builder)
+    return cached_payload_response(request, body, etag)
+
+def cached_payload_response(request: Request, body: bytes, etag: str) -> Response:
+    """Response JSON ter-encode dengan ETag; 304 jika If-None-Match cocok"""
+    headers = {"ETag": etag, "Cache-Control": MODEL_PAYLOAD_CACHE_CONTROL}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
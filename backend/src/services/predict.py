@@ -4,7 +4,13 @@ Sesuai dengan spesifikasi laporan penelitian
 """
 from ml.random_forest_model import prediksi_stres_digital
 from schemas.digital_activity_schema import DigitalActivityInput, StressPredictionResponse
-from config.connection import get_connection
+from config.connection import (
+    database_breaker, DatabaseUnavailableError, StatementTimeoutError, is_connection_failure
+)
+from services.prediction_spool import prediction_spool
+from storage import get_storage
+from services.tracing import span
+from config.logging_config import sampled_fields
 from datetime import datetime, date
 import logging
 
@@ -41,16 +47,20 @@ def predict_stress_from_digital_activity(activity_data: DigitalActivityInput, us
         )
         
         # Generate rekomendasi berdasarkan hasil prediksi
-        recommendations = generate_recommendations(
-            result['predicted_label'], 
-            result['top_features'],
-            activity_data
-        )
+        with span("recommendations"):
+            recommendations = generate_recommendations(
+                result['predicted_label'], 
+                result['top_features'],
+                activity_data
+            )
         
         # Simpan hasil ke database jika user_id tersedia
         prediction_id = None
         if user_id:
             try:
+                if database_breaker.is_open:
+                    # Database sedang down: jangan menunggu connect timeout, tulis ke spool
+                    raise DatabaseUnavailableError("database circuit breaker is open")
                 prediction_id = save_prediction_to_database(
                     user_id=user_id,
                     activity_data=activity_data,
@@ -64,6 +74,9 @@ def predict_stress_from_digital_activity(activity_data: DigitalActivityInput, us
                         feature_importance=result['feature_importance'],
                         model_version=result['model_info']['version']
                     )
+            except (DatabaseUnavailableError, StatementTimeoutError) as db_error:
+                if prediction_spool.append(user_id, activity_data, result):
+                    logger.warning(f"⚠️ Database save deferred, prediction spooled for replay: {db_error}")
             except Exception as db_error:
                 logger.warning(f"⚠️ Database save failed (non-critical): {str(db_error)}")
                 # Continue without database save
@@ -76,7 +89,8 @@ def predict_stress_from_digital_activity(activity_data: DigitalActivityInput, us
             probabilities=result['probabilities'],
             top_features=result['top_features'],
             model_info=result['model_info'],
-            recommendations=recommendations
+            recommendations=recommendations,
+            prediction_id=prediction_id
         )
         
     except Exception as e:
@@ -170,131 +184,44 @@ def generate_recommendations(stress_level: str, top_features: list, activity_dat
     
     return recommendations[:10]  # Limit to 10 most relevant recommendations
 
-def save_prediction_to_database(user_id: int, activity_data: DigitalActivityInput, prediction_result: dict) -> int:
+def save_prediction_to_database(user_id: int, activity_data: DigitalActivityInput, prediction_result: dict,
+                                tanggal: date = None) -> int:
     """
-    Simpan data aktivitas digital dan hasil prediksi ke database
+    Simpan data aktivitas digital dan hasil prediksi ke storage
+    Raise DatabaseUnavailableError jika database tidak bisa dihubungi dan
+    StatementTimeoutError jika insert melewati PREDICTION_INSERT_TIMEOUT_MS
+    (keduanya untuk spool), error lain di-log dan mengembalikan None.
+    ``tanggal`` diisi saat replay spool (tanggal prediksi asli), default hari ini
     """
-    conn = None
-    cursor = None
-    
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Simpan digital activity terlebih dahulu
-        cursor.execute("""
-            INSERT INTO digital_activities (
-                user_id, tanggal, screen_time_total, durasi_pemakaian, frekuensi_penggunaan,
-                jumlah_aplikasi, notifikasi_count, durasi_tidur, durasi_makan, durasi_olahraga,
-                main_game, belajar_online, buka_sosmed, streaming, scroll_time, email_time,
-                panggilan_time, waktu_pagi, waktu_siang, waktu_sore, waktu_malam, jumlah_aktivitas
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING id
-        """, (
-            user_id, 
-            date.today(),
-            activity_data.screen_time_total, 
-            activity_data.durasi_pemakaian, 
-            activity_data.frekuensi_penggunaan,
-            activity_data.jumlah_aplikasi, 
-            activity_data.notifikasi_count, 
-            activity_data.durasi_tidur,
-            activity_data.durasi_makan, 
-            activity_data.durasi_olahraga, 
-            activity_data.main_game,
-            activity_data.belajar_online, 
-            activity_data.buka_sosmed, 
-            activity_data.streaming,
-            activity_data.scroll_time, 
-            activity_data.email_time, 
-            activity_data.panggilan_time,
-            activity_data.waktu_pagi, 
-            activity_data.waktu_siang, 
-            activity_data.waktu_sore,
-            activity_data.waktu_malam, 
-            activity_data.jumlah_aktivitas
-        ))
-        
-        digital_activity_result = cursor.fetchone()
-        if not digital_activity_result:
-            raise Exception("Failed to insert digital activity")
-            
-        digital_activity_id = digital_activity_result['id']
-        
-        # Simpan hasil prediksi
-        cursor.execute("""
-            INSERT INTO predictions (
-                user_id, digital_activity_id, predicted_stress_level, confidence_score,
-                probability_rendah, probability_sedang, probability_tinggi, model_version
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING id
-        """, (
-            user_id, 
-            digital_activity_id, 
-            prediction_result['predicted_label'],
-            prediction_result['confidence_score'],
-            prediction_result['probabilities']['Rendah'],
-            prediction_result['probabilities']['Sedang'],
-            prediction_result['probabilities']['Tinggi'],
-            prediction_result['model_info']['version']
-        ))
-        
-        prediction_result_db = cursor.fetchone()
-        if not prediction_result_db:
-            raise Exception("Failed to insert prediction")
-            
-        prediction_id = prediction_result_db['id']
-        
-        conn.commit()
-        logger.info(f"✅ Prediction saved to database: ID {prediction_id}")
+        prediction_id = get_storage().save_prediction(
+            user_id=user_id,
+            activity=activity_data,
+            prediction=prediction_result,
+            tanggal=tanggal
+        )
+        logger.info("✅ Prediction saved to database", extra=sampled_fields(prediction_id=prediction_id))
         return prediction_id
         
+    except (DatabaseUnavailableError, StatementTimeoutError):
+        raise
     except Exception as e:
-        if conn:
-            conn.rollback()
+        if is_connection_failure(e):
+            raise DatabaseUnavailableError(f"Database connection lost: {e}")
         logger.error(f"❌ Error saving prediction: {str(e)}")
         return None
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
 
 def save_feature_importance_logs(prediction_id: int, feature_importance: dict, model_version: str):
     """
-    Simpan log feature importance untuk analisis
+    Simpan log feature importance untuk analisis (satu statement untuk semua fitur)
     """
-    conn = None
-    cursor = None
-    
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Sort features by importance
-        sorted_features = sorted(feature_importance.items(), key=lambda x: x[1], reverse=True)
-        
-        for rank, (feature_name, importance_score) in enumerate(sorted_features, 1):
-            cursor.execute("""
-                INSERT INTO feature_importance_logs (
-                    prediction_id, feature_name, importance_score, rank_position, model_version
-                ) VALUES (%s, %s, %s, %s, %s)
-            """, (prediction_id, feature_name, importance_score, rank, model_version))
-        
-        conn.commit()
-        logger.info(f"✅ Feature importance logs saved for prediction {prediction_id}")
+        get_storage().save_feature_importance(prediction_id, feature_importance, model_version)
+        logger.info("✅ Feature importance logs saved", extra=sampled_fields(prediction_id=prediction_id))
         
     except Exception as e:
-        if conn:
-            conn.rollback()
         logger.error(f"❌ Error saving feature importance logs: {str(e)}")
         # Don't raise here as this is not critical for the main prediction
-        
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
 
 # Backward compatibility untuk API lama
 def prediksi_model(data_array):
@@ -363,7 +290,8 @@ def prediksi_model(data_array):
         )
         
         result = predict_stress_from_digital_activity(activity_data, user_id=1)
-        logger.info(f"✅ Legacy prediction successful: {result.predicted_label} (confidence: {result.confidence_score:.3f})")
+        logger.info("✅ Legacy prediction successful", extra=sampled_fields(
+            label=result.predicted_label, confidence=result.confidence_score))
         return result.predicted_class, result.predicted_label
         
     except Exception as e:
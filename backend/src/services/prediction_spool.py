@@ -0,0 +1,266 @@
+"""
+Spool lokal untuk hasil prediksi saat database tidak tersedia
+
+Saat circuit breaker database open (atau insert gagal karena koneksi),
+``predict_stress_from_digital_activity`` tidak menunggu database: data
+aktivitas + hasil prediksi ditulis sebagai satu baris JSON ke
+PREDICTION_SPOOL_PATH dan response langsung dikembalikan.
+
+Replay dipicu saat database pulih (listener recovery circuit breaker dan
+health prober). File di-rename ke ``.replaying`` dulu sehingga prediksi baru
+tetap bisa di-append ke spool selama replay berjalan; record yang gagal
+di-replay ditulis kembali ke spool.
+
+File spool dipakai bersama semua worker serve.py, jadi koordinasinya lewat
+``fcntl.flock`` (lock per proses saja tidak cukup):
+
+- ``<spool>.lock`` dipegang sebentar di setiap append, rename, tulis ulang
+  sisa dan hapus file ``.replaying``; append selalu membuka file lewat path
+  di bawah lock ini sehingga tidak pernah menulis ke file yang sudah di-rename.
+- ``<spool>.replay.lock`` dipegang (non-blocking) selama seluruh replay: hanya
+  satu worker yang me-replay, yang lain langsung kembali. Karena flock lepas
+  saat proses mati, file ``.replaying`` yang ditemukan pemegang lock ini
+  memang sisa replay yang terputus.
+- ``<spool>.replaying.offset`` mencatat berapa record ``.replaying`` yang
+  sudah selesai, ditulis (atomic + fsync) setelah setiap record. Replay yang
+  dilanjutkan setelah proses mati melewati record tersebut, sehingga prediksi
+  yang sudah tersimpan tidak di-insert dua kali.
+
+Jumlah pending dihitung dari isi file di disk (di-cache per ukuran/mtime),
+sehingga /health dan metrics setiap worker ikut turun setelah worker lain
+selesai replay.
+"""
+import fcntl
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date
+from typing import Optional, Tuple
+
+from config.connection import database_breaker
+from config.settings import settings
+from services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+class PredictionSpool:
+    """Append-only JSONL spool dengan replay ke database, aman dipakai bersama antar proses"""
+
+    def __init__(self, path: str, max_records: int):
+        self.path = path
+        self.max_records = max_records
+        self._write_lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        # (signature file di disk, jumlah record) dari hitungan terakhir
+        self._pending: Optional[Tuple[tuple, int]] = None
+        self.dropped = 0
+
+    @property
+    def replay_path(self) -> str:
+        return self.path + ".replaying"
+
+    @property
+    def offset_path(self) -> str:
+        return self.replay_path + ".offset"
+
+    def _read_offset(self) -> int:
+        """Jumlah record awal .replaying yang sudah selesai di-replay"""
+        try:
+            with open(self.offset_path, encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _write_offset(self, offset: int):
+        temp_path = self.offset_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.offset_path)
+
+    def _count_lines(self, path: str) -> int:
+        try:
+            with open(path, "rb") as f:
+                return sum(1 for _ in f)
+        except FileNotFoundError:
+            return 0
+
+    def _signature(self) -> tuple:
+        signature = []
+        for path in (self.path, self.replay_path, self.offset_path):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_ino, stat.st_size, stat.st_mtime_ns))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _ensure_directory(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @contextmanager
+    def _file_lock(self, suffix: str = ".lock", blocking: bool = True):
+        """flock eksklusif pada <spool><suffix>; yield False jika non-blocking dan lock dipegang proses lain"""
+        self._ensure_directory()
+        with open(self.path + suffix, "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _recount(self) -> int:
+        """Hitung ulang record di disk (pemanggil memegang _write_lock)"""
+        signature = self._signature()
+        if self._pending is None or self._pending[0] != signature:
+            replaying = max(0, self._count_lines(self.replay_path) - self._read_offset())
+            count = self._count_lines(self.path) + replaying
+            self._pending = (signature, count)
+        return self._pending[1]
+
+    def pending(self) -> int:
+        """Jumlah record yang belum tersimpan ke database (semua worker)"""
+        with self._write_lock:
+            return self._recount()
+
+    def _write(self, records: list):
+        self._ensure_directory()
+        with open(self.path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append(self, user_id: int, activity_data, prediction_result: dict) -> bool:
+        """Simpan satu prediksi ke spool; False jika spool penuh (record di-drop)"""
+        record = {
+            "user_id": user_id,
+            "tanggal": date.today().isoformat(),
+            "activity": activity_data.model_dump(mode="json"),
+            "prediction": {
+                "predicted_label": prediction_result["predicted_label"],
+                "confidence_score": prediction_result["confidence_score"],
+                "probabilities": prediction_result["probabilities"],
+                "model_info": {"version": prediction_result["model_info"]["version"]},
+                "feature_importance": prediction_result["feature_importance"],
+            },
+        }
+        with self._write_lock, self._file_lock():
+            pending = self._recount()
+            if pending >= self.max_records:
+                self.dropped += 1
+                logger.error(f"❌ Prediction spool full ({pending} records), prediction for user {user_id} dropped")
+                return False
+            self._write([record])
+            self._recount()
+        return True
+
+    def replay(self) -> int:
+        """
+        Simpan ulang record spool ke database; return jumlah record yang berhasil.
+        Berhenti (dan mengembalikan sisa record ke spool) jika database kembali down.
+        Return 0 tanpa menyentuh file jika worker lain sedang replay.
+        """
+        if not self._replay_lock.acquire(blocking=False):
+            return 0
+        try:
+            with self._file_lock(".replay.lock", blocking=False) as acquired:
+                if not acquired:
+                    return 0
+                return self._replay_locked()
+        finally:
+            with self._write_lock:
+                self._recount()
+            self._replay_lock.release()
+
+    def _replay_locked(self) -> int:
+        from config.connection import DatabaseUnavailableError, StatementTimeoutError
+        from schemas.digital_activity_schema import DigitalActivityInput
+        from services.predict import save_prediction_to_database, save_feature_importance_logs
+
+        with self._write_lock, self._file_lock():
+            # Sisa replay sebelumnya (proses mati di tengah replay) diproses lebih dulu
+            if not os.path.exists(self.replay_path):
+                if not os.path.exists(self.path):
+                    return 0
+                if os.path.exists(self.offset_path):
+                    os.remove(self.offset_path)
+                os.replace(self.path, self.replay_path)
+
+        with open(self.replay_path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        offset = self._read_offset()
+        if offset:
+            logger.info(f"🔁 Resuming interrupted spool replay after {offset} records")
+
+        replayed = 0
+        remaining = []
+        for index in range(offset, len(records)):
+            record = records[index]
+            try:
+                activity_data = DigitalActivityInput(**record["activity"])
+                prediction_id = save_prediction_to_database(
+                    user_id=record["user_id"],
+                    activity_data=activity_data,
+                    prediction_result=record["prediction"],
+                    tanggal=date.fromisoformat(record["tanggal"])
+                )
+            except (DatabaseUnavailableError, StatementTimeoutError) as e:
+                logger.warning(f"⚠️ Spool replay interrupted, database unavailable: {e}")
+                remaining = records[index:]
+                break
+            if prediction_id is None:
+                # Error non-koneksi (data tidak valid, constraint): jangan diulang terus
+                logger.error(f"❌ Spooled prediction for user {record['user_id']} could not be saved, skipped")
+            else:
+                save_feature_importance_logs(
+                    prediction_id=prediction_id,
+                    feature_importance=record["prediction"]["feature_importance"],
+                    model_version=record["prediction"]["model_info"]["version"]
+                )
+                replayed += 1
+            self._write_offset(index + 1)
+
+        with self._write_lock, self._file_lock():
+            if remaining:
+                self._write(remaining)
+            os.remove(self.replay_path)
+            if os.path.exists(self.offset_path):
+                os.remove(self.offset_path)
+
+        if replayed:
+            logger.info(f"✅ Replayed {replayed} spooled predictions ({len(remaining)} still pending)")
+        return replayed
+
+    def replay_async(self):
+        """Jalankan replay di thread background jika ada record pending"""
+        if self._replay_lock.locked() or not self.pending():
+            return
+
+        def run():
+            try:
+                self.replay()
+            except Exception as e:
+                logger.error(f"❌ Prediction spool replay failed: {e}")
+
+        threading.Thread(target=run, name="prediction-spool-replay", daemon=True).start()
+
+    def status(self) -> dict:
+        return {"pending": self.pending(), "dropped": self.dropped, "replaying": self._replay_lock.locked()}
+
+prediction_spool = PredictionSpool(settings.PREDICTION_SPOOL_PATH, settings.PREDICTION_SPOOL_MAX_RECORDS)
+database_breaker.on_recovery(prediction_spool.replay_async)
+
+registry.gauge(
+    "relaxaid_prediction_spool_pending", "Predictions waiting in the local spool for database replay",
+    callback=lambda: {(): float(prediction_spool.pending())}
+)
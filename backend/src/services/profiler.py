@@ -0,0 +1,179 @@
+"""
+Sampling profiler in-process yang dipicu admin (tanpa dependency tambahan)
+
+Thread sampler mengambil stack semua thread lewat ``sys._current_frames()``
+setiap PROFILER_INTERVAL_MS, lalu menggabungkan stack yang sama ke format
+collapsed (satu baris per stack: ``frame;frame;frame count``) yang bisa
+langsung dibaca flamegraph.pl, speedscope atau inferno.
+
+Aman dipakai saat ada beban:
+- hanya satu capture per worker (capture kedua ditolak, bukan mengantre)
+- durasi dibatasi PROFILER_MAX_SECONDS
+- sampler hanya membaca frame, tidak memasang trace/profile hook sehingga
+  thread request tidak melambat; biayanya satu walk stack per interval
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Leaf frame thread yang sedang menunggu (idle worker threadpool, event loop, dll.)
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("socket.py", "accept"),
+    ("thread.py", "_worker"),
+}
+
+class ProfilerBusyError(Exception):
+    """Capture lain sedang berjalan di worker ini"""
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def _collapse(frame) -> tuple:
+    """Stack dari root ke leaf sebagai tuple label"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return tuple(labels)
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+
+class ProfileResult:
+    """Hasil satu capture: stack collapsed + metadata"""
+
+    def __init__(self, stacks: Counter, started_at: datetime, duration: float,
+                 interval: float, samples: int, include_idle: bool):
+        self.stacks = stacks
+        self.started_at = started_at
+        self.duration = duration
+        self.interval = interval
+        self.samples = samples
+        self.include_idle = include_idle
+        self.path = None
+
+    def collapsed(self) -> str:
+        lines = [f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def summary(self) -> dict:
+        leaf_counts = Counter()
+        for stack, count in self.stacks.items():
+            leaf_counts[stack[-1]] += count
+        total = sum(self.stacks.values()) or 1
+        return {
+            "pid": os.getpid(),
+            "started_at": self.started_at.isoformat(),
+            "duration_seconds": round(self.duration, 3),
+            "interval_ms": self.interval * 1000,
+            "sampling_rounds": self.samples,
+            "stack_samples": sum(self.stacks.values()),
+            "unique_stacks": len(self.stacks),
+            "include_idle": self.include_idle,
+            "top_leaf_frames": [
+                {"frame": frame, "samples": count, "percentage": round(count / total * 100, 2)}
+                for frame, count in leaf_counts.most_common(15)
+            ],
+            "stored_at": self.path
+        }
+
+class SamplingProfiler:
+    """Satu capture pada satu waktu per proses"""
+
+    def __init__(self, max_seconds: float, output_dir: str = ""):
+        self.max_seconds = max_seconds
+        self.output_dir = output_dir
+        self._capture_lock = threading.Lock()
+        self.last_result: Optional[ProfileResult] = None
+
+    @property
+    def running(self) -> bool:
+        return self._capture_lock.locked()
+
+    def capture(self, seconds: float, interval_ms: float = None, include_idle: bool = False) -> ProfileResult:
+        """Sampling selama ``seconds`` (dipotong ke max_seconds) di thread pemanggil"""
+        if not self._capture_lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profiler capture is already running in this worker")
+        try:
+            return self._run(seconds, interval_ms, include_idle)
+        finally:
+            self._capture_lock.release()
+
+    def start_background(self, seconds: float, interval_ms: float = None, include_idle: bool = False):
+        """Jalankan capture di thread terpisah; hasil tersedia di last_result"""
+        if not self._capture_lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profiler capture is already running in this worker")
+
+        def run():
+            try:
+                self._run(seconds, interval_ms, include_idle)
+            except Exception as e:
+                logger.error(f"❌ Profiler capture failed: {e}")
+            finally:
+                self._capture_lock.release()
+
+        threading.Thread(target=run, name="profiler-capture", daemon=True).start()
+
+    def _run(self, seconds: float, interval_ms: float, include_idle: bool) -> ProfileResult:
+        duration = max(0.1, min(float(seconds), self.max_seconds))
+        interval = max(1.0, interval_ms or settings.PROFILER_INTERVAL_MS) / 1000.0
+        own_thread = threading.get_ident()
+        stacks = Counter()
+        rounds = 0
+
+        logger.info(f"🔍 Profiler capture started: {duration:.1f}s @ {interval * 1000:.0f}ms")
+        started_at = datetime.now()
+        start = time.perf_counter()
+        deadline = start + duration
+        next_tick = start
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                if not include_idle and _is_idle(frame):
+                    continue
+                stacks[_collapse(frame)] += 1
+            rounds += 1
+            # Jadwal tetap (bukan sleep(interval)) agar waktu walk stack tidak menggeser rate
+            next_tick += interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(min(delay, max(0.0, deadline - time.perf_counter())))
+            else:
+                next_tick = time.perf_counter()
+
+        result = ProfileResult(stacks, started_at, time.perf_counter() - start, interval, rounds, include_idle)
+        if self.output_dir:
+            result.path = self._store(result)
+        self.last_result = result
+        logger.info(f"✅ Profiler capture finished: {rounds} rounds, {len(stacks)} unique stacks")
+        return result
+
+    def _store(self, result: ProfileResult) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        filename = f"profile-{os.getpid()}-{result.started_at.strftime('%Y%m%d-%H%M%S')}.collapsed"
+        path = os.path.join(self.output_dir, filename)
+        with open(path, "w") as f:
+            f.write(result.collapsed())
+        return path
+
+profiler = SamplingProfiler(settings.PROFILER_MAX_SECONDS, settings.PROFILER_OUTPUT_DIR)
@@ -0,0 +1,93 @@
+"""
+Statement timeout PostgreSQL per route group
+
+Setiap koneksi yang dibuka ``get_connection()`` membawa
+``options='-c statement_timeout=<ms>'`` sesuai route group request yang sedang
+berjalan (lihat ``route_group_for_path`` di services/admission.py), sehingga
+satu query analytics berat tidak bisa menahan koneksi dan CPU database
+berjam-jam. Route group disimpan di contextvar oleh ``QueryDeadlineMiddleware``
+dan ikut terbawa ke threadpool endpoint sync.
+
+Statement yang dibatalkan PostgreSQL (QueryCanceled) diubah menjadi
+``StatementTimeoutError`` oleh cursor dan dijawab 503 + Retry-After dengan
+hint untuk mengulang dengan rentang data yang lebih kecil.
+
+Format STATEMENT_TIMEOUTS: "group=ms,...,default=ms" (0 = tanpa batas)
+"""
+import contextvars
+from typing import Dict, Optional
+
+from fastapi.responses import JSONResponse
+
+from config.settings import settings
+from services.admission import route_group_for_path
+
+_route_group: contextvars.ContextVar = contextvars.ContextVar("route_group", default=None)
+
+def parse_statement_timeouts(spec: str) -> Dict[str, int]:
+    """Parse "prediction=2000,admin_analytics=15000,default=10000" menjadi {group: ms}"""
+    timeouts = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        group, value = item.split("=")
+        timeouts[group.strip()] = int(value)
+    return timeouts
+
+STATEMENT_TIMEOUTS = parse_statement_timeouts(settings.STATEMENT_TIMEOUTS)
+
+def current_route_group() -> Optional[str]:
+    return _route_group.get()
+
+def statement_timeout_ms(override: Optional[int] = None) -> int:
+    """Timeout untuk koneksi berikutnya: override > route group > default"""
+    if override is not None:
+        return override
+    group = _route_group.get()
+    if group in STATEMENT_TIMEOUTS:
+        return STATEMENT_TIMEOUTS[group]
+    return STATEMENT_TIMEOUTS.get("default", 0)
+
+class QueryDeadlineMiddleware:
+    """Pure ASGI middleware: simpan route group request di contextvar"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = _route_group.set(route_group_for_path(scope["path"]))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _route_group.reset(token)
+
+def _narrower_params(query_params) -> dict:
+    """Saran parameter untuk request ulang yang lebih sempit: rentang hari / limit dibagi empat"""
+    hint = {}
+    for name in ("days", "limit"):
+        value = query_params.get(name)
+        if value is not None and value.isdigit() and int(value) > 1:
+            hint[name] = max(1, int(value) // 4)
+    return hint
+
+async def statement_timeout_handler(request, exc) -> JSONResponse:
+    """Exception handler untuk StatementTimeoutError (didaftarkan di main.py)"""
+    retry_with = _narrower_params(request.query_params)
+    hint = "Query melebihi batas waktu; coba lagi dengan rentang data yang lebih kecil"
+    if not retry_with:
+        hint = "Query melebihi batas waktu; coba lagi beberapa saat lagi"
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)},
+        content={
+            "detail": "Database query timed out",
+            "route_group": exc.route_group,
+            "statement": exc.label,
+            "timeout_ms": exc.timeout_ms,
+            "hint": hint,
+            "retry_with": retry_with,
+        }
+    )
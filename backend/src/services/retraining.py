@@ -0,0 +1,511 @@
+"""
+Pipeline retraining model di background (POST /admin/model/retrain)
+
+Tahapan satu run:
+
+1. load      baris berlabel (predictions.actual_stress_level + digital_activities)
+             di-stream lewat server-side cursor ke array float32 yang
+             dialokasikan sekali (storage.load_labeled_activities)
+2. train     forest dilatih di proses terpisah (spawn) dengan RETRAIN_N_JOBS
+             core, sehingga worker API tidak ikut menanggung CPU/GIL training.
+             Pohon ditambah bertahap (warm_start) agar progres bisa dilaporkan;
+             hasilnya identik dengan fit sekaligus
+3. evaluate  kandidat dan model aktif dinilai pada holdout stratified yang sama
+             dan pada holdout tetap berversi
+4. artifact  kandidat disimpan sebagai artifact berversi di MODEL_ARTIFACT_DIR
+5. promote   hanya jika F1 macro kandidat > model aktif + RETRAIN_MIN_IMPROVEMENT
+             dan akurasinya tidak turun, serta F1 macro pada holdout tetap
+             (ml/holdout.py) tidak turun lebih dari RETRAIN_HOLDOUT_TOLERANCE;
+             model global di-swap dan MODEL_ARTIFACT_PATH (jika diisi)
+             ditimpa agar restart memakai model baru
+
+Hanya satu run per host (file lock di MODEL_ARTIFACT_DIR); run yang sedang
+berjalan bisa dibatalkan di setiap tahap, proses training di-terminate.
+
+Di bawah serve.py setiap request admin bisa dijawab worker mana saja, jadi
+state run dibagi lewat file di MODEL_ARTIFACT_DIR, di samping ``.retrain.lock``:
+
+- ``.retrain-status.json``  status run terakhir (ditulis atomik oleh worker
+                            yang menjalankan run, termasuk pid-nya); GET dari
+                            worker lain membaca file ini
+- ``.retrain-cancel``       job id yang diminta berhenti; DELETE dari worker
+                            lain menulis file ini, run memeriksanya di setiap
+                            batch load dan setiap poll proses training
+- ``.promoted.json``        marker promosi (ml/random_forest_model.py); setiap
+                            worker memuat artifact yang dipromosikan lewat
+                            PromotionWatcher sehingga semua worker melayani
+                            model dan ETag yang sama
+"""
+import fcntl
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import uuid
+import warnings
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("load", "train", "evaluate", "artifact", "promote")
+STATUS_FILE = ".retrain-status.json"
+CANCEL_FILE = ".retrain-cancel"
+# Jeda minimum antar penulisan status progres (detik)
+STATUS_WRITE_INTERVAL = 0.5
+# Jumlah pohon yang ditambahkan per langkah warm_start (granularitas progres)
+TREES_PER_STEP = 25
+
+class RetrainBusyError(Exception):
+    """Run retraining lain sedang berjalan"""
+
+class RetrainCancelled(Exception):
+    """Run dibatalkan admin"""
+
+class RetrainJob:
+    """Status satu run retraining"""
+
+    def __init__(self, n_jobs: int, promote: bool, state_dir: str = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.state_dir = state_dir
+        self.pid = os.getpid()
+        self._saved_at = 0.0
+        self.n_jobs = n_jobs
+        self.promote = promote
+        self.status = "running"
+        self.stage = None
+        self.stage_progress = 0.0
+        self.message = None
+        self.started_at = datetime.now()
+        self.finished_at = None
+        self.stage_seconds = {}
+        self.rows = {}
+        self.metrics = {}
+        self.artifact_path = None
+        self.promoted = False
+        self.cancel_event = threading.Event()
+
+    def enter(self, stage: str):
+        self.stage = stage
+        self.stage_progress = 0.0
+        self.save(force=True)
+        logger.info(f"🔁 Retrain {self.id}: {stage}")
+
+    def report(self, stage_progress: float):
+        self.stage_progress = stage_progress
+        self.save()
+
+    def save(self, force: bool = False):
+        """Tulis status ke STATUS_FILE agar worker lain bisa membacanya (dibatasi STATUS_WRITE_INTERVAL)"""
+        if not self.state_dir:
+            return
+        now = time.monotonic()
+        if not force and now - self._saved_at < STATUS_WRITE_INTERVAL:
+            return
+        self._saved_at = now
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.state_dir, suffix=".json.tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.to_dict(), f, default=str)
+            os.replace(tmp_path, os.path.join(self.state_dir, STATUS_FILE))
+        except OSError as e:
+            logger.warning(f"⚠️ Could not write retrain status: {e}")
+
+    def cancel_requested(self) -> bool:
+        """Pembatalan dari worker ini (event) atau dari worker lain (CANCEL_FILE berisi job id ini)"""
+        if not self.cancel_event.is_set() and self.state_dir:
+            try:
+                with open(os.path.join(self.state_dir, CANCEL_FILE)) as f:
+                    if f.read().strip() == self.id:
+                        self.cancel_event.set()
+            except FileNotFoundError:
+                pass
+        return self.cancel_event.is_set()
+
+    def check_cancelled(self):
+        if self.cancel_requested():
+            raise RetrainCancelled("Retraining cancelled")
+
+    @property
+    def progress(self) -> float:
+        if self.status == "succeeded":
+            return 1.0
+        if self.stage is None:
+            return 0.0
+        return (STAGES.index(self.stage) + self.stage_progress) / len(STAGES)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "stage_progress": round(self.stage_progress, 3),
+            "progress": round(self.progress, 3),
+            "message": self.message,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "stage_seconds": {stage: round(seconds, 3) for stage, seconds in self.stage_seconds.items()},
+            "n_jobs": self.n_jobs,
+            "rows": self.rows,
+            "metrics": self.metrics,
+            "artifact_path": self.artifact_path,
+            "promote_requested": self.promote,
+            "promoted": self.promoted,
+            "pid": self.pid,
+        }
+
+def _train_candidate(X_path: str, y_path: str, feature_names: list, n_jobs: int, output_path: str, progress):
+    """Entry point proses training (spawn): fit scaler + forest, simpan ke output_path"""
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(limits=max(1, n_jobs))
+
+    import joblib
+    import pandas as pd
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+    from ml.random_forest_model import FOREST_PARAMS
+
+    X = pd.DataFrame(np.load(X_path, mmap_mode="r"), columns=feature_names)
+    # Label float sama seperti model awal (classes_ 0.0/1.0/2.0)
+    y = np.load(y_path).astype(np.float64)
+
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    # Data sama di setiap langkah, jadi peringatan class_weight + warm_start tidak berlaku
+    warnings.filterwarnings("ignore", message=".*not recommended for warm_start.*")
+    total_trees = FOREST_PARAMS["n_estimators"]
+    model = RandomForestClassifier(**dict(FOREST_PARAMS, oob_score=False), n_jobs=n_jobs, warm_start=True)
+    for n_trees in range(TREES_PER_STEP, total_trees + TREES_PER_STEP, TREES_PER_STEP):
+        n_trees = min(n_trees, total_trees)
+        # OOB dihitung sekali di langkah terakhir atas seluruh pohon
+        model.set_params(n_estimators=n_trees, oob_score=FOREST_PARAMS["oob_score"] and n_trees == total_trees)
+        model.fit(X_scaled, y)
+        progress.value = n_trees / total_trees
+    model.set_params(warm_start=False)
+
+    joblib.dump({"model": model, "scaler": scaler, "training_labels": y.astype(np.int8)}, output_path)
+
+def holdout_metrics(model, scaler, feature_names: list, X: np.ndarray, y: np.ndarray) -> dict:
+    """Akurasi, F1 macro dan underestimation rate pada holdout"""
+    import pandas as pd
+    from sklearn.metrics import accuracy_score, f1_score
+
+    X_scaled = scaler.transform(pd.DataFrame(X, columns=feature_names)) if scaler is not None else X
+    probabilities = model.predict_proba(X_scaled)
+    y_pred = np.asarray(model.classes_)[probabilities.argmax(axis=1)].astype(int)
+    y_true = y.astype(int)
+    return {
+        "accuracy": float(accuracy_score(y_true, y_pred)),
+        "f1_macro": float(f1_score(y_true, y_pred, average="macro")),
+        "underestimation_rate": float(np.mean(y_pred < y_true)),
+        "average_confidence": float(probabilities.max(axis=1).mean()),
+    }
+
+def oob_metrics(model, training_labels) -> Optional[dict]:
+    """Akurasi, F1 macro dan underestimation rate out-of-bag (tanpa prediksi ulang)"""
+    from ml.model_evaluator import StressModelEvaluator
+    results = StressModelEvaluator(model).evaluate_oob(training_labels)
+    if "error" in results:
+        return None
+    return {
+        "accuracy": results["accuracy"],
+        "f1_macro": results["f1_macro"],
+        "underestimation_rate": results["clinical_metrics"]["underestimation_rate"],
+    }
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class RetrainPipeline:
+    """
+    Satu run retraining per host; status run terakhir di memori worker yang
+    menjalankannya dan di STATUS_FILE untuk worker lain
+    """
+
+    def __init__(self, artifact_dir: str):
+        self.artifact_dir = artifact_dir
+        self._run_lock = threading.Lock()
+        self._lock_file = None
+        self.job: Optional[RetrainJob] = None
+        self._process = None
+
+    def _state_path(self, name: str) -> str:
+        return os.path.join(self.artifact_dir, name)
+
+    def _shared_status(self) -> Optional[dict]:
+        """Status terakhir dari STATUS_FILE; run 'running' milik proses yang sudah mati dilaporkan gagal"""
+        try:
+            with open(self._state_path(STATUS_FILE)) as f:
+                status = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if status.get("status") == "running" and not _process_alive(status.get("pid", 0)):
+            status["status"] = "failed"
+            status["message"] = f"Worker {status.get('pid')} exited during retraining"
+        return status
+
+    @property
+    def running(self) -> bool:
+        if self._run_lock.locked():
+            return True
+        status = self._shared_status()
+        return status is not None and status["status"] == "running"
+
+    def _acquire_host_lock(self):
+        """File lock lintas worker di host yang sama"""
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        lock_file = open(self._state_path(".retrain.lock"), "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise RetrainBusyError("A retraining run is already in progress on this host")
+        self._lock_file = lock_file
+
+    def _release_host_lock(self):
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _clear_cancel_request(self):
+        try:
+            os.remove(self._state_path(CANCEL_FILE))
+        except FileNotFoundError:
+            pass
+
+    def start(self, n_jobs: int = None, promote: bool = True) -> RetrainJob:
+        """Mulai run di thread background; RetrainBusyError jika masih ada run lain"""
+        if not self._run_lock.acquire(blocking=False):
+            raise RetrainBusyError("A retraining run is already in progress in this worker")
+        try:
+            self._acquire_host_lock()
+        except Exception:
+            self._run_lock.release()
+            raise
+
+        self._clear_cancel_request()
+        job = RetrainJob(n_jobs or settings.RETRAIN_N_JOBS, promote, state_dir=self.artifact_dir)
+        self.job = job
+        job.save(force=True)
+
+        def run():
+            try:
+                self._run(job)
+                job.status = "succeeded"
+            except RetrainCancelled as e:
+                job.status = "cancelled"
+                job.message = str(e)
+                logger.warning(f"⚠️ Retrain {job.id} cancelled during {job.stage}")
+            except Exception as e:
+                job.status = "failed"
+                job.message = str(e)
+                logger.error(f"❌ Retrain {job.id} failed during {job.stage}: {e}")
+            finally:
+                job.finished_at = datetime.now()
+                job.save(force=True)
+                self._clear_cancel_request()
+                self._release_host_lock()
+                self._run_lock.release()
+
+        threading.Thread(target=run, name="model-retrain", daemon=True).start()
+        return job
+
+    def cancel(self) -> Optional[str]:
+        """
+        Minta run berjalan berhenti (di worker mana pun); return job id, atau
+        None jika tidak ada run
+        """
+        job = self.job
+        if job is not None and self._run_lock.locked():
+            job.cancel_event.set()
+            process = self._process
+            if process is not None and process.is_alive():
+                process.terminate()
+            return job.id
+
+        status = self._shared_status()
+        if status is None or status["status"] != "running":
+            return None
+        # Run milik worker lain: diperiksa oleh run itu di check_cancelled / poll training
+        fd, tmp_path = tempfile.mkstemp(dir=self.artifact_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(status["job_id"])
+        os.replace(tmp_path, self._state_path(CANCEL_FILE))
+        return status["job_id"]
+
+    def status(self) -> Optional[dict]:
+        """Status run terakhir di host (run di worker ini diambil langsung dari memori)"""
+        if self.job is not None and self._run_lock.locked():
+            return self.job.to_dict()
+        shared = self._shared_status()
+        if shared is not None:
+            return shared
+        return self.job.to_dict() if self.job else None
+
+    def _timed(self, job: RetrainJob, stage: str, fn, *args):
+        job.check_cancelled()
+        job.enter(stage)
+        start = time.perf_counter()
+        try:
+            return fn(job, *args)
+        finally:
+            job.stage_seconds[stage] = time.perf_counter() - start
+
+    def _run(self, job: RetrainJob):
+        from ml.random_forest_model import get_stress_model
+        incumbent = get_stress_model()
+        if incumbent.model is None:
+            raise RuntimeError("Retraining requires the in-process inference backend")
+        feature_names = list(incumbent.feature_names)
+
+        X, y = self._timed(job, "load", self._load, feature_names)
+        X_train, X_holdout, y_train, y_holdout = self._split(X, y)
+        job.rows = {"labeled": int(len(y)), "train": int(len(y_train)), "holdout": int(len(y_holdout)),
+                    "class_counts": {label: int(np.sum(y == index)) for index, label in incumbent.stress_labels.items()}}
+
+        candidate = self._timed(job, "train", self._train, feature_names, X_train, y_train)
+        beats = self._timed(job, "evaluate", self._evaluate, incumbent, candidate, feature_names, X_holdout, y_holdout)
+        self._timed(job, "artifact", self._write_artifact, candidate, incumbent)
+        self._timed(job, "promote", self._promote, candidate, beats)
+
+    def _load(self, job: RetrainJob, feature_names: list):
+        from storage import get_storage
+
+        def on_batch(loaded: int, total: int):
+            job.report(loaded / total if total else 1.0)
+            job.check_cancelled()
+
+        X, y = get_storage().load_labeled_activities(
+            feature_names, batch_size=settings.RETRAIN_FETCH_SIZE,
+            statement_timeout=settings.RETRAIN_QUERY_TIMEOUT_MS, on_batch=on_batch
+        )
+        if len(y) < settings.RETRAIN_MIN_ROWS:
+            raise ValueError(f"Not enough labeled rows: {len(y)} < RETRAIN_MIN_ROWS ({settings.RETRAIN_MIN_ROWS})")
+        return X, y
+
+    def _split(self, X: np.ndarray, y: np.ndarray):
+        from sklearn.model_selection import train_test_split
+        counts = np.bincount(y.astype(int), minlength=3)
+        if np.any(counts < 2):
+            raise ValueError(f"Every stress level needs at least 2 labeled rows, got {counts.tolist()}")
+        return train_test_split(X, y, test_size=settings.RETRAIN_HOLDOUT_FRACTION, stratify=y, random_state=42)
+
+    def _train(self, job: RetrainJob, feature_names: list, X_train: np.ndarray, y_train: np.ndarray):
+        import joblib
+        context = multiprocessing.get_context("spawn")
+        progress = context.Value("d", 0.0)
+        with tempfile.TemporaryDirectory(prefix="relaxaid-retrain-") as work_dir:
+            X_path = os.path.join(work_dir, "X.npy")
+            y_path = os.path.join(work_dir, "y.npy")
+            output_path = os.path.join(work_dir, "candidate.joblib")
+            np.save(X_path, X_train)
+            np.save(y_path, y_train)
+
+            process = context.Process(
+                target=_train_candidate, name="model-retrain-fit",
+                args=(X_path, y_path, feature_names, job.n_jobs, output_path, progress)
+            )
+            process.start()
+            self._process = process
+            try:
+                while process.is_alive():
+                    process.join(0.5)
+                    job.report(progress.value)
+                    if job.cancel_requested():
+                        process.terminate()
+                        process.join()
+                job.check_cancelled()
+                if process.exitcode != 0:
+                    raise RuntimeError(f"Training process exited with code {process.exitcode}")
+            finally:
+                self._process = None
+            return joblib.load(output_path)
+
+    def _evaluate(self, job: RetrainJob, incumbent, candidate: dict, feature_names: list,
+                  X_holdout: np.ndarray, y_holdout: np.ndarray) -> bool:
+        from ml.holdout import load_holdout
+        current = holdout_metrics(incumbent.model, incumbent.scaler, feature_names, X_holdout, y_holdout)
+        new = holdout_metrics(candidate["model"], candidate["scaler"], feature_names, X_holdout, y_holdout)
+        job.stage_progress = 0.5
+        # Regression guard pada holdout tetap berversi (sama untuk semua run dan model)
+        fixed = load_holdout(feature_names)
+        current_fixed = holdout_metrics(incumbent.model, incumbent.scaler, feature_names, fixed.X, fixed.y)
+        new_fixed = holdout_metrics(candidate["model"], candidate["scaler"], feature_names, fixed.X, fixed.y)
+        beats = (new["f1_macro"] > current["f1_macro"] + settings.RETRAIN_MIN_IMPROVEMENT
+                 and new["accuracy"] >= current["accuracy"]
+                 and new_fixed["f1_macro"] >= current_fixed["f1_macro"] - settings.RETRAIN_HOLDOUT_TOLERANCE)
+        job.metrics = {
+            "candidate": dict(new, oob_score=float(getattr(candidate["model"], "oob_score_", 0.0)),
+                              oob=oob_metrics(candidate["model"], candidate.get("training_labels"))),
+            "incumbent": current,
+            "fixed_holdout": {
+                "version": fixed.version,
+                "content_hash": fixed.content_hash,
+                "candidate": new_fixed,
+                "incumbent": current_fixed,
+                "tolerance": settings.RETRAIN_HOLDOUT_TOLERANCE,
+            },
+            "min_improvement": settings.RETRAIN_MIN_IMPROVEMENT,
+            "candidate_beats_incumbent": beats,
+        }
+        logger.info(f"📊 Retrain {job.id}: candidate F1 {new['f1_macro']:.3f} / acc {new['accuracy']:.3f}, "
+                    f"incumbent F1 {current['f1_macro']:.3f} / acc {current['accuracy']:.3f}; "
+                    f"fixed holdout {fixed.version} F1 {new_fixed['f1_macro']:.3f} vs {current_fixed['f1_macro']:.3f}")
+        return beats
+
+    def _candidate_model(self, candidate: dict):
+        from config.threads import inference_n_jobs
+        from ml.random_forest_model import StressPredictionModel
+        model = StressPredictionModel(autoload=False)
+        model.model = candidate["model"]
+        model.scaler = candidate["scaler"]
+        model.training_labels = candidate.get("training_labels")
+        model.model.n_jobs = inference_n_jobs()
+        return model
+
+    def _write_artifact(self, job: RetrainJob, candidate: dict, incumbent):
+        model = self._candidate_model(candidate)
+        candidate["instance"] = model
+        filename = f"stress-model-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{model.content_hash[:12]}.joblib"
+        job.artifact_path = os.path.join(self.artifact_dir, filename)
+        model.save_artifact(job.artifact_path, metadata={
+            "retrain_job": job.id,
+            "metrics": job.metrics,
+            "rows": job.rows,
+            "parent_model": incumbent.content_hash,
+        })
+
+    def _promote(self, job: RetrainJob, candidate: dict, beats: bool):
+        from ml.random_forest_model import publish_promotion, set_stress_model
+        if not beats:
+            job.message = "Candidate did not beat the active model; artifact kept, not promoted"
+            return
+        if not job.promote:
+            job.message = "Candidate beats the active model; promotion skipped (promote=false)"
+            return
+        model = candidate["instance"]
+        if settings.MODEL_ARTIFACT_PATH:
+            model.save_artifact(settings.MODEL_ARTIFACT_PATH, metadata={"retrain_job": job.id, "metrics": job.metrics})
+        set_stress_model(model)
+        # Worker lain memuat artifact yang sama lewat PromotionWatcher
+        publish_promotion(model, job.artifact_path, directory=self.artifact_dir, job_id=job.id)
+        job.promoted = True
+        job.message = f"Promoted model {model.version_tag}"
+        logger.info(f"🚀 Retrain {job.id}: promoted {model.version_tag}")
+
+retrain_pipeline = RetrainPipeline(settings.MODEL_ARTIFACT_DIR)
@@ -0,0 +1,49 @@
+"""
+Response classes untuk serialisasi JSON cepat di endpoint yang sering dipanggil
+
+FastAPI secara default menjalankan setiap dict hasil endpoint melalui
+``jsonable_encoder`` lalu ``json.dumps``. Untuk endpoint prediksi dan analytics
+payload di-encode langsung:
+
+- ``ModelJSONResponse``: pydantic model yang sudah tervalidasi di-serialize
+  langsung oleh serializer pydantic-core (tanpa model_dump ke dict)
+- ``FastJSONResponse``: dict berisi tipe JSON native di-encode dengan orjson
+"""
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def _default(obj: Any):
+    """Fallback untuk tipe yang tidak didukung orjson (Decimal dari AVG PostgreSQL, dll.)"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dumps(content: Any) -> bytes:
+    """Encode payload ke JSON bytes dengan orjson"""
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+class FastJSONResponse(Response):
+    """JSON response untuk dict/list yang di-encode dengan orjson"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+class ModelJSONResponse(Response):
+    """JSON response untuk pydantic model yang sudah tervalidasi"""
+
+    media_type = "application/json"
+
+    def render(self, content: BaseModel) -> bytes:
+        return content.__pydantic_serializer__.to_json(content)
@@ -0,0 +1,269 @@
+"""
+Slow-query log dan deteksi pola N+1
+
+Cursor di config/connection.py mengukur setiap statement; statement yang lebih
+lambat dari SLOW_QUERY_MS diteruskan ke ``slow_query_log``:
+
+- SQL dinormalisasi (literal -> ``?``, whitespace dirapatkan) sehingga query
+  yang sama dengan parameter berbeda teragregasi jadi satu entri
+- di-log satu baris WARNING dengan durasi, SQL ternormalisasi, bentuk parameter
+  (tipe dan jumlah, bukan nilainya) dan route request
+- untuk sebagian statement (SLOW_QUERY_EXPLAIN_SAMPLE_RATE, default 0 =
+  opt-in) plan diambil di koneksi yang sama. EXPLAIN ANALYZE menjalankan ulang
+  query, jadi hanya dipakai untuk SELECT/WITH murni: statement yang memuat
+  INSERT/UPDATE/DELETE/MERGE di mana pun (termasuk CTE yang mengubah data dan
+  SELECT ... FOR UPDATE) hanya mendapat EXPLAIN tanpa ANALYZE, yang tidak
+  mengeksekusi query. EXPLAIN dijalankan di dalam SAVEPOINT sehingga kegagalan
+  (mis. statement_timeout) tidak membuat transaksi request ter-abort
+
+Di akhir request, TracingMiddleware menyerahkan jumlah statement per label.
+Request dengan DB_STATEMENTS_PER_REQUEST_WARN statement atau lebih (mis. loop
+19 INSERT feature_importance_logs) dicatat sebagai kandidat N+1.
+
+Agregat top-N dibaca admin lewat GET /admin/system/slow-queries.
+"""
+import logging
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Batas entri agregat agar SQL dinamis tidak membuat memori tumbuh tanpa batas
+MAX_TRACKED_STATEMENTS = 500
+MAX_PLAN_CHARS = 8000
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s")
+_WHITESPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_normalized_cache: Dict[str, str] = {}
+# Dicari di SQL ternormalisasi (literal string sudah jadi ``?``)
+_DATA_MODIFYING = re.compile(r"\b(?:INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+# Statement yang bisa di-EXPLAIN tanpa ANALYZE
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "MERGE", "VALUES")
+
+def normalize_sql(query) -> str:
+    """SQL dengan literal/placeholder diganti ``?`` dan whitespace dirapatkan"""
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    normalized = _normalized_cache.get(query)
+    if normalized is None:
+        normalized = _STRING_LITERAL.sub("?", query)
+        normalized = _PLACEHOLDER.sub("?", normalized)
+        normalized = _NUMBER_LITERAL.sub("?", normalized)
+        normalized = _WHITESPACE.sub(" ", normalized).strip()
+        normalized = _IN_LIST.sub("(?...)", normalized)
+        if len(_normalized_cache) < 1024:
+            _normalized_cache[query] = normalized
+    return normalized
+
+def params_shape(params) -> str:
+    """Bentuk parameter tanpa nilainya: "tuple[3]: int, date, str" """
+    if params is None:
+        return "none"
+    if isinstance(params, dict):
+        return "dict[" + ", ".join(f"{key}: {type(value).__name__}" for key, value in params.items()) + "]"
+    try:
+        types = [type(value).__name__ for value in params]
+    except TypeError:
+        return type(params).__name__
+    # Rapatkan tipe berurutan yang sama: "float x12"
+    runs = []
+    for name in types:
+        if runs and runs[-1][0] == name:
+            runs[-1][1] += 1
+        else:
+            runs.append([name, 1])
+    body = ", ".join(name if count == 1 else f"{name} x{count}" for name, count in runs)
+    return f"{type(params).__name__}[{len(types)}]: {body}"
+
+def explain_options(statement: str) -> Optional[str]:
+    """
+    Opsi EXPLAIN untuk SQL ternormalisasi: "ANALYZE, BUFFERS" hanya untuk
+    SELECT/WITH tanpa operasi tulis, "COSTS" (tanpa eksekusi) untuk statement
+    lain yang bisa di-explain, None jika tidak bisa di-explain
+    """
+    verb = statement.split(" ", 1)[0].upper()
+    if verb not in _EXPLAINABLE:
+        return None
+    if verb in ("SELECT", "WITH") and not _DATA_MODIFYING.search(statement):
+        return "ANALYZE, BUFFERS"
+    return "COSTS"
+
+def _current_route() -> Optional[str]:
+    from services.tracing import current_trace
+    trace = current_trace()
+    return f"{trace.method} {trace.path}" if trace is not None else None
+
+class SlowStatement:
+    """Agregat satu SQL ternormalisasi"""
+
+    __slots__ = ("statement", "label", "count", "total", "max", "last_seen", "params_shape", "routes", "plan",
+                 "plan_captured_at")
+
+    def __init__(self, statement: str, label: str):
+        self.statement = statement
+        self.label = label
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last_seen = None
+        self.params_shape = None
+        self.routes = {}
+        self.plan = None
+        self.plan_captured_at = None
+
+    def to_dict(self) -> dict:
+        return {
+            "statement": self.statement,
+            "label": self.label,
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 2),
+            "mean_ms": round(self.total / self.count * 1000, 2) if self.count else 0,
+            "max_ms": round(self.max * 1000, 2),
+            "last_seen": self.last_seen.isoformat() if self.last_seen else None,
+            "params_shape": self.params_shape,
+            "routes": self.routes,
+            "explain": self.plan,
+            "explain_captured_at": self.plan_captured_at.isoformat() if self.plan_captured_at else None,
+        }
+
+class SlowQueryLog:
+    """Agregat statement lambat + request dengan terlalu banyak statement"""
+
+    def __init__(self, threshold_ms: float, explain_sample_rate: float, statements_per_request_warn: int):
+        self.threshold = threshold_ms / 1000.0
+        self.explain_sample_rate = explain_sample_rate
+        self.statements_per_request_warn = statements_per_request_warn
+        self._statements: Dict[str, SlowStatement] = {}
+        self._chatty_routes: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self.started_at = datetime.now()
+
+    def is_slow(self, duration: float) -> bool:
+        return duration >= self.threshold
+
+    def record(self, cursor, query, params, label: str, duration: float, many: bool = False):
+        """Catat satu statement lambat (dipanggil cursor setelah is_slow)"""
+        statement = normalize_sql(query)
+        shape = f"executemany x{len(params)}" if many and hasattr(params, "__len__") else params_shape(params)
+        route = _current_route()
+        with self._lock:
+            entry = self._statements.get(statement)
+            if entry is None:
+                if len(self._statements) >= MAX_TRACKED_STATEMENTS:
+                    # Buang entri dengan total waktu terkecil
+                    smallest = min(self._statements, key=lambda key: self._statements[key].total)
+                    del self._statements[smallest]
+                entry = self._statements[statement] = SlowStatement(statement, label)
+            entry.count += 1
+            entry.total += duration
+            entry.max = max(entry.max, duration)
+            entry.last_seen = datetime.now()
+            entry.params_shape = shape
+            if route:
+                entry.routes[route] = entry.routes.get(route, 0) + 1
+
+        logger.warning(
+            "🐢 Slow query",
+            extra={"fields": {
+                "duration_ms": round(duration * 1000, 2),
+                "label": label,
+                "statement": statement,
+                "params": shape,
+                "route": route,
+            }}
+        )
+
+        options = explain_options(statement) if not many and self._should_explain() else None
+        if options:
+            plan = self._explain(cursor, query, params, options)
+            if plan:
+                with self._lock:
+                    entry.plan = plan
+                    entry.plan_captured_at = datetime.now()
+
+    def _should_explain(self) -> bool:
+        return self.explain_sample_rate > 0 and random.random() < self.explain_sample_rate
+
+    def _explain(self, cursor, query, params, options: str) -> Optional[str]:
+        """
+        EXPLAIN (options) di koneksi cursor; gagal = tanpa plan. Di dalam
+        transaksi EXPLAIN dibungkus SAVEPOINT: error (mis. statement_timeout
+        saat ANALYZE) di-rollback ke savepoint dan transaksi request tetap bisa dipakai
+        """
+        import psycopg2.extensions
+        if isinstance(query, bytes):
+            query = query.decode("utf-8", "replace")
+        connection = cursor.connection
+        if connection.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_INERROR:
+            return None
+        use_savepoint = not connection.autocommit
+        start = time.perf_counter()
+        # Cursor biasa (bukan InstrumentedCursor) agar EXPLAIN tidak tercatat lagi
+        with connection.cursor(cursor_factory=psycopg2.extensions.cursor) as explain_cursor:
+            try:
+                if use_savepoint:
+                    explain_cursor.execute("SAVEPOINT slow_query_explain")
+                explain_cursor.execute(f"EXPLAIN ({options}) " + query, params)
+                plan = "\n".join(row[0] for row in explain_cursor.fetchall())
+                if use_savepoint:
+                    explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            except Exception as e:
+                logger.warning(f"⚠️ EXPLAIN capture failed: {e}")
+                if use_savepoint:
+                    try:
+                        explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                        explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+                    except Exception as rollback_error:
+                        logger.error(f"❌ Could not roll back EXPLAIN savepoint: {rollback_error}")
+                return None
+        logger.info(f"🔎 Captured EXPLAIN ({options}) plan in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return plan[:MAX_PLAN_CHARS]
+
+    def observe_request(self, trace):
+        """Dipanggil TracingMiddleware di akhir request dengan hitungan statement per label"""
+        total = sum(trace.db_statements.values())
+        if total < self.statements_per_request_warn:
+            return
+        label, repeated = max(trace.db_statements.items(), key=lambda item: item[1])
+        route = f"{trace.method} {trace.route or trace.path}"
+        with self._lock:
+            entry = self._chatty_routes.setdefault(route, {"requests": 0, "max_statements": 0, "statements": {}})
+            entry["requests"] += 1
+            entry["max_statements"] = max(entry["max_statements"], total)
+            entry["statements"] = dict(trace.db_statements)
+        logger.warning(
+            "🔁 Many statements in one request (possible N+1)",
+            extra={"fields": {"route": route, "statements": total, "most_repeated": label, "repeated": repeated,
+                              "trace_id": trace.trace_id}}
+        )
+
+    def top(self, limit: int = 20, order_by: str = "total") -> List[dict]:
+        key = {"total": lambda e: e.total, "max": lambda e: e.max, "count": lambda e: e.count}[order_by]
+        with self._lock:
+            entries = sorted(self._statements.values(), key=key, reverse=True)[:limit]
+            return [entry.to_dict() for entry in entries]
+
+    def chatty_routes(self) -> dict:
+        with self._lock:
+            return {route: dict(entry) for route, entry in self._chatty_routes.items()}
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._chatty_routes.clear()
+            self.started_at = datetime.now()
+
+slow_query_log = SlowQueryLog(
+    settings.SLOW_QUERY_MS,
+    settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+    settings.DB_STATEMENTS_PER_REQUEST_WARN
+)
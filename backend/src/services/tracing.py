@@ -0,0 +1,202 @@
+"""
+Trace span per request untuk pipeline prediksi + header Server-Timing
+
+Setiap request HTTP mendapat satu ``RequestTrace`` di contextvar. Kode pipeline
+membuka span dengan ``span("scaling")``; span dicatat ke trace request (jika ada)
+dan sekaligus ke histogram stage di /metrics. Statement DB dicatat otomatis oleh
+cursor di config/connection.py.
+
+Saat response dikirim, durasi per span dijumlahkan menjadi header
+``Server-Timing`` (terlihat di tab Network browser). Sebagian trace disimpan di
+ring buffer in-memory sesuai TRACE_SAMPLE_RATE, ditambah semua request yang
+lebih lambat dari TRACE_SLOW_MS, dan bisa dibaca admin lewat /admin/system/traces.
+
+Contextvar ikut tersalin ke threadpool FastAPI (endpoint sync), sehingga span
+dari random_forest_model.py dan predict.py masuk ke trace yang sama.
+
+Jumlah statement DB per request juga dihitung per label; request dengan terlalu
+banyak statement (pola N+1) dilaporkan ke services/slow_queries.py.
+"""
+import collections
+import contextvars
+import itertools
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from config.settings import settings
+from services.metrics import STAGE_DURATION
+from services.slow_queries import slow_query_log
+
+# Batas span per trace (loop insert feature_importance_logs bisa menghasilkan 19 span)
+MAX_SPANS_PER_TRACE = 64
+
+_current_trace: contextvars.ContextVar[Optional["RequestTrace"]] = contextvars.ContextVar("relaxaid_trace", default=None)
+_trace_ids = itertools.count(1)
+
+class RequestTrace:
+    """Span yang tercatat selama satu request"""
+
+    __slots__ = ("trace_id", "method", "path", "route", "status", "started_at", "start", "duration", "spans",
+                 "dropped_spans", "db_statements")
+
+    def __init__(self, method: str, path: str):
+        self.trace_id = f"{os.getpid()}-{next(_trace_ids)}"
+        self.method = method
+        self.path = path
+        self.route = None
+        self.status = None
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration = None
+        self.spans = []
+        self.dropped_spans = 0
+        # Jumlah statement per label ("INSERT feature_importance_logs": 19), tidak dibatasi seperti spans
+        self.db_statements = {}
+
+    def add_span(self, name: str, start: float, duration: float):
+        if len(self.spans) >= MAX_SPANS_PER_TRACE:
+            self.dropped_spans += 1
+            return
+        self.spans.append((name, start - self.start, duration))
+
+    def server_timing(self) -> str:
+        """Durasi dijumlahkan per nama span, urutan sesuai kemunculan pertama"""
+        totals = {}
+        for name, _, duration in self.spans:
+            totals[name] = totals.get(name, 0.0) + duration
+        entries = [f"{_metric_token(name)};dur={duration * 1000:.2f}" for name, duration in totals.items()]
+        entries.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.2f}")
+        return ", ".join(entries)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "spans": [
+                {"name": name, "offset_ms": round(offset * 1000, 3), "duration_ms": round(duration * 1000, 3)}
+                for name, offset, duration in self.spans
+            ],
+            "dropped_spans": self.dropped_spans,
+            "db_statements": self.db_statements
+        }
+
+def _metric_token(name: str) -> str:
+    # Server-Timing metric name harus berupa token HTTP (tanpa spasi)
+    return name.replace(" ", "_").replace(".", "_")
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+def record_span(name: str, start: float, duration: float):
+    """Tambahkan span yang sudah diukur ke trace request saat ini (no-op di luar request)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_span(name, start, duration)
+
+def record_statement(label: str, start: float, duration: float):
+    """Span + hitungan statement DB untuk trace request saat ini (dipanggil cursor)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_span(f"db {label}", start, duration)
+        trace.db_statements[label] = trace.db_statements.get(label, 0) + 1
+
+class span:
+    """
+    Context manager untuk satu stage pipeline: dicatat ke trace request dan ke
+    histogram relaxaid_stage_duration_seconds
+    """
+
+    __slots__ = ("name", "child", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.child = STAGE_DURATION.labels(name)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        duration = time.perf_counter() - self.start
+        self.child.observe(duration)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_span(self.name, self.start, duration)
+        return False
+
+class TraceBuffer:
+    """Ring buffer trace yang di-sample, dibaca oleh endpoint admin"""
+
+    def __init__(self, maxlen: int):
+        self._traces = collections.deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def add(self, trace: RequestTrace):
+        with self._lock:
+            self._traces.append(trace)
+
+    def query(self, limit: int = 50, route: str = None, min_duration_ms: float = 0) -> List[dict]:
+        with self._lock:
+            traces = list(self._traces)
+        results = []
+        for trace in reversed(traces):
+            if route and trace.route != route and trace.path != route:
+                continue
+            if trace.duration * 1000 < min_duration_ms:
+                continue
+            results.append(trace.to_dict())
+            if len(results) >= limit:
+                break
+        return results
+
+    def __len__(self):
+        return len(self._traces)
+
+trace_buffer = TraceBuffer(settings.TRACE_BUFFER_SIZE)
+
+def _should_keep(duration: float) -> bool:
+    if duration * 1000 >= settings.TRACE_SLOW_MS:
+        return True
+    return random.random() < settings.TRACE_SAMPLE_RATE
+
+class TracingMiddleware:
+    """Pure ASGI middleware: buat trace per request, kirim Server-Timing, sample ke buffer"""
+
+    def __init__(self, app, buffer: TraceBuffer = trace_buffer):
+        self.app = app
+        self.buffer = buffer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        trace = RequestTrace(scope["method"], scope["path"])
+        token = _current_trace.set(trace)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                trace.status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            trace.duration = time.perf_counter() - trace.start
+            trace.route = getattr(scope.get("route"), "path", None)
+            if trace.db_statements:
+                slow_query_log.observe_request(trace)
+            if _should_keep(trace.duration):
+                self.buffer.add(trace)
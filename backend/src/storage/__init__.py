@@ -0,0 +1,58 @@
+"""
+Storage backend aplikasi (lihat storage/base.py)
+
+STORAGE_BACKEND=postgres (default) memakai PostgreSQL lewat
+config/connection.py; STORAGE_BACKEND=sqlite memakai SQLite embedded di
+STORAGE_SQLITE_PATH (":memory:" = in-memory, untuk test dan benchmark).
+
+Yang sudah lewat storage backend: user/auth, penyimpanan prediksi (POST
+/prediksi, /prediksi/advanced, spool replay), riwayat dan data retraining.
+Route berikut masih query PostgreSQL langsung lewat get_connection() dan
+tidak berfungsi dengan STORAGE_BACKEND=sqlite:
+
+- /prediksi/analisis/tren, /prediksi/dashboard-stats, /prediksi/dashboard-stats-public
+- /admin/users, /admin/dashboard-stats, /admin/audit/login-logs
+- /admin/analytics/stress-distribution, /analytics/feature-importance, /analytics/user-activity
+- /admin/system/performance
+
+(/prediksi/trend dan /admin/analytics masih mengembalikan data contoh statis.)
+"""
+import threading
+
+from config.settings import settings
+from storage.base import ACTIVITY_FIELDS, DuplicateEmailError, Storage, activity_values
+
+__all__ = [
+    "ACTIVITY_FIELDS", "DuplicateEmailError", "Storage", "activity_values",
+    "create_storage", "get_storage", "set_storage",
+]
+
+_storage = None
+_storage_lock = threading.Lock()
+
+def create_storage(backend: str = None, **options) -> Storage:
+    """Buat instance backend baru: "postgres" atau "sqlite" (option ``path``)"""
+    backend = (backend or settings.STORAGE_BACKEND).lower()
+    if backend == "postgres":
+        from storage.postgres import PostgresStorage
+        return PostgresStorage(insert_timeout_ms=options.get("insert_timeout_ms", settings.PREDICTION_INSERT_TIMEOUT_MS))
+    if backend == "sqlite":
+        from storage.sqlite import SQLiteStorage
+        return SQLiteStorage(options.get("path", settings.STORAGE_SQLITE_PATH))
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+def get_storage() -> Storage:
+    """Backend bersama proses (dibuat sekali sesuai STORAGE_BACKEND)"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = create_storage()
+    return _storage
+
+def set_storage(storage: Storage) -> Storage:
+    """Ganti backend bersama (test/benchmark); return backend sebelumnya"""
+    global _storage
+    with _storage_lock:
+        previous, _storage = _storage, storage
+    return previous
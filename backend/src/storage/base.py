@@ -0,0 +1,170 @@
+"""
+Interface repository untuk data aplikasi
+
+Service dan router memanggil method di sini, bukan SQL inline, sehingga jalur
+request bisa dijalankan dengan PostgreSQL (produksi) maupun SQLite embedded
+(edge deployment, test, benchmark) tanpa perubahan kode. Kedua implementasi
+harus lolos test yang sama (test_storage.py).
+
+Semua row dikembalikan sebagai dict biasa dengan nama kolom schema.sql;
+kolom tanggal/waktu bertipe date/datetime.
+"""
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Kolom digital_activities yang diisi dari DigitalActivityInput (urutan INSERT)
+ACTIVITY_FIELDS = (
+    "screen_time_total", "durasi_pemakaian", "frekuensi_penggunaan", "jumlah_aplikasi", "notifikasi_count",
+    "durasi_tidur", "durasi_makan", "durasi_olahraga", "main_game", "belajar_online", "buka_sosmed",
+    "streaming", "scroll_time", "email_time", "panggilan_time", "waktu_pagi", "waktu_siang", "waktu_sore",
+    "waktu_malam", "jumlah_aktivitas",
+)
+USER_FIELDS = ("id", "nama", "email", "password", "role", "tanggal_daftar", "last_login", "is_active")
+LOGIN_STATUSES = ("success", "failed", "blocked")
+# Indeks kelas model untuk predicted/actual_stress_level
+STRESS_LEVEL_INDEX = {"Rendah": 0, "Sedang": 1, "Tinggi": 2}
+
+class DuplicateEmailError(Exception):
+    """Email sudah dipakai user lain (constraint UNIQUE users.email)"""
+
+class Storage(ABC):
+    """Repository users, digital_activities, predictions, feature_importance_logs, login_audit_logs"""
+
+    name = "base"
+
+    # --- Users ---
+
+    @abstractmethod
+    def get_user(self, user_id: int) -> Optional[dict]:
+        """User berdasarkan id (termasuk hash password), None jika tidak ada"""
+
+    @abstractmethod
+    def get_user_by_email(self, email: str) -> Optional[dict]:
+        """User berdasarkan email (termasuk hash password), None jika tidak ada"""
+
+    @abstractmethod
+    def create_user(self, nama: str, email: str, password_hash: str, role: str = "user",
+                    tanggal_daftar: datetime = None) -> dict:
+        """Insert user baru; raise DuplicateEmailError jika email sudah terdaftar"""
+
+    @abstractmethod
+    def update_last_login(self, user_id: int, login_time: datetime = None):
+        """Set users.last_login (default sekarang)"""
+
+    @abstractmethod
+    def delete_user(self, user_id: int) -> bool:
+        """Hapus user beserta aktivitas, prediksi dan log-nya (ON DELETE CASCADE)"""
+
+    # --- Aktivitas + prediksi ---
+
+    @abstractmethod
+    def save_prediction(self, user_id: int, activity: Dict[str, float], prediction: dict,
+                        tanggal: date = None) -> int:
+        """
+        Simpan satu aktivitas digital dan hasil prediksinya dalam satu transaksi
+
+        activity: nilai ACTIVITY_FIELDS; prediction: hasil prediksi_stres_digital
+        (predicted_label, confidence_score, probabilities, model_info.version).
+        Return id prediksi.
+        """
+
+    @abstractmethod
+    def get_prediction(self, prediction_id: int) -> Optional[dict]:
+        """Satu baris predictions, None jika tidak ada"""
+
+    @abstractmethod
+    def get_activity(self, activity_id: int) -> Optional[dict]:
+        """Satu baris digital_activities, None jika tidak ada"""
+
+    @abstractmethod
+    def prediction_history(self, user_id: int, since: datetime, limit: int) -> List[dict]:
+        """
+        Riwayat prediksi user sejak ``since``, terbaru dulu: predicted_stress_level,
+        confidence_score, prediction_date, screen_time_total, buka_sosmed,
+        notifikasi_count, waktu_malam
+        """
+
+    @abstractmethod
+    def record_feedback(self, prediction_id: int, actual_stress_level: str, user_feedback: str = None) -> bool:
+        """Simpan label sebenarnya (Rendah/Sedang/Tinggi) untuk satu prediksi; False jika tidak ada"""
+
+    # --- Feature importance ---
+
+    @abstractmethod
+    def save_feature_importance(self, prediction_id: int, feature_importance: Dict[str, float],
+                                model_version: str) -> int:
+        """Simpan importance per fitur dengan rank (1 = terbesar) dalam satu statement; return jumlah baris"""
+
+    @abstractmethod
+    def feature_importance(self, prediction_id: int) -> List[dict]:
+        """Log importance satu prediksi, urut rank_position"""
+
+    # --- Audit login ---
+
+    @abstractmethod
+    def record_login(self, user_id: Optional[int], login_status: str = "success", ip_address: str = None,
+                     user_agent: str = None, failure_reason: str = None, device_info: str = None) -> int:
+        """Catat satu percobaan login di login_audit_logs; return id log"""
+
+    @abstractmethod
+    def login_audit_logs(self, user_id: int = None, limit: int = 100) -> List[dict]:
+        """Log login terbaru (opsional untuk satu user), terbaru dulu"""
+
+    # --- Data training (feedback label) ---
+
+    @abstractmethod
+    @contextmanager
+    def labeled_activity_rows(self, feature_names: Sequence[str], batch_size: int = 5000,
+                              statement_timeout: int = None) -> Iterator[Tuple[int, Iterator[list]]]:
+        """
+        Snapshot konsisten aktivitas yang prediksinya punya actual_stress_level
+
+        Yield (total, batches): total baris dalam snapshot dan iterator batch
+        berisi tuple (fitur sesuai feature_names..., indeks kelas STRESS_LEVEL_INDEX)
+        """
+
+    def load_labeled_activities(self, feature_names: Sequence[str], batch_size: int = 5000,
+                                statement_timeout: int = None,
+                                on_batch: Callable[[int, int], None] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Muat data berlabel ke array float32 (n, n_features) dan int8 (n,) yang
+        dialokasikan sekali di awal. on_batch(loaded, total) dipanggil per batch
+        dan boleh raise untuk membatalkan load.
+        """
+        unknown = [name for name in feature_names if name not in ACTIVITY_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown activity fields: {unknown}")
+        n_features = len(feature_names)
+        with self.labeled_activity_rows(feature_names, batch_size, statement_timeout) as (total, batches):
+            X = np.empty((total, n_features), dtype=np.float32)
+            y = np.empty(total, dtype=np.int8)
+            loaded = 0
+            for batch in batches:
+                block = np.asarray(batch, dtype=np.float64)[: total - loaded]
+                end = loaded + len(block)
+                X[loaded:end] = block[:, :n_features]
+                y[loaded:end] = block[:, n_features]
+                loaded = end
+                if on_batch is not None:
+                    on_batch(loaded, total)
+                if loaded >= total:
+                    break
+        return X[:loaded], y[:loaded]
+
+    def close(self):
+        """Lepas resource backend (koneksi embedded)"""
+
+def activity_values(activity) -> Dict[str, float]:
+    """Nilai ACTIVITY_FIELDS dari DigitalActivityInput atau dict"""
+    if not isinstance(activity, dict):
+        activity = activity.model_dump()
+    return {field: activity[field] for field in ACTIVITY_FIELDS}
+
+def ranked_importance(feature_importance: Dict[str, float]) -> List[tuple]:
+    """[(rank, feature_name, importance)] urut importance terbesar dulu"""
+    ordered = sorted(feature_importance.items(), key=lambda item: item[1], reverse=True)
+    return [(rank, name, float(score)) for rank, (name, score) in enumerate(ordered, 1)]
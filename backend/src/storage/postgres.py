@@ -0,0 +1,240 @@
+"""
+Implementasi Storage di atas PostgreSQL (config/connection.py)
+
+Setiap method membuka koneksi lewat ``get_connection()`` sehingga circuit
+breaker, statement timeout per route group, metrics dan slow-query log tetap
+berlaku. DatabaseUnavailableError / StatementTimeoutError diteruskan apa
+adanya ke pemanggil.
+"""
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2.extras import execute_values
+
+from config.connection import get_connection
+from storage.base import (
+    ACTIVITY_FIELDS, STRESS_LEVEL_INDEX, USER_FIELDS, DuplicateEmailError, Storage, activity_values,
+    ranked_importance
+)
+
+LEVEL_CASE = " ".join(f"WHEN '{level}' THEN {index}" for level, index in STRESS_LEVEL_INDEX.items())
+
+class PostgresStorage(Storage):
+    """Repository PostgreSQL; insert_timeout_ms dipakai untuk insert di jalur prediksi"""
+
+    name = "postgres"
+
+    def __init__(self, insert_timeout_ms: int = None):
+        self.insert_timeout_ms = insert_timeout_ms
+
+    @contextmanager
+    def _cursor(self, statement_timeout: int = None):
+        """Cursor dalam satu transaksi: commit jika sukses, rollback jika error"""
+        conn = get_connection(statement_timeout=statement_timeout)
+        cursor = conn.cursor()
+        try:
+            yield cursor
+            conn.commit()
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _fetch_one(self, query: str, params: tuple) -> Optional[dict]:
+        with self._cursor() as cursor:
+            cursor.execute(query, params)
+            row = cursor.fetchone()
+        return dict(row) if row else None
+
+    # --- Users ---
+
+    def get_user(self, user_id: int) -> Optional[dict]:
+        return self._fetch_one(f"SELECT {', '.join(USER_FIELDS)} FROM users WHERE id = %s", (user_id,))
+
+    def get_user_by_email(self, email: str) -> Optional[dict]:
+        return self._fetch_one(f"SELECT {', '.join(USER_FIELDS)} FROM users WHERE email = %s", (email,))
+
+    def create_user(self, nama: str, email: str, password_hash: str, role: str = "user",
+                    tanggal_daftar: datetime = None) -> dict:
+        try:
+            with self._cursor() as cursor:
+                cursor.execute(f"""
+                    INSERT INTO users (nama, email, password, role, tanggal_daftar)
+                    VALUES (%s, %s, %s, %s, %s)
+                    RETURNING {', '.join(USER_FIELDS)}
+                """, (nama, email, password_hash, role, tanggal_daftar or datetime.now()))
+                return dict(cursor.fetchone())
+        except psycopg2.errors.UniqueViolation:
+            raise DuplicateEmailError(email)
+
+    def update_last_login(self, user_id: int, login_time: datetime = None):
+        with self._cursor() as cursor:
+            cursor.execute("UPDATE users SET last_login = %s WHERE id = %s", (login_time or datetime.now(), user_id))
+
+    def delete_user(self, user_id: int) -> bool:
+        with self._cursor() as cursor:
+            cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
+            return cursor.rowcount > 0
+
+    # --- Aktivitas + prediksi ---
+
+    def save_prediction(self, user_id: int, activity: Dict[str, float], prediction: dict,
+                        tanggal: date = None) -> int:
+        values = activity_values(activity)
+        with self._cursor(self.insert_timeout_ms) as cursor:
+            # Aktivitas dan prediksi dalam satu round trip
+            cursor.execute(f"""
+                WITH activity AS (
+                    INSERT INTO digital_activities (user_id, tanggal, {', '.join(ACTIVITY_FIELDS)})
+                    VALUES (%s, %s, {', '.join(['%s'] * len(ACTIVITY_FIELDS))})
+                    RETURNING id
+                )
+                INSERT INTO predictions (
+                    user_id, digital_activity_id, predicted_stress_level, confidence_score,
+                    probability_rendah, probability_sedang, probability_tinggi, model_version
+                )
+                SELECT %s, activity.id, %s, %s, %s, %s, %s, %s FROM activity
+                RETURNING id
+            """, (
+                user_id, tanggal or date.today(), *[values[field] for field in ACTIVITY_FIELDS],
+                user_id,
+                prediction["predicted_label"],
+                float(prediction["confidence_score"]),
+                float(prediction["probabilities"]["Rendah"]),
+                float(prediction["probabilities"]["Sedang"]),
+                float(prediction["probabilities"]["Tinggi"]),
+                prediction["model_info"]["version"]
+            ))
+            return cursor.fetchone()["id"]
+
+    def get_prediction(self, prediction_id: int) -> Optional[dict]:
+        return self._fetch_one("SELECT * FROM predictions WHERE id = %s", (prediction_id,))
+
+    def get_activity(self, activity_id: int) -> Optional[dict]:
+        return self._fetch_one("SELECT * FROM digital_activities WHERE id = %s", (activity_id,))
+
+    def prediction_history(self, user_id: int, since: datetime, limit: int) -> List[dict]:
+        with self._cursor() as cursor:
+            cursor.execute("""
+                SELECT
+                    p.predicted_stress_level,
+                    p.confidence_score,
+                    p.prediction_date,
+                    da.screen_time_total,
+                    da.buka_sosmed,
+                    da.notifikasi_count,
+                    da.waktu_malam
+                FROM predictions p
+                JOIN digital_activities da ON p.digital_activity_id = da.id
+                WHERE p.user_id = %s
+                AND p.prediction_date >= %s
+                ORDER BY p.prediction_date DESC
+                LIMIT %s
+            """, (user_id, since, limit))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def record_feedback(self, prediction_id: int, actual_stress_level: str, user_feedback: str = None) -> bool:
+        with self._cursor() as cursor:
+            cursor.execute(
+                "UPDATE predictions SET actual_stress_level = %s, user_feedback = COALESCE(%s, user_feedback) WHERE id = %s",
+                (actual_stress_level, user_feedback, prediction_id)
+            )
+            return cursor.rowcount > 0
+
+    # --- Feature importance ---
+
+    def save_feature_importance(self, prediction_id: int, feature_importance: Dict[str, float],
+                                model_version: str) -> int:
+        rows = [
+            (prediction_id, name, score, rank, model_version)
+            for rank, name, score in ranked_importance(feature_importance)
+        ]
+        with self._cursor(self.insert_timeout_ms) as cursor:
+            execute_values(cursor, """
+                INSERT INTO feature_importance_logs (
+                    prediction_id, feature_name, importance_score, rank_position, model_version
+                ) VALUES %s
+            """, rows)
+        return len(rows)
+
+    def feature_importance(self, prediction_id: int) -> List[dict]:
+        with self._cursor() as cursor:
+            cursor.execute("""
+                SELECT feature_name, importance_score, rank_position, model_version, created_at
+                FROM feature_importance_logs
+                WHERE prediction_id = %s
+                ORDER BY rank_position
+            """, (prediction_id,))
+            return [dict(row) for row in cursor.fetchall()]
+
+    # --- Audit login ---
+
+    def record_login(self, user_id: Optional[int], login_status: str = "success", ip_address: str = None,
+                     user_agent: str = None, failure_reason: str = None, device_info: str = None) -> int:
+        with self._cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO login_audit_logs (
+                    user_id, login_time, ip_address, user_agent, login_status, failure_reason, device_info
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s)
+                RETURNING id
+            """, (user_id, datetime.now(), ip_address, user_agent, login_status, failure_reason, device_info))
+            return cursor.fetchone()["id"]
+
+    def login_audit_logs(self, user_id: int = None, limit: int = 100) -> List[dict]:
+        with self._cursor() as cursor:
+            cursor.execute("""
+                SELECT id, user_id, login_time, logout_time, host(ip_address) AS ip_address, user_agent,
+                       login_status, failure_reason, device_info
+                FROM login_audit_logs
+                WHERE %(user_id)s IS NULL OR user_id = %(user_id)s
+                ORDER BY login_time DESC, id DESC
+                LIMIT %(limit)s
+            """, {"user_id": user_id, "limit": limit})
+            return [dict(row) for row in cursor.fetchall()]
+
+    # --- Data training (feedback label) ---
+
+    @contextmanager
+    def labeled_activity_rows(self, feature_names: Sequence[str], batch_size: int = 5000,
+                              statement_timeout: int = None) -> Iterator[Tuple[int, Iterator[list]]]:
+        conn = get_connection(statement_timeout=statement_timeout)
+        # COUNT dan server-side cursor melihat snapshot yang sama
+        conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+        columns = ", ".join(f"da.{name}" for name in feature_names)
+        query = """
+            FROM predictions p
+            JOIN digital_activities da ON p.digital_activity_id = da.id
+            WHERE p.actual_stress_level IS NOT NULL
+        """
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"SELECT COUNT(*) AS total {query}")
+                total = cursor.fetchone()["total"]
+            # Named cursor: baris di-stream dari server per batch_size, tuple biasa (bukan dict)
+            rows = conn.cursor(name="labeled_activity_rows", cursor_factory=psycopg2.extensions.cursor)
+            rows.itersize = batch_size
+            rows.execute(f"""
+                SELECT {columns},
+                       CASE p.actual_stress_level {LEVEL_CASE} END
+                {query}
+                ORDER BY p.id
+            """)
+
+            def batches():
+                while True:
+                    batch = rows.fetchmany(batch_size)
+                    if not batch:
+                        return
+                    yield batch
+
+            yield total, batches()
+            rows.close()
+        finally:
+            conn.rollback()
+            conn.close()
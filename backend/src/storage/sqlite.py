@@ -0,0 +1,321 @@
+"""
+Implementasi Storage embedded dengan SQLite (stdlib, tanpa server)
+
+Untuk edge deployment, test dan benchmark jalur request tanpa PostgreSQL.
+``path=":memory:"`` (default) = database in-memory per instance. Schema
+mengikuti database/schema.sql (constraint CHECK, UNIQUE, ON DELETE CASCADE
+dan index yang sama).
+
+Satu koneksi dipakai bersama semua thread (endpoint sync FastAPI berjalan di
+threadpool) dan diserialisasi dengan lock; SQLite hanya mengizinkan satu
+writer, jadi ini tidak mengurangi throughput tulis.
+"""
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from storage.base import (
+    ACTIVITY_FIELDS, STRESS_LEVEL_INDEX, USER_FIELDS, DuplicateEmailError, Storage, activity_values,
+    ranked_importance
+)
+
+LEVEL_CASE = " ".join(f"WHEN '{level}' THEN {index}" for level, index in STRESS_LEVEL_INDEX.items())
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nama TEXT NOT NULL,
+    email TEXT UNIQUE NOT NULL,
+    password TEXT NOT NULL,
+    role TEXT DEFAULT 'user' CHECK (role IN ('user', 'admin')),
+    tanggal_daftar TIMESTAMP,
+    last_login TIMESTAMP,
+    is_active BOOLEAN DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS digital_activities (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    tanggal DATE,
+    screen_time_total REAL NOT NULL,
+    durasi_pemakaian REAL NOT NULL,
+    frekuensi_penggunaan REAL NOT NULL,
+    jumlah_aplikasi INTEGER NOT NULL,
+    notifikasi_count INTEGER NOT NULL,
+    durasi_tidur REAL NOT NULL,
+    durasi_makan REAL NOT NULL,
+    durasi_olahraga REAL NOT NULL,
+    main_game REAL NOT NULL,
+    belajar_online REAL NOT NULL,
+    buka_sosmed REAL NOT NULL,
+    streaming REAL NOT NULL,
+    scroll_time REAL NOT NULL,
+    email_time REAL NOT NULL,
+    panggilan_time REAL NOT NULL,
+    waktu_pagi INTEGER DEFAULT 0,
+    waktu_siang INTEGER DEFAULT 0,
+    waktu_sore INTEGER DEFAULT 0,
+    waktu_malam INTEGER DEFAULT 0,
+    jumlah_aktivitas INTEGER NOT NULL,
+    created_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    digital_activity_id INTEGER REFERENCES digital_activities(id) ON DELETE CASCADE,
+    predicted_stress_level TEXT NOT NULL CHECK (predicted_stress_level IN ('Rendah', 'Sedang', 'Tinggi')),
+    confidence_score REAL NOT NULL,
+    probability_rendah REAL,
+    probability_sedang REAL,
+    probability_tinggi REAL,
+    model_version TEXT DEFAULT '1.0.0',
+    prediction_date TIMESTAMP,
+    actual_stress_level TEXT CHECK (actual_stress_level IN ('Rendah', 'Sedang', 'Tinggi')),
+    user_feedback TEXT
+);
+
+CREATE TABLE IF NOT EXISTS feature_importance_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    prediction_id INTEGER REFERENCES predictions(id) ON DELETE CASCADE,
+    feature_name TEXT NOT NULL,
+    importance_score REAL NOT NULL,
+    rank_position INTEGER NOT NULL,
+    model_version TEXT DEFAULT '1.0.0',
+    created_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS login_audit_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    login_time TIMESTAMP,
+    logout_time TIMESTAMP,
+    ip_address TEXT,
+    user_agent TEXT,
+    login_status TEXT DEFAULT 'success' CHECK (login_status IN ('success', 'failed', 'blocked')),
+    failure_reason TEXT,
+    device_info TEXT,
+    location_info TEXT,
+    session_duration REAL
+);
+
+CREATE INDEX IF NOT EXISTS idx_users_role ON users(role);
+CREATE INDEX IF NOT EXISTS idx_digital_activities_user_date ON digital_activities(user_id, tanggal);
+CREATE INDEX IF NOT EXISTS idx_predictions_user_date ON predictions(user_id, prediction_date);
+CREATE INDEX IF NOT EXISTS idx_feature_importance_prediction ON feature_importance_logs(prediction_id);
+CREATE INDEX IF NOT EXISTS idx_login_audit_user_time ON login_audit_logs(user_id, login_time);
+"""
+
+# Kolom bertipe tanggal/waktu disimpan ISO 8601 dan dibaca kembali sebagai date/datetime
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(sep=" "))
+sqlite3.register_converter("DATE", lambda value: date.fromisoformat(value.decode()))
+sqlite3.register_converter("TIMESTAMP", lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter("BOOLEAN", lambda value: value not in (b"0", b""))
+
+class SQLiteStorage(Storage):
+    """Repository SQLite embedded; ``:memory:`` untuk test dan benchmark"""
+
+    name = "sqlite"
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def _cursor(self):
+        """Cursor dalam satu transaksi (commit/rollback otomatis), satu thread sekaligus"""
+        with self._lock, self._conn:
+            yield self._conn.cursor()
+
+    def _fetch_one(self, query: str, params: tuple) -> Optional[dict]:
+        with self._cursor() as cursor:
+            row = cursor.execute(query, params).fetchone()
+        return dict(row) if row else None
+
+    # --- Users ---
+
+    def get_user(self, user_id: int) -> Optional[dict]:
+        return self._fetch_one(f"SELECT {', '.join(USER_FIELDS)} FROM users WHERE id = ?", (user_id,))
+
+    def get_user_by_email(self, email: str) -> Optional[dict]:
+        return self._fetch_one(f"SELECT {', '.join(USER_FIELDS)} FROM users WHERE email = ?", (email,))
+
+    def create_user(self, nama: str, email: str, password_hash: str, role: str = "user",
+                    tanggal_daftar: datetime = None) -> dict:
+        try:
+            with self._cursor() as cursor:
+                cursor.execute(
+                    "INSERT INTO users (nama, email, password, role, tanggal_daftar) VALUES (?, ?, ?, ?, ?)",
+                    (nama, email, password_hash, role, tanggal_daftar or datetime.now())
+                )
+                user_id = cursor.lastrowid
+        except sqlite3.IntegrityError as e:
+            if "users.email" in str(e):
+                raise DuplicateEmailError(email)
+            raise
+        return self.get_user(user_id)
+
+    def update_last_login(self, user_id: int, login_time: datetime = None):
+        with self._cursor() as cursor:
+            cursor.execute("UPDATE users SET last_login = ? WHERE id = ?", (login_time or datetime.now(), user_id))
+
+    def delete_user(self, user_id: int) -> bool:
+        with self._cursor() as cursor:
+            return cursor.execute("DELETE FROM users WHERE id = ?", (user_id,)).rowcount > 0
+
+    # --- Aktivitas + prediksi ---
+
+    def save_prediction(self, user_id: int, activity: Dict[str, float], prediction: dict,
+                        tanggal: date = None) -> int:
+        values = activity_values(activity)
+        now = datetime.now()
+        with self._cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO digital_activities (user_id, tanggal, {', '.join(ACTIVITY_FIELDS)}, created_at)
+                VALUES (?, ?, {', '.join(['?'] * len(ACTIVITY_FIELDS))}, ?)
+            """, (user_id, tanggal or date.today(), *[values[field] for field in ACTIVITY_FIELDS], now))
+            cursor.execute("""
+                INSERT INTO predictions (
+                    user_id, digital_activity_id, predicted_stress_level, confidence_score,
+                    probability_rendah, probability_sedang, probability_tinggi, model_version, prediction_date
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                user_id,
+                cursor.lastrowid,
+                prediction["predicted_label"],
+                float(prediction["confidence_score"]),
+                float(prediction["probabilities"]["Rendah"]),
+                float(prediction["probabilities"]["Sedang"]),
+                float(prediction["probabilities"]["Tinggi"]),
+                prediction["model_info"]["version"],
+                now
+            ))
+            return cursor.lastrowid
+
+    def get_prediction(self, prediction_id: int) -> Optional[dict]:
+        return self._fetch_one("SELECT * FROM predictions WHERE id = ?", (prediction_id,))
+
+    def get_activity(self, activity_id: int) -> Optional[dict]:
+        return self._fetch_one("SELECT * FROM digital_activities WHERE id = ?", (activity_id,))
+
+    def prediction_history(self, user_id: int, since: datetime, limit: int) -> List[dict]:
+        with self._cursor() as cursor:
+            rows = cursor.execute("""
+                SELECT
+                    p.predicted_stress_level,
+                    p.confidence_score,
+                    p.prediction_date,
+                    da.screen_time_total,
+                    da.buka_sosmed,
+                    da.notifikasi_count,
+                    da.waktu_malam
+                FROM predictions p
+                JOIN digital_activities da ON p.digital_activity_id = da.id
+                WHERE p.user_id = ?
+                AND p.prediction_date >= ?
+                ORDER BY p.prediction_date DESC
+                LIMIT ?
+            """, (user_id, since, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def record_feedback(self, prediction_id: int, actual_stress_level: str, user_feedback: str = None) -> bool:
+        with self._cursor() as cursor:
+            cursor.execute(
+                "UPDATE predictions SET actual_stress_level = ?, user_feedback = COALESCE(?, user_feedback) WHERE id = ?",
+                (actual_stress_level, user_feedback, prediction_id)
+            )
+            return cursor.rowcount > 0
+
+    # --- Feature importance ---
+
+    def save_feature_importance(self, prediction_id: int, feature_importance: Dict[str, float],
+                                model_version: str) -> int:
+        now = datetime.now()
+        rows = [
+            (prediction_id, name, score, rank, model_version, now)
+            for rank, name, score in ranked_importance(feature_importance)
+        ]
+        with self._cursor() as cursor:
+            cursor.executemany("""
+                INSERT INTO feature_importance_logs (
+                    prediction_id, feature_name, importance_score, rank_position, model_version, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+        return len(rows)
+
+    def feature_importance(self, prediction_id: int) -> List[dict]:
+        with self._cursor() as cursor:
+            rows = cursor.execute("""
+                SELECT feature_name, importance_score, rank_position, model_version, created_at
+                FROM feature_importance_logs
+                WHERE prediction_id = ?
+                ORDER BY rank_position
+            """, (prediction_id,)).fetchall()
+        return [dict(row) for row in rows]
+
+    # --- Audit login ---
+
+    def record_login(self, user_id: Optional[int], login_status: str = "success", ip_address: str = None,
+                     user_agent: str = None, failure_reason: str = None, device_info: str = None) -> int:
+        with self._cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO login_audit_logs (
+                    user_id, login_time, ip_address, user_agent, login_status, failure_reason, device_info
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (user_id, datetime.now(), ip_address, user_agent, login_status, failure_reason, device_info))
+            return cursor.lastrowid
+
+    def login_audit_logs(self, user_id: int = None, limit: int = 100) -> List[dict]:
+        with self._cursor() as cursor:
+            rows = cursor.execute("""
+                SELECT id, user_id, login_time, logout_time, ip_address, user_agent,
+                       login_status, failure_reason, device_info
+                FROM login_audit_logs
+                WHERE ? IS NULL OR user_id = ?
+                ORDER BY login_time DESC, id DESC
+                LIMIT ?
+            """, (user_id, user_id, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    # --- Data training (feedback label) ---
+
+    @contextmanager
+    def labeled_activity_rows(self, feature_names: Sequence[str], batch_size: int = 5000,
+                              statement_timeout: int = None) -> Iterator[Tuple[int, Iterator[list]]]:
+        columns = ", ".join(f"da.{name}" for name in feature_names)
+        query = """
+            FROM predictions p
+            JOIN digital_activities da ON p.digital_activity_id = da.id
+            WHERE p.actual_stress_level IS NOT NULL
+        """
+        # Lock ditahan selama iterasi: tidak ada write di antara COUNT dan SELECT
+        with self._lock:
+            cursor = self._conn.cursor()
+            try:
+                total = cursor.execute(f"SELECT COUNT(*) {query}").fetchone()[0]
+                cursor.execute(f"SELECT {columns}, CASE p.actual_stress_level {LEVEL_CASE} END {query} ORDER BY p.id")
+
+                def batches():
+                    while True:
+                        batch = cursor.fetchmany(batch_size)
+                        if not batch:
+                            return
+                        yield [tuple(row) for row in batch]
+
+                yield total, batches()
+            finally:
+                cursor.close()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
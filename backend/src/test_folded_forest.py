@@ -0,0 +1,145 @@
+"""
+Test FoldedForest (ml/folded_forest.py): StandardScaler dilipat ke threshold pohon
+
+Referensinya jalur lama persis: scaler.transform(DataFrame) lalu
+RandomForestClassifier.predict_proba dengan n_jobs=1. Probabilitas harus
+bit-identik (np.array_equal, bukan allclose) pada set input acak yang besar,
+termasuk nilai tepat di / bersebelahan dengan setiap threshold.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add project root and src to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config.settings import settings
+from ml.folded_forest import FoldedForest, raw_thresholds
+from ml.random_forest_model import (FEATURE_NAMES, FOREST_PARAMS, StressPredictionModel,
+                                    generate_activity_features, stress_labels_from_scores, stress_scores)
+
+FEATURES = list(FEATURE_NAMES)
+
+@pytest.fixture(scope="module")
+def fitted():
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.RandomState(7)
+    X = generate_activity_features(FEATURES, 1500, random_state=rng)
+    y = stress_labels_from_scores(stress_scores(X, FEATURES, random_state=rng))
+    scaler = StandardScaler().fit(pd.DataFrame(X, columns=FEATURES))
+    model = RandomForestClassifier(**dict(FOREST_PARAMS, n_estimators=60), n_jobs=1)
+    model.fit(scaler.transform(pd.DataFrame(X, columns=FEATURES)), y)
+    return model, scaler
+
+def reference_proba(model, scaler, X):
+    return model.predict_proba(scaler.transform(pd.DataFrame(X, columns=FEATURES)))
+
+def random_inputs(n: int, seed: int = 0) -> np.ndarray:
+    """Campuran baris realistis, nilai lebar acak, integer, nol dan nilai negatif"""
+    rng = np.random.RandomState(seed)
+    realistic = generate_activity_features(FEATURES, n, random_state=rng)
+    wide = rng.standard_normal((n, len(FEATURES))) * 10.0 ** rng.randint(-3, 4, size=(n, len(FEATURES)))
+    integers = rng.randint(0, 25, size=(n, len(FEATURES))).astype(np.float64)
+    mixed = np.where(rng.random_sample((n, len(FEATURES))) < 0.5, realistic, wide)
+    return np.vstack([realistic, wide, integers, mixed, np.zeros((1, len(FEATURES)))])
+
+def threshold_inputs(model, scaler, forest: FoldedForest) -> np.ndarray:
+    """Setiap fitur diisi tepat di threshold mentah, tetangga float64-nya, dan t * scale + mean"""
+    split = np.isfinite(forest.threshold)
+    features = forest.feature[split]
+    raw = forest.threshold[split]
+    scaled = np.concatenate([
+        estimator.tree_.threshold[estimator.tree_.children_left != -1] for estimator in model.estimators_
+    ])
+    naive = scaled * scaler.scale_[features] + scaler.mean_[features]
+    values = np.concatenate([raw, np.nextafter(raw, np.inf), np.nextafter(raw, -np.inf),
+                             naive, np.nextafter(naive, np.inf), np.nextafter(naive, -np.inf)])
+    columns = np.tile(features, 6)
+
+    rng = np.random.RandomState(1)
+    rows = generate_activity_features(FEATURES, len(values), random_state=rng)
+    rows[np.arange(len(values)), columns] = values
+    return rows
+
+def test_predict_proba_bitwise_identical(fitted):
+    model, scaler = fitted
+    forest = FoldedForest(model, scaler)
+    X = random_inputs(10000)
+
+    expected = reference_proba(model, scaler, X)
+    actual = forest.predict_proba(X)
+    assert actual.dtype == expected.dtype
+    assert np.array_equal(actual, expected)
+    assert np.array_equal(forest.predict(X), model.predict(scaler.transform(pd.DataFrame(X, columns=FEATURES))))
+
+def test_leaves_identical_at_threshold_boundaries(fitted):
+    model, scaler = fitted
+    forest = FoldedForest(model, scaler)
+    X = threshold_inputs(model, scaler, forest)
+
+    expected = model.apply(scaler.transform(pd.DataFrame(X, columns=FEATURES)))
+    assert np.array_equal(forest.apply(X), expected + forest.roots)
+    assert np.array_equal(forest.predict_proba(X), reference_proba(model, scaler, X))
+
+def test_raw_threshold_is_largest_value_going_left():
+    rng = np.random.RandomState(3)
+    thresholds = rng.standard_normal(500) * 3
+    mean = rng.standard_normal(500) * 50
+    scale = rng.uniform(1e-3, 1e3, 500)
+    raw = raw_thresholds(thresholds, mean, scale)
+
+    def goes_left(x):
+        return ((x - mean) / scale).astype(np.float32) <= thresholds
+
+    assert goes_left(raw).all()
+    assert not goes_left(np.nextafter(raw, np.inf)).any()
+
+def test_unbounded_thresholds():
+    # Semua input berhingga ke kiri (+inf) atau tidak ada yang ke kiri (-inf)
+    raw = raw_thresholds(np.array([np.inf, np.nan]), np.zeros(2), np.ones(2))
+    assert raw[0] == np.inf
+    assert raw[1] == -np.inf
+
+def test_without_scaler(fitted):
+    model, _ = fitted
+    forest = FoldedForest(model, None)
+    X = random_inputs(2000, seed=5)
+    assert np.array_equal(forest.predict_proba(X), model.predict_proba(X))
+
+def test_rejects_wrong_feature_count(fitted):
+    model, scaler = fitted
+    with pytest.raises(ValueError):
+        FoldedForest(model, scaler).predict_proba(np.zeros((2, len(FEATURES) - 1)))
+
+def test_stress_model_skips_scaler(fitted, monkeypatch):
+    model, scaler = fitted
+    stress_model = StressPredictionModel(autoload=False)
+    stress_model.model, stress_model.scaler = model, scaler
+    X = random_inputs(500, seed=9)
+
+    monkeypatch.setattr(settings, "MODEL_FOLD_SCALER", True)
+    monkeypatch.setattr(settings, "MODEL_FOLD_MAX_BATCH", 256)
+    monkeypatch.setattr(scaler, "transform", lambda *args, **kwargs: pytest.fail("scaler.transform called"))
+    folded = np.vstack([stress_model.predict_proba_batch(X[i:i + 1]) for i in range(0, 200)]
+                       + [stress_model.predict_proba_batch(X[200:456])])
+    assert stress_model._folded_forest() is stress_model._folded
+    monkeypatch.undo()
+
+    assert np.array_equal(folded, reference_proba(model, scaler, X[:456]))
+    # Batch besar lewat jalur scaler, hasil tetap sama
+    assert np.array_equal(stress_model.predict_proba_batch(X), reference_proba(model, scaler, X))
+
+    # Model yang diganti langsung (mis. kandidat retraining) ikut dilipat ulang
+    previous = stress_model._folded
+    X_scaled = scaler.transform(pd.DataFrame(X, columns=FEATURES))
+    replacement = type(model)(**dict(FOREST_PARAMS, n_estimators=5, oob_score=False), n_jobs=1)
+    stress_model.model = replacement.fit(X_scaled, model.predict(X_scaled))
+    assert np.array_equal(stress_model.predict_proba_batch(X[:10]), reference_proba(replacement, scaler, X[:10]))
+    assert stress_model._folded is not previous
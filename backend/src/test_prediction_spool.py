@@ -0,0 +1,151 @@
+"""
+Test spool prediksi (services/prediction_spool.py) dengan dua instance pada satu file
+
+Dua PredictionSpool dengan path yang sama mensimulasikan dua worker serve.py:
+koordinasinya lewat flock, bukan lock thread, sehingga berlaku juga antar
+instance dalam satu proses. Database diganti SQLiteStorage in-memory.
+"""
+import sys
+import threading
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Add project root and src to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import services.predict
+from schemas.digital_activity_schema import DigitalActivityInput
+from services.prediction_spool import PredictionSpool
+from storage import create_storage, set_storage
+
+ACTIVITY = DigitalActivityInput(
+    screen_time_total=8.5, durasi_pemakaian=7.0, frekuensi_penggunaan=12.0, jumlah_aplikasi=15,
+    notifikasi_count=45, durasi_tidur=7.0, durasi_makan=2.0, durasi_olahraga=1.0, main_game=2.5,
+    belajar_online=3.0, buka_sosmed=2.0, streaming=1.5, scroll_time=1.0, email_time=0.5,
+    panggilan_time=0.3, waktu_pagi=1, waktu_siang=1, waktu_sore=0, waktu_malam=1, jumlah_aktivitas=8
+)
+PREDICTION = {
+    "predicted_label": "Sedang",
+    "confidence_score": 0.61,
+    "probabilities": {"Rendah": 0.14, "Sedang": 0.61, "Tinggi": 0.25},
+    "model_info": {"version": "1.0.0"},
+    "feature_importance": {"screen_time_total": 0.2, "buka_sosmed": 0.1},
+}
+
+@pytest.fixture
+def storage():
+    storage = create_storage("sqlite", path=":memory:")
+    previous = set_storage(storage)
+    yield storage
+    set_storage(previous)
+
+@pytest.fixture
+def user(storage):
+    return storage.create_user("Spool Test", f"spool-{uuid.uuid4().hex[:8]}@relaxaid.test", "hashed", "user")["id"]
+
+@pytest.fixture
+def spools(tmp_path):
+    path = str(tmp_path / "spool" / "predictions.jsonl")
+    return PredictionSpool(path, max_records=100), PredictionSpool(path, max_records=100)
+
+def saved_count(storage, user_id) -> int:
+    from datetime import datetime
+    return len(storage.prediction_history(user_id, datetime(2000, 1, 1), 1000))
+
+def test_pending_shared_between_instances(spools, user):
+    worker_a, worker_b = spools
+    assert worker_b.pending() == 0
+    for _ in range(3):
+        assert worker_a.append(user, ACTIVITY, PREDICTION)
+    assert worker_b.pending() == 3
+
+    assert worker_b.replay() == 3
+    assert worker_a.pending() == 0
+    assert worker_b.pending() == 0
+
+def test_max_records_counts_other_workers(tmp_path, user):
+    path = str(tmp_path / "predictions.jsonl")
+    worker_a, worker_b = PredictionSpool(path, max_records=2), PredictionSpool(path, max_records=2)
+    assert worker_a.append(user, ACTIVITY, PREDICTION)
+    assert worker_b.append(user, ACTIVITY, PREDICTION)
+    assert not worker_a.append(user, ACTIVITY, PREDICTION)
+    assert worker_a.dropped == 1
+
+def test_concurrent_replay_does_not_duplicate(spools, storage, user, monkeypatch):
+    worker_a, worker_b = spools
+    for _ in range(3):
+        worker_a.append(user, ACTIVITY, PREDICTION)
+
+    started, release = threading.Event(), threading.Event()
+    original = services.predict.save_prediction_to_database
+
+    def blocking_save(**kwargs):
+        started.set()
+        release.wait(10)
+        return original(**kwargs)
+
+    monkeypatch.setattr(services.predict, "save_prediction_to_database", blocking_save)
+    results = {}
+    replay_a = threading.Thread(target=lambda: results.setdefault("a", worker_a.replay()))
+    replay_a.start()
+    assert started.wait(10)
+
+    # Worker B melihat .replaying milik A tetapi tidak ikut me-replay
+    assert worker_b.replay() == 0
+    # Append selama replay masuk ke spool baru, bukan ke file yang sedang di-replay
+    assert worker_b.append(user, ACTIVITY, PREDICTION)
+    assert worker_b.pending() == 4
+
+    release.set()
+    replay_a.join(10)
+    monkeypatch.undo()
+
+    assert results["a"] == 3
+    assert saved_count(storage, user) == 3
+    assert worker_a.pending() == 1 and worker_b.pending() == 1
+
+    assert worker_b.replay() == 1
+    assert saved_count(storage, user) == 4
+    assert worker_a.pending() == 0 and worker_b.pending() == 0
+
+def test_leftover_replaying_file_is_recovered(spools, storage, user):
+    worker_a, worker_b = spools
+    worker_a.append(user, ACTIVITY, PREDICTION)
+    # Proses yang mati di tengah replay meninggalkan .replaying tanpa memegang lock
+    Path(worker_a.path).rename(worker_a.replay_path)
+    assert worker_b.pending() == 1
+
+    assert worker_b.replay() == 1
+    assert saved_count(storage, user) == 1
+    assert worker_a.pending() == 0
+
+def test_interrupted_replay_does_not_insert_twice(spools, storage, user, monkeypatch):
+    worker_a, worker_b = spools
+    for _ in range(3):
+        worker_a.append(user, ACTIVITY, PREDICTION)
+
+    original = services.predict.save_prediction_to_database
+    calls = []
+
+    def crash_on_second(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 2:
+            raise RuntimeError("worker killed")
+        return original(**kwargs)
+
+    # Record pertama tersimpan, lalu proses "mati" sebelum .replaying dihapus
+    monkeypatch.setattr(services.predict, "save_prediction_to_database", crash_on_second)
+    with pytest.raises(RuntimeError):
+        worker_a.replay()
+    monkeypatch.undo()
+    assert saved_count(storage, user) == 1
+    assert worker_b.pending() == 2
+
+    assert worker_b.replay() == 2
+    assert saved_count(storage, user) == 3
+    assert worker_a.pending() == 0
+    assert not Path(worker_a.offset_path).exists()
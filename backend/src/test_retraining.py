@@ -0,0 +1,161 @@
+"""
+Test pipeline retraining (services/retraining.py) terhadap SQLiteStorage
+
+Data berlabel dibangkitkan dengan aturan klinis yang sama seperti training
+(stress_scores), model aktif sengaja dilatih dengan label acak sehingga
+kandidat bisa mengalahkannya. Dua RetrainPipeline dengan MODEL_ARTIFACT_DIR
+yang sama mensimulasikan dua worker serve.py.
+"""
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add project root and src to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import ml.holdout
+from config.settings import settings
+from ml.random_forest_model import (FEATURE_NAMES, PromotionWatcher, StressPredictionModel, generate_activity_features,
+                                    get_stress_model, publish_promotion, set_stress_model, stress_labels_from_scores,
+                                    stress_scores)
+from services.retraining import RetrainBusyError, RetrainPipeline
+from storage import create_storage, set_storage
+
+FEATURES = list(FEATURE_NAMES)
+LABELS = {0: "Rendah", 1: "Sedang", 2: "Tinggi"}
+N_ROWS = 240
+
+@pytest.fixture
+def storage():
+    storage = create_storage("sqlite", path=":memory:")
+    previous = set_storage(storage)
+    user_id = storage.create_user("Retrain Test", f"retrain-{uuid.uuid4().hex[:8]}@relaxaid.test", "hashed")["id"]
+    rng = np.random.RandomState(11)
+    X = generate_activity_features(FEATURES, N_ROWS, random_state=rng)
+    y = stress_labels_from_scores(stress_scores(X, FEATURES, random_state=rng)).astype(int)
+    for row, label in zip(X, y):
+        activity = dict(zip(FEATURES, row.tolist()), screen_time_total=float(row[0]))
+        prediction_id = storage.save_prediction(user_id, activity, {
+            "predicted_label": "Sedang", "confidence_score": 0.5,
+            "probabilities": {"Rendah": 0.25, "Sedang": 0.5, "Tinggi": 0.25}, "model_info": {"version": "1.0.0"},
+        })
+        storage.record_feedback(prediction_id, LABELS[label])
+    yield storage
+    set_storage(previous)
+
+@pytest.fixture
+def incumbent():
+    """Model aktif berlabel acak: akurasinya kira-kira tebakan"""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.RandomState(5)
+    X = pd.DataFrame(generate_activity_features(FEATURES, 300, random_state=rng), columns=FEATURES)
+    model = StressPredictionModel(autoload=False)
+    model.scaler = StandardScaler().fit(X)
+    model.model = RandomForestClassifier(n_estimators=10, random_state=0, n_jobs=1).fit(
+        model.scaler.transform(X), rng.randint(0, 3, len(X)).astype(np.float64))
+    previous = set_stress_model(model)
+    yield model
+    set_stress_model(previous)
+
+@pytest.fixture
+def workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "RETRAIN_MIN_ROWS", 100)
+    monkeypatch.setattr(settings, "RETRAIN_N_JOBS", 1)
+    monkeypatch.setattr(settings, "MODEL_ARTIFACT_PATH", "")
+    monkeypatch.setattr(settings, "HOLDOUT_DIR", str(tmp_path / "holdout"))
+    monkeypatch.setattr(ml.holdout, "_cache", {})
+    artifact_dir = str(tmp_path / "artifacts")
+    return RetrainPipeline(artifact_dir), RetrainPipeline(artifact_dir)
+
+def wait_until(predicate, timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.1)
+    return False
+
+def test_promotion_gated_on_holdout_improvement(storage, incumbent, workers, monkeypatch):
+    worker_a, _ = workers
+    monkeypatch.setattr(settings, "RETRAIN_MIN_IMPROVEMENT", 1.0)
+
+    job = worker_a.start()
+    assert wait_until(lambda: not worker_a.running)
+    assert job.status == "succeeded", job.message
+    assert job.rows["labeled"] == N_ROWS
+    assert not job.metrics["candidate_beats_incumbent"]
+    assert not job.promoted
+    assert os.path.exists(job.artifact_path)
+    assert get_stress_model() is incumbent
+
+def test_promotion_reaches_other_workers(storage, incumbent, workers, monkeypatch):
+    worker_a, worker_b = workers
+    monkeypatch.setattr(settings, "RETRAIN_MIN_IMPROVEMENT", 0.0)
+    monkeypatch.setattr(settings, "RETRAIN_HOLDOUT_TOLERANCE", 1.0)
+
+    job = worker_a.start()
+    assert wait_until(lambda: not worker_a.running)
+    assert job.status == "succeeded", job.message
+    assert job.metrics["candidate_beats_incumbent"] and job.promoted
+    promoted = get_stress_model()
+    assert promoted is not incumbent
+
+    # Status terbaca dari worker lain
+    assert worker_b.status()["job_id"] == job.id
+    assert worker_b.status()["promoted"]
+
+    # Worker lain masih memegang model lama sampai marker promosi dibaca
+    set_stress_model(incumbent)
+    watcher = PromotionWatcher(worker_a.artifact_dir, interval=1.0)
+    assert watcher.check()
+    assert get_stress_model().content_hash == promoted.content_hash
+    assert not watcher.check()
+
+def test_cancel_from_other_worker(storage, incumbent, workers):
+    worker_a, worker_b = workers
+    job = worker_a.start()
+    assert wait_until(lambda: job.stage == "train")
+
+    with pytest.raises(RetrainBusyError):
+        worker_b.start()
+    assert worker_b.running
+    assert worker_b.status()["job_id"] == job.id
+
+    assert worker_b.cancel() == job.id
+    assert wait_until(lambda: not worker_a.running, timeout=30)
+    assert job.status == "cancelled"
+    assert worker_b.status()["status"] == "cancelled"
+    assert not worker_b.running
+    assert worker_b.cancel() is None
+    assert get_stress_model() is incumbent
+
+def test_stale_promotion_marker_ignored(incumbent, tmp_path):
+    # Marker dari promosi lama, sebelum artifact yang sekarang di-deploy dimuat
+    promoted = StressPredictionModel(autoload=False)
+    promoted.model = incumbent.model
+    promoted_path = str(tmp_path / "promoted.joblib")
+    promoted.save_artifact(promoted_path)
+    publish_promotion(promoted, promoted_path, directory=str(tmp_path))
+
+    deployed_path = str(tmp_path / "deployed.joblib")
+    incumbent.save_artifact(deployed_path)
+    deployed = StressPredictionModel(autoload=False)
+    deployed.load_artifact(deployed_path)
+    set_stress_model(deployed)
+    assert not PromotionWatcher(str(tmp_path), interval=1.0).check()
+    assert get_stress_model() is deployed
+
+    # Promosi setelah model dimuat tetap diikuti
+    publish_promotion(promoted, promoted_path, directory=str(tmp_path))
+    assert PromotionWatcher(str(tmp_path), interval=1.0).check()
+    assert get_stress_model().content_hash == promoted.content_hash
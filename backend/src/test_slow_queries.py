@@ -0,0 +1,100 @@
+"""
+Test capture EXPLAIN di slow-query log (services/slow_queries.py)
+
+Pemilihan opsi EXPLAIN selalu dijalankan; test terhadap PostgreSQL ikut
+dijalankan jika database di DATABASE_* (.env) bisa dihubungi dan memakai
+tabel temporary (hilang saat koneksi ditutup).
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root and src to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from dotenv import load_dotenv
+load_dotenv(project_root / '.env')
+
+from config.settings import settings
+from services.slow_queries import SlowQueryLog, explain_options, normalize_sql
+
+SAVE_PREDICTION = """
+    WITH activity AS (
+        INSERT INTO digital_activities (user_id, tanggal) VALUES (%s, %s) RETURNING id
+    )
+    INSERT INTO predictions (user_id, digital_activity_id)
+    SELECT %s, id FROM activity RETURNING id
+"""
+
+def test_explain_options():
+    assert explain_options(normalize_sql("SELECT * FROM predictions WHERE user_id = %s")) == "ANALYZE, BUFFERS"
+    assert explain_options(normalize_sql("WITH recent AS (SELECT 1) SELECT * FROM recent")) == "ANALYZE, BUFFERS"
+    # Operasi tulis di mana pun: tanpa ANALYZE (query tidak dieksekusi)
+    assert explain_options(normalize_sql(SAVE_PREDICTION)) == "COSTS"
+    assert explain_options(normalize_sql("SELECT * FROM users WHERE id = %s FOR UPDATE")) == "COSTS"
+    assert explain_options(normalize_sql("UPDATE users SET last_login = now()")) == "COSTS"
+    # Kata kunci di dalam literal string tidak dihitung
+    assert explain_options(normalize_sql("SELECT * FROM logs WHERE action = 'DELETE'")) == "ANALYZE, BUFFERS"
+    assert explain_options(normalize_sql("SET statement_timeout = 100")) is None
+
+def _connect():
+    import psycopg2
+    return psycopg2.connect(
+        host=settings.DATABASE_HOST, port=settings.DATABASE_PORT, database=settings.DATABASE_NAME,
+        user=settings.DATABASE_USER, password=settings.DATABASE_PASSWORD, connect_timeout=2
+    )
+
+def _postgres_available() -> bool:
+    try:
+        _connect().close()
+        return True
+    except Exception:
+        return False
+
+postgres = pytest.mark.skipif(not _postgres_available(), reason="PostgreSQL not reachable")
+
+@pytest.fixture
+def connection():
+    connection = _connect()
+    with connection.cursor() as cursor:
+        cursor.execute("CREATE TEMPORARY TABLE explain_target (id SERIAL PRIMARY KEY, value INTEGER)")
+    connection.commit()
+    yield connection
+    connection.rollback()
+    connection.close()
+
+def record(log: SlowQueryLog, cursor, query, params):
+    log.record(cursor, query, params, label="test", duration=1.0)
+    return log.top(1)[0]["explain"]
+
+@postgres
+def test_data_modifying_cte_is_not_executed_again(connection):
+    log = SlowQueryLog(threshold_ms=0, explain_sample_rate=1.0, statements_per_request_warn=100)
+    query = "WITH inserted AS (INSERT INTO explain_target (value) VALUES (%s) RETURNING id) SELECT id FROM inserted"
+    with connection.cursor() as cursor:
+        cursor.execute(query, (1,))
+        plan = record(log, cursor, query, (1,))
+        cursor.execute("SELECT count(*) FROM explain_target")
+        assert cursor.fetchone()[0] == 1
+    assert plan and "actual time" not in plan
+
+@postgres
+def test_select_gets_analyze_plan(connection):
+    log = SlowQueryLog(threshold_ms=0, explain_sample_rate=1.0, statements_per_request_warn=100)
+    with connection.cursor() as cursor:
+        plan = record(log, cursor, "SELECT * FROM explain_target WHERE value = %s", (1,))
+    assert "actual time" in plan
+
+@postgres
+def test_failed_explain_keeps_transaction_usable(connection):
+    log = SlowQueryLog(threshold_ms=0, explain_sample_rate=1.0, statements_per_request_warn=100)
+    with connection.cursor() as cursor:
+        cursor.execute("INSERT INTO explain_target (value) VALUES (7)")
+        cursor.execute("SET LOCAL statement_timeout = 50")
+        # EXPLAIN ANALYZE menjalankan ulang query lambat dan dibatalkan statement_timeout
+        assert record(log, cursor, "SELECT pg_sleep(0.5)", None) is None
+        cursor.execute("SELECT value FROM explain_target")
+        assert cursor.fetchall() == [(7,)]
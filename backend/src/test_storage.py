@@ -0,0 +1,188 @@
+"""
+Test suite bersama untuk semua storage backend
+
+SQLite in-memory selalu dijalankan; PostgreSQL ikut dijalankan jika database
+di DATABASE_* (.env) bisa dihubungi. Data test memakai email unik dan dihapus
+lagi di akhir test (cascade ke aktivitas, prediksi dan log).
+"""
+import sys
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add project root and src to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from dotenv import load_dotenv
+load_dotenv(project_root / '.env')
+
+from storage import DuplicateEmailError, create_storage, set_storage
+from storage.base import ACTIVITY_FIELDS
+
+ACTIVITY = {
+    "screen_time_total": 8.5, "durasi_pemakaian": 7.0, "frekuensi_penggunaan": 12.0,
+    "jumlah_aplikasi": 15, "notifikasi_count": 45, "durasi_tidur": 7.0, "durasi_makan": 2.0,
+    "durasi_olahraga": 1.0, "main_game": 2.5, "belajar_online": 3.0, "buka_sosmed": 2.0,
+    "streaming": 1.5, "scroll_time": 1.0, "email_time": 0.5, "panggilan_time": 0.3,
+    "waktu_pagi": 1, "waktu_siang": 1, "waktu_sore": 0, "waktu_malam": 1, "jumlah_aktivitas": 8
+}
+PREDICTION = {
+    "predicted_label": "Sedang",
+    "confidence_score": np.float64(0.61),
+    "probabilities": {"Rendah": 0.14, "Sedang": 0.61, "Tinggi": 0.25},
+    "model_info": {"version": "1.0.0"},
+}
+
+def _postgres_available() -> bool:
+    try:
+        import psycopg2
+        from config.settings import settings
+        psycopg2.connect(
+            host=settings.DATABASE_HOST, port=settings.DATABASE_PORT, database=settings.DATABASE_NAME,
+            user=settings.DATABASE_USER, password=settings.DATABASE_PASSWORD, connect_timeout=2
+        ).close()
+        return True
+    except Exception:
+        return False
+
+@pytest.fixture(scope="module", params=[
+    "sqlite",
+    pytest.param("postgres", marks=pytest.mark.skipif(not _postgres_available(), reason="PostgreSQL not reachable")),
+])
+def storage(request):
+    backend = create_storage(request.param)
+    yield backend
+    backend.close()
+
+@pytest.fixture
+def user(storage):
+    created = storage.create_user("Storage Test", f"storage-{uuid.uuid4().hex}@relaxaid.test", "hash")
+    yield created
+    storage.delete_user(created["id"])
+
+def test_create_and_get_user(storage, user):
+    assert user["role"] == "user"
+    assert user["is_active"] is True
+    assert isinstance(user["tanggal_daftar"], datetime)
+    assert user["last_login"] is None
+    assert storage.get_user(user["id"]) == user
+    assert storage.get_user_by_email(user["email"]) == user
+    assert storage.get_user_by_email(f"missing-{uuid.uuid4().hex}@relaxaid.test") is None
+
+def test_duplicate_email_rejected(storage, user):
+    with pytest.raises(DuplicateEmailError):
+        storage.create_user("Other", user["email"], "hash")
+
+def test_update_last_login(storage, user):
+    login_time = datetime(2025, 3, 1, 8, 30)
+    storage.update_last_login(user["id"], login_time)
+    assert storage.get_user(user["id"])["last_login"] == login_time
+
+def test_save_prediction_roundtrip(storage, user):
+    prediction_id = storage.save_prediction(user["id"], ACTIVITY, PREDICTION, tanggal=date(2025, 3, 1))
+    prediction = storage.get_prediction(prediction_id)
+    assert prediction["user_id"] == user["id"]
+    assert prediction["predicted_stress_level"] == "Sedang"
+    assert prediction["confidence_score"] == pytest.approx(0.61)
+    assert prediction["probability_tinggi"] == pytest.approx(0.25)
+    assert prediction["model_version"] == "1.0.0"
+    assert isinstance(prediction["prediction_date"], datetime)
+
+    activity = storage.get_activity(prediction["digital_activity_id"])
+    assert activity["tanggal"] == date(2025, 3, 1)
+    assert {field: activity[field] for field in ACTIVITY_FIELDS} == ACTIVITY
+
+def test_invalid_label_rejected(storage, user):
+    with pytest.raises(Exception):
+        storage.save_prediction(user["id"], ACTIVITY, dict(PREDICTION, predicted_label="Ekstrem"))
+    assert storage.prediction_history(user["id"], datetime.now() - timedelta(days=1), 10) == []
+
+def test_prediction_history(storage, user):
+    other = storage.create_user("Other", f"storage-{uuid.uuid4().hex}@relaxaid.test", "hash")
+    try:
+        for label in ("Rendah", "Tinggi", "Sedang"):
+            storage.save_prediction(user["id"], ACTIVITY, dict(PREDICTION, predicted_label=label))
+        storage.save_prediction(other["id"], ACTIVITY, PREDICTION)
+
+        history = storage.prediction_history(user["id"], datetime.now() - timedelta(days=1), 10)
+        assert len(history) == 3
+        assert [row["prediction_date"] for row in history] == sorted(
+            (row["prediction_date"] for row in history), reverse=True
+        )
+        assert history[0]["buka_sosmed"] == ACTIVITY["buka_sosmed"]
+        assert history[0]["notifikasi_count"] == ACTIVITY["notifikasi_count"]
+        assert len(storage.prediction_history(user["id"], datetime.now() - timedelta(days=1), 2)) == 2
+        assert storage.prediction_history(user["id"], datetime.now() + timedelta(days=1), 10) == []
+    finally:
+        storage.delete_user(other["id"])
+
+def test_feature_importance_ranked(storage, user):
+    prediction_id = storage.save_prediction(user["id"], ACTIVITY, PREDICTION)
+    importance = {"buka_sosmed": np.float64(0.2), "durasi_tidur": np.float64(0.5), "scroll_time": 0.3}
+    assert storage.save_feature_importance(prediction_id, importance, "1.0.0") == 3
+    logs = storage.feature_importance(prediction_id)
+    assert [(row["rank_position"], row["feature_name"]) for row in logs] == [
+        (1, "durasi_tidur"), (2, "scroll_time"), (3, "buka_sosmed")
+    ]
+    assert logs[0]["importance_score"] == pytest.approx(0.5)
+    assert logs[0]["model_version"] == "1.0.0"
+
+def test_login_audit_logs(storage, user):
+    failed = storage.record_login(user["id"], "failed", "10.0.0.1", "pytest", failure_reason="Password salah")
+    success = storage.record_login(user["id"], "success", "10.0.0.1", "pytest")
+    logs = storage.login_audit_logs(user_id=user["id"])
+    assert [row["id"] for row in logs] == [success, failed]
+    assert logs[1]["login_status"] == "failed"
+    assert logs[1]["failure_reason"] == "Password salah"
+    assert logs[0]["ip_address"] == "10.0.0.1"
+    assert len(storage.login_audit_logs(user_id=user["id"], limit=1)) == 1
+    assert success in [row["id"] for row in storage.login_audit_logs()]
+
+def test_delete_user_cascades(storage):
+    created = storage.create_user("Cascade", f"storage-{uuid.uuid4().hex}@relaxaid.test", "hash")
+    prediction_id = storage.save_prediction(created["id"], ACTIVITY, PREDICTION)
+    storage.save_feature_importance(prediction_id, {"buka_sosmed": 0.4}, "1.0.0")
+    assert storage.delete_user(created["id"]) is True
+    assert storage.get_user(created["id"]) is None
+    assert storage.get_prediction(prediction_id) is None
+    assert storage.feature_importance(prediction_id) == []
+    assert storage.delete_user(created["id"]) is False
+
+def test_prediction_service_uses_storage(storage, user):
+    from schemas.digital_activity_schema import DigitalActivityInput
+    from services.predict import save_feature_importance_logs, save_prediction_to_database
+
+    previous = set_storage(storage)
+    try:
+        prediction_id = save_prediction_to_database(user["id"], DigitalActivityInput(**ACTIVITY), PREDICTION)
+        save_feature_importance_logs(prediction_id, {"scroll_time": np.float64(0.3)}, "1.0.0")
+    finally:
+        set_storage(previous)
+    assert storage.get_prediction(prediction_id)["user_id"] == user["id"]
+    assert storage.feature_importance(prediction_id)[0]["feature_name"] == "scroll_time"
+
+def test_load_labeled_activities(storage, user):
+    feature_names = list(ACTIVITY_FIELDS[1:])
+    labeled = []
+    for index, level in enumerate(("Tinggi", "Rendah", None, "Sedang")):
+        activity = dict(ACTIVITY, durasi_tidur=5.0 + index)
+        prediction_id = storage.save_prediction(user["id"], activity, PREDICTION)
+        if level is not None:
+            assert storage.record_feedback(prediction_id, level, "sesuai") is True
+            labeled.append((5.0 + index, {"Rendah": 0, "Sedang": 1, "Tinggi": 2}[level]))
+    assert storage.get_prediction(prediction_id)["user_feedback"] == "sesuai"
+    assert storage.record_feedback(-1, "Rendah") is False
+
+    progress = []
+    X, y = storage.load_labeled_activities(feature_names, batch_size=2, on_batch=lambda done, total: progress.append(done))
+    assert X.dtype == np.float32 and y.dtype == np.int8
+    assert X.shape[1] == len(feature_names)
+    # Tabel bisa berisi label dari data lain (PostgreSQL bersama): cek baris milik test ini
+    rows = {(float(row[feature_names.index("durasi_tidur")]), int(label)) for row, label in zip(X, y)}
+    assert set(labeled) <= rows
+    assert progress[-1] == len(y)